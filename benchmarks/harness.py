@@ -0,0 +1,86 @@
+import json
+import math
+import statistics
+import time
+
+
+def percentile(samples, q: float) -> float:
+    """Linear-interpolated `q` quantile (0..1) of `samples`."""
+    if not samples:
+        return math.nan
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class Result:
+    """Latency samples of one benchmark, in seconds per operation."""
+    def __init__(self, name: str, samples, ops: int, elapsed: float, nbytes: int=0):
+        self.name = name
+        self.samples = list(samples)
+        self.ops = ops
+        self.elapsed = elapsed
+        self.nbytes = nbytes
+
+    @property
+    def throughput(self):
+        return self.ops / self.elapsed if self.elapsed else math.nan
+
+    def as_dict(self):
+        return {
+            'ops': self.ops,
+            'elapsed': self.elapsed,
+            'throughput': self.throughput,
+            'mb_per_s': self.nbytes / self.elapsed / 1e6 if self.elapsed else math.nan,
+            'mean': statistics.mean(self.samples) if self.samples else math.nan,
+            'p50': percentile(self.samples, 0.5),
+            'p99': percentile(self.samples, 0.99),
+        }
+
+
+def measure(name: str, operation, repeat: int, warmup: int=1, ops_per_call: int=1,
+            bytes_per_call: int=0) -> Result:
+    """Times `operation()` `repeat` times after `warmup` untimed calls."""
+    for _ in range(warmup):
+        operation()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        operation()
+        samples.append((time.perf_counter() - call_started) / ops_per_call)
+    elapsed = time.perf_counter() - started
+    return Result(name, samples, repeat * ops_per_call, elapsed, repeat * bytes_per_call)
+
+
+def report(results):
+    header = f"{'benchmark':<40} {'ops/s':>10} {'MB/s':>8} {'p50 ms':>9} {'p99 ms':>9}"
+    lines = [header, '-' * len(header)]
+    for result in results:
+        row = result.as_dict()
+        mb_per_s = f"{row['mb_per_s']:8.1f}" if result.nbytes else f"{'-':>8}"
+        lines.append(f"{result.name:<40} {row['throughput']:10.1f} {mb_per_s} "
+                     f"{row['p50'] * 1e3:9.3f} {row['p99'] * 1e3:9.3f}")
+    return '\n'.join(lines)
+
+
+def save(results, path: str):
+    with open(path, 'w') as fid:
+        json.dump({result.name: result.as_dict() for result in results}, fid, indent=2)
+
+
+def compare(results, baseline_path: str, tolerance: float):
+    """Returns `(name, baseline_p50, p50)` for benchmarks slower than the baseline allows."""
+    with open(baseline_path) as fid:
+        baseline = json.load(fid)
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        p50 = result.as_dict()['p50']
+        if p50 > previous['p50'] * (1 + tolerance):
+            regressions.append((result.name, previous['p50'], p50))
+    return regressions
@@ -0,0 +1,90 @@
+"""
+Measures the start-up cost of pyzenfolio3 in fresh interpreters.
+
+    python benchmarks/import_time.py --repeat 20 --top 15
+    python benchmarks/import_time.py --baseline imports.json --tolerance 0.2
+
+`import/eager` imports every submodule, as `import pyzenfolio3` did
+before names were loaded on first access; compare it with
+`import/package` and `import/client`. `--top` lists the slowest imports
+of `import/client` reported by `python -X importtime`.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT]
+
+from harness import compare, measure, report, save  # noqa: E402
+
+
+SCENARIOS = {
+    'import/interpreter': 'pass',
+    'import/package': 'import pyzenfolio3',
+    'import/client': "from pyzenfolio3 import PyZenfolio; PyZenfolio('user', 'password')",
+    'import/eager': ('import importlib, pkgutil, pyzenfolio3\n'
+                     'for module in pkgutil.iter_modules(pyzenfolio3.__path__):\n'
+                     "    importlib.import_module('pyzenfolio3.' + module.name)"),
+}
+
+
+def run_python(code: str, *options):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [
+        ROOT, os.environ.get('PYTHONPATH')])))
+    return subprocess.run([sys.executable, *options, '-c', code], env=env, check=True,
+                          capture_output=True, text=True)
+
+
+def slowest_imports(code: str, count: int):
+    """`(cumulative_us, module)` of the `count` slowest imports made by `code`."""
+    rows = []
+    for line in run_python(code, '-X', 'importtime').stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((int(parts[1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', default=','.join(SCENARIOS),
+                        help=f"comma separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--top', type=int, default=0,
+                        help='list the slowest imports of import/client')
+    parser.add_argument('--save', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative p50 regression against the baseline')
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    results = []
+    for name in args.only.split(','):
+        code = SCENARIOS[name]
+        results.append(measure(name, lambda: run_python(code), args.repeat))
+        print(report(results[-1:]).splitlines()[-1], file=sys.stderr)
+
+    print(report(results))
+    if args.top:
+        print(f"\n{'cumulative ms':>13}  module")
+        for elapsed, module in slowest_imports(SCENARIOS['import/client'], args.top):
+            print(f'{elapsed / 1e3:13.1f}  {module}')
+    if args.save:
+        save(results, args.save)
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for name, previous, current in regressions:
+            print(f'REGRESSION {name}: p50 {previous * 1e3:.3f} ms -> {current * 1e3:.3f} ms')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmarks PyZenfolio against a local stub server.
+
+    python benchmarks/run.py --sizes small,medium --latency 20 --save baseline.json
+    python benchmarks/run.py --baseline baseline.json --tolerance 0.2
+
+With `--baseline`, exits with status 1 when a benchmark's p50 regressed by
+more than `--tolerance`.
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'examples')]
+
+from harness import compare, measure, report, save  # noqa: E402
+
+from pyzenfolio3 import PyZenfolio, convert_to_datetime, decode, loads  # noqa: E402
+from pyzenfolio3.testing import StubAccount, StubZenfolioServer  # noqa: E402
+from zenfolio_downloader import ZenfolioDownloader  # noqa: E402
+
+
+ACCOUNT_SIZES = {
+    'small': {'groups': 5, 'sets_per_group': 4, 'photos_per_set': 20},
+    'medium': {'groups': 20, 'sets_per_group': 10, 'photos_per_set': 100},
+    'large': {'groups': 50, 'sets_per_group': 20, 'photos_per_set': 250},
+}
+
+
+def bench_calls(server, account, size, args):
+    client = PyZenfolio(account.username, 'password', api_endpoint=server.api_endpoint,
+                        lazy=False)
+    set_ids = itertools.cycle(account.set_ids())
+    return [
+        measure(f'call/LoadPhotoSetPhotos/{size}',
+                lambda: client.load_photo_sets_photos(next(set_ids)), args.repeat * 10),
+        measure(f'call/LoadGroupHierarchy/{size}',
+                client.load_group_hierarchy, args.repeat),
+        measure(f'call/Authenticate/{size}',
+                lambda: client.authenticate(account.username, 'password'), args.repeat),
+    ]
+
+
+def bench_decode(server, account, size, args):
+    raw = json.dumps(account.hierarchy(server)).encode('utf-8')
+    photos = json.dumps(account.photos(server, 1)).encode('utf-8')
+    return [
+        measure(f'decode/hierarchy/json/{size}', lambda: loads(raw), args.repeat,
+                bytes_per_call=len(raw)),
+        measure(f'decode/hierarchy/dates/{size}',
+                lambda: convert_to_datetime(loads(raw)), args.repeat, bytes_per_call=len(raw)),
+        measure(f'decode/hierarchy/models/{size}',
+                lambda: decode(convert_to_datetime(loads(raw))), args.repeat,
+                bytes_per_call=len(raw)),
+        measure(f'decode/hierarchy/models-eager/{size}',
+                lambda: decode(convert_to_datetime(loads(raw)), lazy=False), args.repeat,
+                bytes_per_call=len(raw)),
+        measure(f'decode/photos/models/{size}',
+                lambda: decode(convert_to_datetime(loads(photos))), args.repeat * 10,
+                bytes_per_call=len(photos)),
+    ]
+
+
+def bench_download(server, account, size, args):
+    workdir = tempfile.mkdtemp(prefix='pyzenfolio-bench-')
+    runs = itertools.count()
+
+    def download_photos():
+        downloader = ZenfolioDownloader(account.username, 'password',
+                                        os.path.join(workdir, str(next(runs))), args.timeout,
+                                        args.workers, api_endpoint=server.api_endpoint)
+        with contextlib.redirect_stdout(io.StringIO()):
+            downloader.download_photos()
+
+    return [measure(f'download/download_photos/{size}', download_photos, args.repeat,
+                    warmup=0, ops_per_call=account.photo_count,
+                    bytes_per_call=account.photo_count * account.photo_size)]
+
+
+def bench_upload(server, account, size, args):
+    client = PyZenfolio(account.username, 'password', api_endpoint=server.api_endpoint,
+                        lazy=False)
+    photoset = account.photoset(server, 1)
+    with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as fid:
+        fid.write(os.urandom(account.photo_size))
+    try:
+        return [measure(f'upload/upload_photo/{size}',
+                        lambda: client.upload_photo(photoset, fid.name), args.repeat * 5,
+                        bytes_per_call=account.photo_size)]
+    finally:
+        os.unlink(fid.name)
+
+
+BENCHMARKS = {
+    'calls': bench_calls,
+    'decode': bench_decode,
+    'download': bench_download,
+    'upload': bench_upload,
+}
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='small,medium',
+                        help=f"comma-separated account sizes out of {', '.join(ACCOUNT_SIZES)}")
+    parser.add_argument('--only', default=','.join(BENCHMARKS),
+                        help=f"comma-separated benchmarks out of {', '.join(BENCHMARKS)}")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='server latency per request, in milliseconds')
+    parser.add_argument('--photo-size', type=int, default=256 * 1024,
+                        help='size of photo originals, in bytes')
+    parser.add_argument('--caption-size', type=int, default=0,
+                        help='padding added to every photo caption, in bytes')
+    parser.add_argument('--download-sets', type=int, default=4,
+                        help='photosets downloaded per run (download benchmarks only)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--timeout', type=int, default=30)
+    parser.add_argument('--save', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative p50 regression against the baseline')
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    results = []
+    for size in args.sizes.split(','):
+        params = dict(ACCOUNT_SIZES[size], photo_size=args.photo_size,
+                      caption_size=args.caption_size)
+        for name in args.only.split(','):
+            account_params = params
+            if name == 'download':
+                # keep downloads to a bounded slice of the account
+                account_params = dict(params, groups=1, sets_per_group=args.download_sets)
+            account = StubAccount(**account_params)
+            with StubZenfolioServer(latency=args.latency / 1000) as server:
+                server.serve_account(account)
+                results.extend(BENCHMARKS[name](server, account, size, args))
+            print(report(results[-1:]).splitlines()[-1], file=sys.stderr)
+
+    print(report(results))
+    if args.save:
+        save(results, args.save)
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for name, previous, current in regressions:
+            print(f'REGRESSION {name}: p50 {previous * 1e3:.3f} ms -> {current * 1e3:.3f} ms')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
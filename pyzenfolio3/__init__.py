@@ -1,5 +1,106 @@
-from pyzenfolio3.api import *
-from pyzenfolio3.constants import *
-from pyzenfolio3.exceptions import *
-from pyzenfolio3.utils import *
-from pyzenfolio3.validate import *
+import importlib
+from typing import TYPE_CHECKING
+
+
+# public names by the submodule defining them; a submodule is only
+# imported when one of its names is first accessed
+_SUBMODULES = {
+    'aio': ('ASYNC_METHOD_PREFIXES', 'DEFAULT_MAX_CONCURRENCY', 'AsyncPyZenfolio'),
+    'api': ('JSON_HEADERS', 'PyZenfolio'),
+    'auth': ('TOKEN_HEADER', 'DEFAULT_TOKEN_TTL', 'AUTH_METHODS', 'AUTH_ERROR_CODES',
+             'is_auth_error', 'token_live', 'TokenStore', 'FileTokenStore', 'CallbackTokenStore'),
+    'batch': ('DEFAULT_BATCH_SIZE', 'DEFAULT_FALLBACK_WORKERS', 'BATCH_UNSUPPORTED_STATUSES',
+              'BatchCall', 'Batch'),
+    'bulk': ('DEFAULT_BULK_WORKERS', 'DEFAULT_BULK_BATCH_SIZE', 'DEFAULT_BULK_CHUNK_SIZE',
+             'BulkItemResult', 'BulkReport', 'BulkMutator'),
+    'bulk_upload': ('DEFAULT_UPLOAD_WORKERS', 'IGNORED_SUFFIXES', 'UploadJournal',
+                    'UploadResult', 'BulkUploader'),
+    'cache': ('DEFAULT_CACHE_SIZE', 'CACHE_TTLS', 'WRITE_PREFIXES', 'PHOTO_READERS',
+              'PHOTOSET_READERS', 'GROUP_READERS', 'INVALIDATED_READERS', 'PHOTO_COUNT_READERS',
+              'WRITE_READERS', 'TARGETED_WRITES', 'written_readers', 'cache_key',
+              'MemoryCacheBackend', 'SQLiteCacheBackend', 'ResponseCache'),
+    'constants': ('API_VERSION', 'API_ENDPOINT_FORMAT', 'API_ENDPOINT', 'PROFILE_RESOLUTIONS',
+                  'PHOTO_RESOLUTIONS', 'VIDEO_RESOLUTIONS', 'DEFAULT_OBJECTS'),
+    'crawler': ('DEFAULT_CRAWL_WORKERS', 'DEFAULT_CRAWL_PAGE_SIZE', 'HierarchyCrawler'),
+    'dedup': ('DEFAULT_DIGEST_ALGORITHM', 'REMOTE_CHECKSUM_FIELDS', 'MIN_POOL_FILES',
+              'file_digest', 'remote_checksum', 'DigestCache', 'Hasher', 'RemoteIndex'),
+    'download': ('DEFAULT_CHUNK_SIZE', 'DEFAULT_WORKERS', 'DEFAULT_TIMEOUT', 'PARTIAL_SUFFIX',
+                 'VALIDATOR_SUFFIX', 'photo_timestamp', 'DownloadResult', 'Downloader'),
+    'exceptions': ('APIError', 'ConfigError', 'ZenfolioError', 'HTTPError'),
+    'export': ('PHOTO_COLUMNS', 'DEFAULT_EXPORT_BATCH_SIZE', 'EXPORT_FORMATS',
+               'EXPORT_EXTENSIONS', 'photo_row', 'NDJSONWriter', 'CSVWriter', 'ArrowWriter',
+               'open_writer', 'export_photos', 'ExportResult', 'export_accounts'),
+    'jsonstream': ('DEFAULT_STREAM_CHUNK_SIZE', 'loads', 'iter_array'),
+    'metrics': ('DEFAULT_BUCKETS', 'PHASES', 'BATCH_METHOD', 'CallEvent', 'call_method',
+                'call_outcome', 'Collector', 'Instrumentation', 'MethodStats',
+                'HistogramCollector', 'prometheus_text', 'OpenTelemetryCollector'),
+    'models': ('MODEL_TYPES', 'decode', 'to_dict', 'ZenfolioObject', 'DateTime',
+               'AccessDescriptor', 'Group', 'PhotoSet', 'Photo'),
+    'pagination': ('DEFAULT_PAGE_SIZE', 'RESULT_LIST_KEYS', 'page_items', 'paginate'),
+    'replay': ('CASSETTE_MAGIC', 'KEY_HEADERS', 'MIN_COMPRESSION_RATIO', 'CassetteResponse',
+               'RecordingTransport', 'ReplayTransport'),
+    'retry': ('RETRY_STATUSES', 'RETRY_PREFIXES', 'DEFAULT_MAX_RETRIES',
+              'DEFAULT_BACKOFF_BASE', 'DEFAULT_BACKOFF_MAX', 'retry_after', 'RetryPolicy',
+              'TokenBucket', 'SchedulerStats', 'RequestScheduler'),
+    'search': ('SEARCH_FIELDS', 'DEFAULT_SEARCH_LIMIT', 'NOT_FOUND_CODES', 'SEARCH_ORDERS',
+               'SEARCH_SCHEMA', 'match_query', 'SearchIndex'),
+    'sync': ('DEFAULT_SYNC_WORKERS', 'VOLATILE_FIELDS', 'SCHEMA', 'signature',
+             'walk_hierarchy', 'ChangeSet', 'SyncDiff', 'SyncIndex', 'SyncEngine'),
+    'transport': ('DEFAULT_POOL_CONNECTIONS', 'DEFAULT_POOL_MAXSIZE',
+                  'DEFAULT_CONNECT_TIMEOUT', 'DEFAULT_READ_TIMEOUT', 'TRANSPORT_CHUNK_SIZE',
+                  'RequestsTransport', 'HTTPXTransport'),
+    'upload': ('DEFAULT_UPLOAD_CHUNK_SIZE', 'DEFAULT_CONTENT_TYPE', 'ProgressReader',
+               'UploadSource'),
+    'urls': ('DEFAULT_URL_HOST', 'CROPPED_SIZES', 'UrlBuilder', 'url_builder', 'photo_url',
+             'photo_urls', 'best_fit_url'),
+    'utils': ('DATETIME_FORMAT', 'parse_datetime', 'ConvertToDateTime', 'convert_to_datetime',
+              'read_config', 'process_context'),
+    'validate': ('VALID_ENUM', 'VALID_OBJECTS', 'FLAG_ENUMS', 'set_validation',
+                 'validation_enabled', 'compile_validators', 'VALIDATORS', 'assert_type',
+                 'validate_value', 'validate_object', 'build_updater'),
+}
+_EXPORTS = {name: module for module, names in _SUBMODULES.items() for name in names}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(f'{__name__}.{module}'), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pyzenfolio3.aio import *
+    from pyzenfolio3.api import *
+    from pyzenfolio3.auth import *
+    from pyzenfolio3.batch import *
+    from pyzenfolio3.bulk import *
+    from pyzenfolio3.bulk_upload import *
+    from pyzenfolio3.cache import *
+    from pyzenfolio3.constants import *
+    from pyzenfolio3.crawler import *
+    from pyzenfolio3.dedup import *
+    from pyzenfolio3.download import *
+    from pyzenfolio3.exceptions import *
+    from pyzenfolio3.export import *
+    from pyzenfolio3.jsonstream import *
+    from pyzenfolio3.metrics import *
+    from pyzenfolio3.models import *
+    from pyzenfolio3.pagination import *
+    from pyzenfolio3.replay import *
+    from pyzenfolio3.retry import *
+    from pyzenfolio3.search import *
+    from pyzenfolio3.sync import *
+    from pyzenfolio3.transport import *
+    from pyzenfolio3.upload import *
+    from pyzenfolio3.urls import *
+    from pyzenfolio3.utils import *
+    from pyzenfolio3.validate import *
@@ -0,0 +1,91 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from pyzenfolio3.api import PyZenfolio
+from pyzenfolio3.constants import API_ENDPOINT
+from pyzenfolio3.transport import RequestsTransport
+
+
+ASYNC_METHOD_PREFIXES = ('load_', 'get_', 'update_', 'move_', 'delete_')
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+class AsyncPyZenfolio:
+    """
+    Coroutine flavour of `PyZenfolio`.
+
+    Calls are dispatched to a worker pool sharing one pooled transport, with
+    at most `max_concurrency` requests in flight, so mixed calls can be
+    fanned out with `asyncio.gather`. Authentication happens on first use
+    or explicitly through `authenticate`.
+    """
+    def __init__(self, username, password, max_concurrency: int=DEFAULT_MAX_CONCURRENCY,
+                 api_endpoint=API_ENDPOINT, token_store=None):
+        self.username = username
+        self.api_endpoint = api_endpoint
+        self.token_store = token_store
+        self.max_concurrency = max_concurrency
+        self._password = password
+        self._client = None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        # (loop, semaphore, auth lock); asyncio primitives belong to one loop
+        self._loop_state = None
+
+    async def __aenter__(self):
+        await self.authenticate()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def _primitives(self):
+        loop = asyncio.get_running_loop()
+        state = self._loop_state
+        if state is None or state[0] is not loop:
+            state = (loop, asyncio.Semaphore(self.max_concurrency), asyncio.Lock())
+            self._loop_state = state
+        return state
+
+    async def authenticate(self):
+        async with self._primitives()[2]:
+            if self._client is None:
+                transport = RequestsTransport(pool_maxsize=self.max_concurrency)
+                client = PyZenfolio(self.username, self._password,
+                                    api_endpoint=self.api_endpoint,
+                                    transport=transport, token_store=self.token_store)
+                await self._run(client.ensure_token)
+                self._client = client
+        return self._client
+
+    def close(self):
+        if self._client is not None:
+            self._client.transport.close()
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, func, *args, **kwargs):
+        loop, semaphore, _ = self._primitives()
+        async with semaphore:
+            return await loop.run_in_executor(self._executor,
+                                              functools.partial(func, *args, **kwargs))
+
+    async def _call(self, name, *args, **kwargs):
+        client = self._client
+        if client is None:
+            client = await self.authenticate()
+        return await self._run(getattr(client, name), *args, **kwargs)
+
+
+def _make_coroutine(name):
+    method = getattr(PyZenfolio, name)
+
+    @functools.wraps(method)
+    async def coroutine(self, *args, **kwargs):
+        return await self._call(name, *args, **kwargs)
+
+    return coroutine
+
+
+for _name in dir(PyZenfolio):
+    if _name.startswith(ASYNC_METHOD_PREFIXES) and callable(getattr(PyZenfolio, _name)):
+        setattr(AsyncPyZenfolio, _name, _make_coroutine(_name))
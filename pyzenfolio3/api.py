@@ -1,41 +1,80 @@
 import json
-import mimetypes
-import os
-import urllib.request
 import urllib.parse
-import urllib.error
 import hashlib
-import secrets
+import random
+import threading
+import time
 from datetime import datetime
 
-import requests
-
 from pyzenfolio3.constants import (
     API_ENDPOINT,
     DEFAULT_OBJECTS,
 )
+from pyzenfolio3.auth import (
+    AUTH_ERROR_CODES,
+    AUTH_METHODS,
+    DEFAULT_TOKEN_TTL,
+    TOKEN_HEADER,
+    is_auth_error,
+    token_live,
+)
+from pyzenfolio3.batch import DEFAULT_BATCH_SIZE, Batch
+from pyzenfolio3.jsonstream import DEFAULT_STREAM_CHUNK_SIZE, iter_array, loads
 from pyzenfolio3.exceptions import APIError, HTTPError, ZenfolioError
-from pyzenfolio3.validate import assert_type, validate_object, validate_value
+from pyzenfolio3.metrics import Instrumentation
+from pyzenfolio3.models import decode
+from pyzenfolio3.pagination import DEFAULT_PAGE_SIZE, paginate
+from pyzenfolio3.upload import DEFAULT_CONTENT_TYPE, UploadSource
+from pyzenfolio3.utils import convert_to_datetime
+from pyzenfolio3.validate import assert_type, build_updater, validate_object, validate_value
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+_request_ids = random.SystemRandom()
 
 
 class PyZenfolio:
-    def __init__(self, username, password):
-        self.api_endpoint = API_ENDPOINT
-        self.session = requests.Session()
-        self.session.headers = {'Content-Type': 'application/json'}
+    def __init__(self, username, password, api_endpoint=API_ENDPOINT, cache=None,
+                 models: bool=False, convert_dates: bool=False, scheduler=None,
+                 transport=None, token_store=None, token_ttl: float=DEFAULT_TOKEN_TTL,
+                 lazy: bool=True, hooks=None, eager_models: bool=False):
+        self.api_endpoint = api_endpoint
+        self.cache = cache
+        self.scheduler = scheduler
+        self.models = models
+        self.eager_models = eager_models
+        self.convert_dates = convert_dates
+        self._transport = transport
+        self.instrumentation = Instrumentation(hooks)
+        # (token, expires, request headers), always replaced as a whole so
+        # concurrent readers never see a token with another token's expiry
+        self._auth = (None, None, {})
         self.username = username
-        self.authenticate(username, password)
+        self.batch_supported = True
+        self.token_store = token_store
+        self.token_ttl = token_ttl
+        self._password = password
+        self._auth_lock = threading.Lock()
+        self._transport_lock = threading.Lock()
+        if not lazy:
+            self.ensure_token()
 
     # ---------------------------------------------------------------#
     #                      Authentication                            #
     # ---------------------------------------------------------------#
 
-    # TODO revist this
     def authenticate(self, username: str, password: str, force: bool=False) -> None:
-        #if 'token' in self.auth and self.auth.token and not force:
-        #    # TODO this could be wrong
-        #    raise ConfigError('unable to retrieve authentication token!')
-
+        if self.scheduler is None:
+            token = self._authenticate(username, password)
+        else:
+            token = self.scheduler.call_sequence(
+                lambda: self._authenticate(username, password))
+        expires = time.time() + self.token_ttl
+        self._set_token(token, expires)
+        if self.token_store is not None:
+            self.token_store.put(username, token, expires)
+
+    def _authenticate(self, username: str, password: str) -> str:
         _challenge = self.auth_challenge(username)
         salt = bytearray(_challenge.get('PasswordSalt', ''))
         challenge = bytearray(_challenge.get('Challenge', ''))
@@ -43,9 +82,76 @@ class PyZenfolio:
         password_hash = hashlib.sha256(salt + password.encode('utf-8')).digest()
         proof_as_ints = list(hashlib.sha256(challenge + password_hash).digest())
 
-        token = self._make_request('Authenticate', [_challenge.get('Challenge', ''),
-                                                    proof_as_ints])
-        self.session.headers.update({'X-Zenfolio-Token': token})
+        return self._make_request('Authenticate', [_challenge.get('Challenge', ''),
+                                                   proof_as_ints])
+
+    @property
+    def token(self):
+        return self._auth[0]
+
+    @property
+    def token_expires(self):
+        return self._auth[1]
+
+    @property
+    def headers(self):
+        return self._auth[2]
+
+    def ensure_token(self) -> str:
+        """
+        Returns a valid token, authenticating first if needed.
+
+        Tokens are taken from `token_store` when it holds a live one, so
+        only one of several threads or processes sharing it pays for the
+        challenge/response round trips.
+        """
+        token, expires, _ = self._auth
+        if token_live(token, expires):
+            return token
+        with self._auth_lock:
+            token, expires, _ = self._auth
+            if token_live(token, expires):
+                return token
+            stored = self.token_store.get(self.username) if self.token_store else None
+            if stored is not None:
+                self._set_token(*stored)
+            else:
+                self.authenticate(self.username, self._password)
+            return self.token
+
+    def refresh_token(self, stale: str) -> str:
+        """Re-authenticates after `stale` was refused, unless another thread already did."""
+        with self._auth_lock:
+            if self.token == stale:
+                if self.token_store is not None:
+                    self.token_store.discard(self.username, stale)
+                self._set_token(None, None)
+        return self.ensure_token()
+
+    def _set_token(self, token, expires):
+        headers = {k: v for k, v in self.headers.items() if k != TOKEN_HEADER}
+        if token is not None:
+            headers[TOKEN_HEADER] = token
+        self._auth = (token, expires, headers)
+
+    @property
+    def transport(self):
+        # created on first use, so importing and constructing the client
+        # doesn't load `requests`
+        if self._transport is None:
+            with self._transport_lock:
+                if self._transport is None:
+                    from pyzenfolio3.transport import RequestsTransport
+                    self._transport = RequestsTransport()
+        return self._transport
+
+    @transport.setter
+    def transport(self, transport):
+        self._transport = transport
+
+    @property
+    def session(self):
+        return self.transport.session
 
     def auth_challenge(self, username: str) -> str:
         return self._make_request('GetChallenge', username)
@@ -138,11 +244,8 @@ class PyZenfolio:
         return self._make_request('CreateFavoritesSet', [name, username, ids])
 
     def create_group(self, parent_id: int, group: dict=None):
-        if group is None:
-            group = {}
-        updater = dict(DEFAULT_OBJECTS['GroupUpdater'])
-        updater.update(group)
-        validate_object(group, 'GroupUpdater', 'CreateGroup')
+        updater = build_updater(group, 'GroupUpdater', 'CreateGroup',
+                                DEFAULT_OBJECTS['GroupUpdater'])
         return self._make_request('CreateGroup', [parent_id, updater])
 
     def create_photo_from_url(self, photoset_id: int, url, cookies=None):
@@ -153,11 +256,8 @@ class PyZenfolio:
 
     def create_photo_set(self, group_id: int, set_type='Gallery', photoset=None):
         validate_value(set_type, 'PhotoSetType', 'CreatePhotoSet')
-        if photoset is None:
-            photoset = {}
-        updater = dict(DEFAULT_OBJECTS['PhotoSetUpdater'])
-        updater.update(photoset)
-        validate_object(updater, 'PhotoSetUpdater', 'CreatePhotoSet')
+        updater = build_updater(photoset, 'PhotoSetUpdater', 'CreatePhotoSet',
+                                DEFAULT_OBJECTS['PhotoSetUpdater'])
         return self._make_request('CreatePhotoSet', [group_id, set_type, updater])
 
     def create_video_from_url(self, photoset_id: int, url, cookies=None):
@@ -166,32 +266,43 @@ class PyZenfolio:
                                 for c in list(cookies.items())])
         return self._make_request('CreateVideoFromUrl', [photoset_id, url, cookies])
 
-    def upload_photo(self, photoset, path, filename=None):
+    def upload_photo(self, photoset, path, filename=None, progress=None):
+        """
+        Uploads a photo or video to `photoset`.
+
+        `path` may be a file path, a binary file object or an iterable of
+        bytes chunks; the body is streamed over the pooled transport rather
+        than read into memory. `progress(sent, total)` is called as the
+        body is sent.
+        """
         assert_type(photoset, 'PhotoSet', 'photoset', 'UploadPhoto')
-        upload_url = photoset.UploadUrl
-
-        # TODO should this be handled by the library
-        # or bytes object read in from caller?
-        with open(path, 'rb') as fid:
-            data = fid.read()
-            filename = filename or os.path.basename(path)
-
-            headers = {'Content-Type': mimetypes.guess_type(filename)[0]}
-            params = {'filename': filename }
-            request = requests.post(upload_url,
-                                    params=params,
-                                    data=data,
-                                    headers=headers)
+        upload_url = photoset['UploadUrl']
+        self.ensure_token()
+
+        import mimetypes
+
+        source = UploadSource(path, filename, progress)
+        with source as data:
+            content_type = mimetypes.guess_type(source.filename)[0] or DEFAULT_CONTENT_TYPE
+            headers = dict(self.headers, **{'Content-Type': content_type})
+            params = {'filename': source.filename}
+            try:
+                request = self.transport.post(upload_url,
+                                              params=params,
+                                              data=data,
+                                              headers=headers)
+            except Exception as pyzenfolio_api_error:
+                raise APIError('Could not upload photo') from pyzenfolio_api_error
             if request.status_code != 200:
-                raise HTTPError(self.api_endpoint,
+                raise HTTPError(upload_url,
                                 request.status_code,
                                 request.headers,
                                 request.content)
+            if self.cache is not None:
+                self.cache.invalidate_for('UploadPhoto', [photoset.get('Id')])
             # Should this be request.json()?
             return request.text
 
-        raise APIError('Could not upload photo')
-
     def add_message(self, mail_id: int, message: str):
         validate_object(message, 'MessageUpdater', 'AddMessage')
         return self._make_request('AddMessage', [mail_id, message])
@@ -217,51 +328,33 @@ class PyZenfolio:
     # ---------------------------------------------------------------#
 
     def update_group(self, group_id: int, group=None):
-        if group is None:
-            group = {}
-        updater = dict(DEFAULT_OBJECTS['GroupUpdater'])
-        updater.update(group)
-        validate_object(updater, 'GroupUpdater', 'UpdateGroup')
+        updater = build_updater(group, 'GroupUpdater', 'UpdateGroup',
+                                DEFAULT_OBJECTS['GroupUpdater'])
         return self._make_request('UpdateGroup', [group_id, updater])
 
     def update_group_access(self, group_id: int, group_access=None):
-        if group_access is None:
-            group_access = {}
-        updater = dict(DEFAULT_OBJECTS['AccessUpdater'])
-        updater.update(group_access)
-        validate_object(updater, 'AccessUpdater', 'UpdateGroupAccess')
+        updater = build_updater(group_access, 'AccessUpdater', 'UpdateGroupAccess',
+                                DEFAULT_OBJECTS['AccessUpdater'])
         return self._make_request('UpdateGroupAccess', [group_id, updater])
 
     def update_photo(self, photo_id: int, photo=None):
-        if photo is None:
-            photo = {}
-        updater = dict(DEFAULT_OBJECTS['PhotoUpdater'])
-        updater.update(photo)
-        validate_object(updater, 'PhotoUpdater', 'UpdatePhoto')
+        updater = build_updater(photo, 'PhotoUpdater', 'UpdatePhoto',
+                                DEFAULT_OBJECTS['PhotoUpdater'])
         return self._make_request('UpdatePhoto', [photo_id, updater])
 
     def update_photo_access(self, photo_id: int, photo_access=None):
-        if photo_access is None:
-            photo_access = {}
-        updater = dict(DEFAULT_OBJECTS['AccessUpdater'])
-        updater.update(photo_access)
-        validate_object(updater, 'AccessUpdater', 'UpdatePhotoAccess')
+        updater = build_updater(photo_access, 'AccessUpdater', 'UpdatePhotoAccess',
+                                DEFAULT_OBJECTS['AccessUpdater'])
         return self._make_request('UpdatePhotoAccess', [photo_id, updater])
 
     def update_photo_set(self, photoset_id: int, photoset=None):
-        if photoset is None:
-            photoset = {}
-        updater = dict(DEFAULT_OBJECTS['PhotoSetUpdater'])
-        updater.update(photoset)
-        validate_object(updater, 'PhotoSetUpdater', 'UpdatePhotoSet')
+        updater = build_updater(photoset, 'PhotoSetUpdater', 'UpdatePhotoSet',
+                                DEFAULT_OBJECTS['PhotoSetUpdater'])
         return self._make_request('UpdatePhotoSet', [photoset_id, updater])
 
     def update_photo_set_access(self, photoset_id: int, photoset_access=None):
-        if photoset_access is None:
-            photoset_access = {}
-        updater = dict(DEFAULT_OBJECTS['AccessUpdater'])
-        updater.update(photoset_access)
-        validate_object(updater, 'AccessUpdater', 'UpdatePhotoSetAccess')
+        updater = build_updater(photoset_access, 'AccessUpdater', 'UpdatePhotoSetAccess',
+                                DEFAULT_OBJECTS['AccessUpdater'])
         return self._make_request('UpdatePhotoSetAccess', [photoset_id, updater])
 
     # ---------------------------------------------------------------#
@@ -307,6 +400,58 @@ class PyZenfolio:
         return self._make_request('SearchSetByText', [search_id, photoset_type, sort,
                                              query, offset, limit])
 
+    # ---------------------------------------------------------------#
+    #                           Iterators                            #
+    # ---------------------------------------------------------------#
+
+    def iter_popular_photos(self, page_size: int=DEFAULT_PAGE_SIZE, max_items: int=None,
+                            prefetch: bool=True):
+        return paginate(self.get_popular_photos, page_size, max_items, prefetch)
+
+    def iter_recent_photos(self, page_size: int=DEFAULT_PAGE_SIZE, max_items: int=None,
+                           prefetch: bool=True):
+        return paginate(self.get_recent_photos, page_size, max_items, prefetch)
+
+    def iter_recent_sets(self, set_type='Gallery', page_size: int=DEFAULT_PAGE_SIZE,
+                         max_items: int=None, prefetch: bool=True):
+        validate_value(set_type, 'PhotoSetType', 'GetRecentSets')
+        return paginate(lambda offset, limit: self.get_recent_sets(set_type, offset, limit),
+                        page_size, max_items, prefetch)
+
+    def iter_search_photo_by_text(self, search_id: int, sort, query,
+                                  page_size: int=DEFAULT_PAGE_SIZE, max_items: int=None,
+                                  prefetch: bool=True):
+        validate_value(sort, 'SortOrder', 'SearchPhotoByText')
+        def fetch_page(offset, limit):
+            return self.search_photo_by_text(search_id, sort, query, offset, limit)
+        return paginate(fetch_page, page_size, max_items, prefetch)
+
+    def iter_search_set_by_category(self, search_id: int, photoset_type, sort, category,
+                                    page_size: int=DEFAULT_PAGE_SIZE, max_items: int=None,
+                                    prefetch: bool=True):
+        validate_value(photoset_type, 'PhotoSetType', 'SearchSetByCategory')
+        validate_value(sort, 'SortOrder', 'SearchSetByCategory')
+        def fetch_page(offset, limit):
+            return self.search_set_by_category(search_id, photoset_type, sort, category,
+                                               offset, limit)
+        return paginate(fetch_page, page_size, max_items, prefetch)
+
+    def iter_photo_sets_photos(self, set_id: int, page_size: int=DEFAULT_PAGE_SIZE,
+                               max_items: int=None, prefetch: bool=True, total: int=None):
+        return paginate(lambda offset, limit: self.load_photo_sets_photos(set_id, offset, limit),
+                        page_size, max_items, prefetch, total)
+
+    def stream_group_hierarchy(self, username: str=None):
+        """Yields the top-level `Elements` of the group hierarchy as they are parsed."""
+        if username is None:
+            username = self.username
+        return self._stream_request('LoadGroupHierarchy', username, 'Elements')
+
+    def stream_photo_set_photos(self, set_id: int, info_level: str='Full'):
+        """Yields the `Photos` of a photoset as they are parsed."""
+        validate_value(info_level, 'InformationLevel', 'LoadPhotoSet')
+        return self._stream_request('LoadPhotoSet', [set_id, info_level, True], 'Photos')
+
     # ---------------------------------------------------------------#
     #                        Delete methods                          #
     # ---------------------------------------------------------------#
@@ -373,43 +518,204 @@ class PyZenfolio:
     def undelete_message(self, mailbox_id: int, message_index):
         return self._make_request('UndeleteMessage', [mailbox_id, message_index])
 
+    # ---------------------------------------------------------------#
+    #                          Bulk methods                          #
+    # ---------------------------------------------------------------#
+
+    def bulk_update_photos(self, updates, **kwargs):
+        return self._bulk_mutator(**kwargs).update_photos(updates)
+
+    def bulk_update_access(self, updates, **kwargs):
+        return self._bulk_mutator(**kwargs).update_access(updates)
+
+    def bulk_move(self, photoset_id: int, dest_photoset_id: int, photo_ids, **kwargs):
+        return self._bulk_mutator(**kwargs).move(photoset_id, dest_photoset_id, photo_ids)
+
+    def bulk_delete_photos(self, photo_ids, **kwargs):
+        return self._bulk_mutator(**kwargs).delete(photo_ids)
+
     # ---------------------------------------------------------------#
     #                           Internals                            #
     # ---------------------------------------------------------------#
 
+    # helpers built on thread pools are imported on first use to keep
+    # `import pyzenfolio3` cheap
+
+    def downloader(self, basepath: str, **kwargs):
+        from pyzenfolio3.download import Downloader
+        return Downloader(self, basepath, **kwargs)
+
+    def batch(self, max_size: int=DEFAULT_BATCH_SIZE):
+        return Batch(self, max_size=max_size)
+
+    def crawler(self, root_group_id: int=None, **kwargs):
+        from pyzenfolio3.crawler import HierarchyCrawler
+        return HierarchyCrawler(self, root_group_id, **kwargs)
+
+    def _bulk_mutator(self, **kwargs):
+        from pyzenfolio3.bulk import BulkMutator
+        return BulkMutator(self, **kwargs)
+
     def _make_request(self, method: str, params=None):
+        data = self._build_envelope(method, params)
+        with self.instrumentation.call(method) as event:
+            if self.cache is not None:
+                found, result = self.cache.get(method, data['params'], self.username)
+                if found:
+                    event.outcome = 'cached'
+                    return self._decode(result, event)
+
+            result = self._parse_response(self._send(data, method, event), data)
+            if self.cache is not None:
+                self.cache.update(method, data['params'], result, self.username)
+            return self._decode(result, event)
+
+    def _decode(self, result, event=None):
+        if not (self.convert_dates or self.models):
+            return result
+        started = time.perf_counter()
+        if self.convert_dates:
+            result = convert_to_datetime(result)
+        if self.models:
+            # `eager_models` converts the whole tree up front, trading decode
+            # time for the smallest objects once everything has been read
+            result = decode(result, lazy=not self.eager_models)
+        if event is not None:
+            event.decode_time += time.perf_counter() - started
+        return result
+
+    def _build_envelope(self, method: str, params=None, request_id: int=None):
         if params is None:
             params = []
         elif not isinstance(params, (list, tuple)):
             params = [params]
-
-        data = {'method': method,
+        if request_id is None:
+            request_id = _request_ids.randrange(2 ** 16 - 1)
+        return {'method': method,
                 'params': params,
-                'id': secrets.randbelow(2 ** 16 - 1)}
-
+                'id': request_id}
+
+    def _send(self, payload, methods, event=None):
+        if event is None:
+            calls = len(payload) if isinstance(payload, list) else 1
+            with self.instrumentation.call(methods, calls) as event:
+                return self._send(payload, methods, event)
+
+        if self._is_auth_call(methods):
+            return self._dispatch(payload, methods, event)
+        token = self.ensure_token()
+        resp = self._dispatch(payload, methods, event)
+        if is_auth_error(resp):
+            self.refresh_token(token)
+            resp = self._dispatch(payload, methods, event)
+        return resp
+
+    def _dispatch(self, payload, methods, event):
+        if self.scheduler is None:
+            return self._post(payload, event)
+        return self.scheduler.call(methods, lambda: self._post(payload, event))
+
+    @staticmethod
+    def _is_auth_call(methods):
+        if isinstance(methods, str):
+            return methods in AUTH_METHODS
+        return AUTH_METHODS.issuperset(methods)
+
+    def _post(self, payload, event):
+        body = json.dumps(payload)
+        event.attempts += 1
+        self.transport.pop_connect_time()
+        started = time.perf_counter()
         try:
-            request = self.session.post(self.api_endpoint,
-                                        data=json.dumps(data))
+            request = self.transport.post(self.api_endpoint,
+                                          data=body,
+                                          headers=dict(self.headers, **JSON_HEADERS),
+                                          stream=True)
+            first_byte = time.perf_counter()
+            content = request.content
         except Exception as pyzenfolio_api_error:
             raise APIError from pyzenfolio_api_error
+        received = time.perf_counter()
+        connect_time = self.transport.pop_connect_time()
+        ttfb = first_byte - started - (connect_time or 0.0)
         if request.status_code != 200:
+            event.record_attempt(len(body), len(content), connect_time, ttfb,
+                                 received - first_byte)
             raise HTTPError(self.api_endpoint,
                             request.status_code,
                             request.headers,
-                            request.content)
-
-        resp = request.json()
+                            content)
+        resp = loads(content)
+        event.record_attempt(len(body), len(content), connect_time, ttfb,
+                             received - first_byte, time.perf_counter() - received)
+        return resp
+
+    def _stream_request(self, method: str, params, key: str):
+        data = self._build_envelope(method, params)
+        body = json.dumps(data)
+
+        def open_stream(event):
+            event.attempts += 1
+            self.transport.pop_connect_time()
+            started = time.perf_counter()
+            try:
+                request = self.transport.post(self.api_endpoint,
+                                              data=body,
+                                              headers=dict(self.headers, **JSON_HEADERS),
+                                              stream=True)
+            except Exception as pyzenfolio_api_error:
+                raise APIError from pyzenfolio_api_error
+            connect_time = self.transport.pop_connect_time()
+            # body transfer and parsing interleave with the consumer, so only
+            # the response size is tracked past the headers
+            event.record_attempt(len(body), 0, connect_time,
+                                 time.perf_counter() - started - (connect_time or 0.0), None)
+            if request.status_code != 200:
+                with request:
+                    raise HTTPError(self.api_endpoint,
+                                    request.status_code,
+                                    request.headers,
+                                    request.content)
+            return request
+
+        def counted(chunks, event):
+            for chunk in chunks:
+                event.response_size += len(chunk)
+                yield chunk
+
+        with self.instrumentation.call(method) as event:
+            token = self.ensure_token()
+            for attempt in range(2):
+                if self.scheduler is None:
+                    request = open_stream(event)
+                else:
+                    request = self.scheduler.call(method, lambda: open_stream(event))
+                with request:
+                    chunks = counted(request.iter_content(chunk_size=DEFAULT_STREAM_CHUNK_SIZE),
+                                     event)
+                    try:
+                        # an error envelope surfaces before any entry is yielded
+                        yield from iter_array(chunks, key,
+                                              on_missing=lambda resp: self._parse_response(resp,
+                                                                                           data),
+                                              convert=self._decode)
+                        return
+                    except ZenfolioError as pyzenfolio_error:
+                        if attempt or pyzenfolio_error.code not in AUTH_ERROR_CODES:
+                            raise
+                token = self.refresh_token(token)
+
+    def _parse_response(self, resp, data):
         if resp.get('error', ''):
             code = None
             message = None
             if resp['error'].get('code', ''):
                 code = resp['error']['code']
             if resp['error'].get('message', ''):
-                message = resp['error']['code']
+                message = resp['error']['message']
             raise ZenfolioError(code, message)
 
         if resp.get('id', 0) != data.get('id', 0):
             raise APIError('Response ID does match request ID')
 
-        #return convert_to_datetime(resp.get('result', {}))
         return resp.get('result', {})
@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import time
+
+
+TOKEN_HEADER = 'X-Zenfolio-Token'
+# Zenfolio tokens are valid for a day; refresh a little before that
+DEFAULT_TOKEN_TTL = 23 * 3600
+AUTH_METHODS = frozenset(['GetChallenge', 'Authenticate', 'AuthenticatePlain',
+                          'AuthenticateVisitor', 'GetVisitorKey'])
+AUTH_ERROR_CODES = frozenset(['E_NOTAUTHENTICATED', 'E_INVALIDTOKEN', 'E_TOKENEXPIRED'])
+
+
+def token_live(token, expires) -> bool:
+    """Whether `token` is still usable; tokens without a known expiry are kept."""
+    return token is not None and (expires is None or expires > time.time())
+
+
+def is_auth_error(resp) -> bool:
+    """Whether a JSON-RPC response (or every item of a batch) was refused for its token."""
+    items = resp if isinstance(resp, list) else [resp]
+    return bool(items) and all(isinstance(item, dict)
+                               and (item.get('error') or {}).get('code') in AUTH_ERROR_CODES
+                               for item in items)
+
+
+class TokenStore:
+    """
+    In-process token store, shared by the clients it is passed to.
+
+    Entries are `(token, expires)` pairs keyed by username, with `expires`
+    a Unix timestamp. Expired entries are never returned.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}
+
+    def get(self, username: str):
+        with self._lock:
+            entry = self._read().get(username)
+        if entry is None or not token_live(*entry):
+            return None
+        return tuple(entry)
+
+    def put(self, username: str, token: str, expires: float):
+        with self._lock:
+            tokens = self._read()
+            tokens[username] = (token, expires)
+            self._write(tokens)
+
+    def discard(self, username: str, token: str):
+        """Drops `token` unless another client already replaced it."""
+        with self._lock:
+            tokens = self._read()
+            entry = tokens.get(username)
+            if entry is not None and entry[0] == token:
+                del tokens[username]
+                self._write(tokens)
+
+    def _read(self):
+        return self._tokens
+
+    def _write(self, tokens):
+        self._tokens = tokens
+
+
+class FileTokenStore(TokenStore):
+    """
+    Token store persisted to a JSON file, so short-lived processes can
+    reuse a token rather than authenticating on start. The file is
+    replaced atomically and only readable by its owner.
+    """
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = os.path.expanduser(path)
+
+    def _read(self):
+        try:
+            with open(self.path, 'rb') as fid:
+                data = json.loads(fid.read().decode('utf-8'))
+        except (OSError, ValueError):
+            return {}
+        return {username: tuple(entry) for username, entry in data.items()}
+
+    def _write(self, tokens):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        import tempfile
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tokens-')
+        try:
+            with os.fdopen(fd, 'w') as fid:
+                json.dump({username: list(entry) for username, entry in tokens.items()}, fid)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class CallbackTokenStore(TokenStore):
+    """
+    Token store delegating to user callbacks, e.g. for a shared cache.
+
+    `load(username)` returns a `(token, expires)` pair or None and
+    `save(username, token, expires)` persists one; `expires` is None when
+    a token is discarded.
+    """
+    def __init__(self, load, save):
+        super().__init__()
+        self.load = load
+        self.save = save
+
+    def get(self, username: str):
+        entry = self.load(username)
+        if entry is None or not token_live(*entry):
+            return None
+        return tuple(entry)
+
+    def put(self, username: str, token: str, expires: float):
+        self.save(username, token, expires)
+
+    def discard(self, username: str, token: str):
+        entry = self.load(username)
+        if entry is not None and entry[0] == token:
+            self.save(username, None, None)
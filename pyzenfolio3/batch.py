@@ -0,0 +1,146 @@
+import functools
+
+from pyzenfolio3.exceptions import APIError, HTTPError
+
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FALLBACK_WORKERS = 8
+# statuses of an endpoint that does not take array payloads; 200 stands for
+# a successful response whose body is not an array
+BATCH_UNSUPPORTED_STATUSES = frozenset([200, 400, 404, 405, 413, 501])
+
+
+class BatchCall:
+    """Placeholder for the result of a call queued on a `Batch`."""
+    def __init__(self, envelope):
+        self.envelope = envelope
+        self._done = False
+        self._result = None
+        self._error = None
+
+    @property
+    def done(self):
+        return self._done
+
+    def set_result(self, result):
+        self._result = result
+        self._done = True
+
+    def set_error(self, error):
+        self._error = error
+        self._done = True
+
+    def result(self):
+        if not self._done:
+            raise APIError(f"`{self.envelope['method']}` call has not been executed yet")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class Batch:
+    """
+    Collects API calls and sends them as JSON-RPC batch payloads.
+
+    Any request method of the client can be called on the batch; it returns
+    a `BatchCall` that resolves once the batch is executed, either explicitly
+    through `execute` or when leaving the `with` block. Endpoints rejecting
+    array payloads (`BATCH_UNSUPPORTED_STATUSES`) are remembered on the
+    client, and later calls are sent as pipelined single requests on the
+    pooled transport. Other HTTP errors fail the calls of that payload only.
+    """
+    def __init__(self, client, max_size: int=DEFAULT_BATCH_SIZE,
+                 fallback_workers: int=DEFAULT_FALLBACK_WORKERS):
+        self.client = client
+        self.max_size = max_size
+        self.fallback_workers = fallback_workers
+        self.calls = []
+        self._ids = set()
+
+    def __getattr__(self, name):
+        attr = getattr(type(self.client), name, None)
+        if callable(attr) and not name.startswith('_'):
+            return functools.partial(attr, self)
+        return getattr(self.client, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+
+    def __len__(self):
+        return len(self.calls)
+
+    def _make_request(self, method: str, params=None):
+        envelope = self.client._build_envelope(method, params)
+        while envelope['id'] in self._ids:
+            envelope = self.client._build_envelope(method, params)
+        self._ids.add(envelope['id'])
+        call = BatchCall(envelope)
+        self.calls.append(call)
+        return call
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        self._ids = set()
+        for start in range(0, len(calls), self.max_size):
+            chunk = calls[start:start + self.max_size]
+            if self.client.batch_supported:
+                try:
+                    self._send_batch(chunk)
+                    continue
+                except HTTPError as pyzenfolio_http_error:
+                    if pyzenfolio_http_error.status_code not in BATCH_UNSUPPORTED_STATUSES:
+                        for call in chunk:
+                            call.set_error(pyzenfolio_http_error)
+                        continue
+                    self.client.batch_supported = False
+                except APIError as pyzenfolio_api_error:
+                    for call in chunk:
+                        call.set_error(pyzenfolio_api_error)
+                    continue
+            self._send_pipelined(chunk)
+        return calls
+
+    def _send_batch(self, calls):
+        resp = self.client._send([c.envelope for c in calls],
+                                 {c.envelope['method'] for c in calls})
+        if not isinstance(resp, list):
+            raise HTTPError(self.client.api_endpoint, 200, {}, resp)
+
+        by_id = {}
+        for item in resp:
+            if isinstance(item, dict):
+                by_id[item.get('id')] = item
+        for call in calls:
+            item = by_id.get(call.envelope['id'])
+            if item is None:
+                call.set_error(APIError(f"No response for `{call.envelope['method']}` in batch"))
+                continue
+            self._resolve(call, item)
+
+    def _send_pipelined(self, calls):
+        def send(call):
+            try:
+                self._resolve(call, self.client._send(call.envelope,
+                                                      call.envelope['method']))
+            except APIError as pyzenfolio_api_error:
+                call.set_error(pyzenfolio_api_error)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=self.fallback_workers) as executor:
+            list(executor.map(send, calls))
+
+    def _resolve(self, call, item):
+        try:
+            result = self.client._parse_response(item, call.envelope)
+        except APIError as pyzenfolio_api_error:
+            call.set_error(pyzenfolio_api_error)
+            return
+        if self.client.cache is not None:
+            self.client.cache.update(call.envelope['method'], call.envelope['params'], result,
+                                     self.client.username)
+        call.set_result(self.client._decode(result))
@@ -0,0 +1,190 @@
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from pyzenfolio3.exceptions import APIError
+
+
+DEFAULT_BULK_WORKERS = 4
+# per-item calls sent as one JSON-RPC batch
+DEFAULT_BULK_BATCH_SIZE = 100
+# ids per call of a list-taking endpoint such as MovePhotos
+DEFAULT_BULK_CHUNK_SIZE = 1000
+
+
+class BulkItemResult:
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+
+    def __init__(self, key, status, result=None, error=None):
+        self.key = key
+        self.status = status
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status == self.SUCCEEDED
+
+    def __repr__(self):
+        return f'BulkItemResult({self.key!r}, {self.status!r})'
+
+
+class BulkReport:
+    """Per-item outcome of a bulk mutation, in input order."""
+    def __init__(self, method: str, items):
+        self.method = method
+        self.items = list(items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def succeeded(self):
+        return [item for item in self.items if item.status == BulkItemResult.SUCCEEDED]
+
+    @property
+    def failed(self):
+        return [item for item in self.items if item.status == BulkItemResult.FAILED]
+
+    @property
+    def skipped(self):
+        return [item for item in self.items if item.status == BulkItemResult.SKIPPED]
+
+    @property
+    def ok(self):
+        return all(item.ok for item in self.items)
+
+    def raise_for_errors(self):
+        for item in self.items:
+            if item.error is not None:
+                raise item.error
+
+    def summary(self):
+        return {'succeeded': len(self.succeeded), 'failed': len(self.failed),
+                'skipped': len(self.skipped)}
+
+    def __repr__(self):
+        return f'BulkReport({self.method!r}, {self.summary()})'
+
+
+def _pairs(updates):
+    if isinstance(updates, Mapping):
+        return list(updates.items())
+    return [tuple(update) for update in updates]
+
+
+def _chunks(items, size: int):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+class BulkMutator:
+    """
+    Applies a mutation to many photos.
+
+    Per-item endpoints (`UpdatePhoto`, `UpdatePhotoAccess`) are grouped
+    into JSON-RPC batches of `batch_size` calls, sent from a pool of
+    `workers` threads. List-taking endpoints (`MovePhotos`, `DeletePhotos`)
+    are split into calls of `chunk_size` ids, sent in order. Each item
+    gets a `BulkItemResult`. With `continue_on_error=False`, no further
+    batch or chunk is sent after a failure and the unsent items are
+    reported as skipped.
+    """
+    def __init__(self, client, workers: int=DEFAULT_BULK_WORKERS,
+                 batch_size: int=DEFAULT_BULK_BATCH_SIZE,
+                 chunk_size: int=DEFAULT_BULK_CHUNK_SIZE, continue_on_error: bool=True):
+        self.client = client
+        self.workers = workers
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.continue_on_error = continue_on_error
+
+    def update_photos(self, updates) -> BulkReport:
+        """Applies `PhotoUpdater`s given as a `{photo_id: updater}` mapping or pairs."""
+        return self._per_item('UpdatePhoto', 'update_photo', _pairs(updates))
+
+    def update_access(self, updates) -> BulkReport:
+        """Applies `AccessUpdater`s given as a `{photo_id: updater}` mapping or pairs."""
+        return self._per_item('UpdatePhotoAccess', 'update_photo_access', _pairs(updates))
+
+    def move(self, photoset_id: int, dest_photoset_id: int, photo_ids) -> BulkReport:
+        return self._per_chunk('MovePhotos', list(photo_ids),
+                               lambda ids: self.client.move_photos(photoset_id,
+                                                                   dest_photoset_id, ids))
+
+    def delete(self, photo_ids) -> BulkReport:
+        return self._per_chunk('DeletePhotos', list(photo_ids), self.client.delete_photos)
+
+    def _run_batch(self, name: str, pairs):
+        batch = self.client.batch(max_size=len(pairs))
+        calls = []
+        for key, argument in pairs:
+            try:
+                calls.append((key, getattr(batch, name)(key, argument), None))
+            except APIError as pyzenfolio_api_error:
+                # rejected by validation before being queued
+                calls.append((key, None, pyzenfolio_api_error))
+        batch.execute()
+
+        results = []
+        for key, call, error in calls:
+            if error is None:
+                try:
+                    results.append(BulkItemResult(key, BulkItemResult.SUCCEEDED, call.result()))
+                    continue
+                except APIError as pyzenfolio_api_error:
+                    error = pyzenfolio_api_error
+            results.append(BulkItemResult(key, BulkItemResult.FAILED, error=error))
+        return results
+
+    def _per_item(self, method: str, name: str, pairs) -> BulkReport:
+        batches = _chunks(pairs, self.batch_size)
+        results = {}
+        stop = False
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            for index, chunk in enumerate(batches):
+                if stop:
+                    break
+                if len(pending) >= self.workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    stop = self._collect(done, pending, results)
+                    if stop:
+                        break
+                pending[executor.submit(self._run_batch, name, chunk)] = index
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                self._collect(done, pending, results)
+
+        items = []
+        for index, chunk in enumerate(batches):
+            items.extend(results.get(index) or
+                         [BulkItemResult(key, BulkItemResult.SKIPPED) for key, _ in chunk])
+        return BulkReport(method, items)
+
+    def _collect(self, done, pending, results):
+        failed = False
+        for future in done:
+            chunk_results = results[pending.pop(future)] = future.result()
+            failed = failed or any(not item.ok for item in chunk_results)
+        return failed and not self.continue_on_error
+
+    def _per_chunk(self, method: str, ids, send) -> BulkReport:
+        items = []
+        stop = False
+        for chunk in _chunks(ids, self.chunk_size):
+            if stop:
+                items.extend(BulkItemResult(key, BulkItemResult.SKIPPED) for key in chunk)
+                continue
+            try:
+                result = send(chunk)
+            except APIError as pyzenfolio_api_error:
+                items.extend(BulkItemResult(key, BulkItemResult.FAILED, error=pyzenfolio_api_error)
+                             for key in chunk)
+                stop = not self.continue_on_error
+                continue
+            items.extend(BulkItemResult(key, BulkItemResult.SUCCEEDED, result) for key in chunk)
+        return BulkReport(method, items)
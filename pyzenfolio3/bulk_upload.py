@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+from pyzenfolio3.dedup import RemoteIndex
+from pyzenfolio3.exceptions import APIError
+
+
+DEFAULT_UPLOAD_WORKERS = 4
+IGNORED_SUFFIXES = ('.part',)
+
+
+class UploadJournal:
+    """
+    Append-only JSON lines record of a bulk upload.
+
+    Created groups and photosets are stored by their path relative to the
+    upload root, uploaded files by path, size and mtime, so an interrupted
+    run can be resumed without creating or uploading anything twice.
+    """
+    def __init__(self, path: str=None):
+        self.path = path
+        self.groups = {}
+        self.photosets = {}
+        self.uploads = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as fid:
+            for line in fid:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # a torn last line from an interrupted run
+                    continue
+                self._apply(entry)
+
+    def _apply(self, entry):
+        kind = entry.get('kind')
+        if kind == 'group':
+            self.groups[entry['path']] = entry['id']
+        elif kind == 'photoset':
+            self.photosets[entry['path']] = entry['id']
+        elif kind == 'photo':
+            self.uploads[entry['path']] = (entry['size'], entry['mtime'])
+
+    def _append(self, entry):
+        with self._lock:
+            self._apply(entry)
+            if self.path is not None:
+                with open(self.path, 'a', encoding='utf-8') as fid:
+                    fid.write(json.dumps(entry) + '\n')
+
+    def record_group(self, path: str, group_id: int):
+        self._append({'kind': 'group', 'path': path, 'id': group_id})
+
+    def record_photoset(self, path: str, photoset_id: int):
+        self._append({'kind': 'photoset', 'path': path, 'id': photoset_id})
+
+    def record_upload(self, path: str, size: int, mtime: float, result=None):
+        self._append({'kind': 'photo', 'path': path, 'size': size, 'mtime': mtime,
+                      'result': result})
+
+    def is_uploaded(self, path: str, size: int, mtime: float) -> bool:
+        return self.uploads.get(path) == (size, mtime)
+
+
+class UploadResult:
+    UPLOADED = 'uploaded'
+    SKIPPED = 'skipped'
+    FAILED = 'failed'
+
+    def __init__(self, path, status, photoset_id=None, result=None, error=None):
+        self.path = path
+        self.status = status
+        self.photoset_id = photoset_id
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status != self.FAILED
+
+    def __repr__(self):
+        return f'UploadResult({self.path!r}, {self.status!r})'
+
+
+class BulkUploader:
+    """
+    Mirrors a local directory tree into Zenfolio.
+
+    Directories holding sub-directories become groups, directories holding
+    files become photosets (a directory with both gets a group plus a
+    photoset of the same title inside it). Groups and photosets are created
+    up front, then files are uploaded on a pool of `workers` threads.
+    Progress is kept in an `UploadJournal` so a rerun skips completed work;
+    photosets reused from the journal are also checked for files that
+    already exist remotely under the same name and size.
+
+    With a `dedup.Hasher`, the files of each photoset are hashed up front
+    and skipped when their content matches a remote checksum or another
+    file of the same photoset.
+    """
+    def __init__(self, client, root_group_id: int, journal_path: str=None,
+                 workers: int=DEFAULT_UPLOAD_WORKERS, set_type: str='Gallery', hasher=None):
+        self.client = client
+        self.root_group_id = root_group_id
+        self.journal = UploadJournal(journal_path)
+        self.workers = workers
+        self.set_type = set_type
+        self.hasher = hasher
+
+    @staticmethod
+    def _is_uploadable(name: str) -> bool:
+        return not name.startswith('.') and not name.endswith(IGNORED_SUFFIXES)
+
+    def plan(self, directory: str):
+        """
+        Yields `(relpath, subdirs, files)` for every directory of the tree,
+        parents before children, with hidden entries left out.
+        """
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+            files = sorted(f for f in filenames if self._is_uploadable(f))
+            yield os.path.relpath(dirpath, directory), dirnames, files
+
+    def _ensure_group(self, relpath: str, parent_id: int) -> int:
+        if relpath == os.curdir:
+            return self.root_group_id
+        if relpath not in self.journal.groups:
+            group = self.client.create_group(parent_id, {'Title': os.path.basename(relpath)})
+            self.journal.record_group(relpath, group['Id'])
+        return self.journal.groups[relpath]
+
+    def _ensure_photoset(self, relpath: str, title: str, group_id: int):
+        """Returns the photoset for `relpath` and a `RemoteIndex` of what it already holds."""
+        algorithm = self.hasher.algorithm if self.hasher is not None else None
+        if relpath in self.journal.photosets:
+            # Full rather than Level2 so checksums come back along with names
+            info_level = 'Full' if self.hasher is not None else 'Level2'
+            photoset = self.client.load_photo_set(self.journal.photosets[relpath],
+                                                  info_level, True)
+            return photoset, RemoteIndex(photoset.get('Photos') or [], algorithm)
+        photoset = self.client.create_photo_set(group_id, self.set_type, {'Title': title})
+        self.journal.record_photoset(relpath, photoset['Id'])
+        if 'UploadUrl' not in photoset:
+            photoset = self.client.load_photo_set(photoset['Id'], 'Level1', False)
+        return photoset, RemoteIndex(algorithm=algorithm)
+
+    def _prepare(self, directory: str):
+        group_ids = {}
+        for relpath, subdirs, files in self.plan(directory):
+            parent_id = group_ids.get(os.path.dirname(relpath) or os.curdir,
+                                      self.root_group_id)
+            group_id = parent_id
+            if subdirs:
+                group_id = self._ensure_group(relpath, parent_id)
+            group_ids[relpath] = group_id
+            if not files:
+                continue
+
+            title = os.path.basename(os.path.abspath(os.path.join(directory, relpath)))
+            photoset, existing = self._ensure_photoset(relpath, title, group_id)
+            paths = [os.path.join(directory, relpath, name) for name in files]
+            digests = self._digests(paths)
+            for name, path in zip(files, paths):
+                yield (os.path.normpath(os.path.join(relpath, name)), path, photoset, existing,
+                       digests.get(path))
+
+    def _digests(self, paths):
+        if self.hasher is None:
+            return {}
+        try:
+            return self.hasher.digests(paths)
+        except OSError:
+            # unreadable files fail individually on upload
+            return {}
+
+    def _upload_one(self, relpath: str, path: str, photoset, existing,
+                    digest: str=None) -> UploadResult:
+        try:
+            stat = os.stat(path)
+            if (self.journal.is_uploaded(relpath, stat.st_size, stat.st_mtime)
+                    or existing.is_duplicate(os.path.basename(path), stat.st_size, digest)
+                    or not existing.claim(digest)):
+                return UploadResult(relpath, UploadResult.SKIPPED, photoset['Id'])
+            try:
+                result = self.client.upload_photo(photoset, path)
+            except (APIError, OSError):
+                existing.release(digest)
+                raise
+            self.journal.record_upload(relpath, stat.st_size, stat.st_mtime, result)
+            return UploadResult(relpath, UploadResult.UPLOADED, photoset['Id'], result)
+        except (APIError, OSError) as pyzenfolio_upload_error:
+            return UploadResult(relpath, UploadResult.FAILED, photoset['Id'],
+                                error=pyzenfolio_upload_error)
+
+    def upload(self, directory: str):
+        """Uploads `directory`, yielding an `UploadResult` per file as it completes."""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            for job in self._prepare(directory):
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(executor.submit(self._upload_one, *job))
+            for future in as_completed(pending):
+                yield future.result()
@@ -0,0 +1,249 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from pyzenfolio3.jsonstream import loads
+
+
+DEFAULT_CACHE_SIZE = 4096
+CACHE_TTLS = {
+    'GetCategories': 24 * 3600,
+    'LoadAccessRealm': 300,
+    'LoadGroup': 300,
+    'LoadGroupHierarchy': 300,
+    'LoadPhoto': 600,
+    'LoadPhotoSet': 300,
+    'LoadPhotoSetPhotos': 300,
+    'LoadPrivateProfile': 600,
+    'LoadPublicProfile': 600,
+}
+WRITE_PREFIXES = ('Update', 'Move', 'Delete', 'Create', 'Set', 'Remove', 'Reorder',
+                  'Reindex', 'Replace', 'Rotate', 'Collection', 'Undelete')
+
+# read methods whose entries may hold an object touched by a write,
+# keyed by the object named first in the write method name
+PHOTO_READERS = ('LoadPhoto', 'LoadPhotoSet', 'LoadPhotoSetPhotos')
+PHOTOSET_READERS = ('LoadPhotoSet', 'LoadPhotoSetPhotos', 'LoadGroup', 'LoadGroupHierarchy')
+GROUP_READERS = ('LoadGroup', 'LoadGroupHierarchy')
+INVALIDATED_READERS = (
+    ('PhotoSet', PHOTOSET_READERS),
+    ('Photo', PHOTO_READERS),
+    ('Video', PHOTO_READERS),
+    ('Group', GROUP_READERS),
+)
+# writes reaching past the object they name: adding, moving or removing
+# photos changes the PhotoCount that groups list for their photosets.
+# `UploadPhoto` stands for `upload_photo`, which bypasses JSON-RPC
+PHOTO_COUNT_READERS = PHOTO_READERS + GROUP_READERS
+WRITE_READERS = {
+    'MovePhoto': PHOTO_COUNT_READERS,
+    'MovePhotos': PHOTO_COUNT_READERS,
+    'DeletePhoto': PHOTO_COUNT_READERS,
+    'DeletePhotos': PHOTO_COUNT_READERS,
+    'CollectionAddPhoto': PHOTO_COUNT_READERS,
+    'CollectionRemovePhoto': PHOTO_COUNT_READERS,
+    'CreatePhotoFromUrl': PHOTOSET_READERS,
+    'CreateVideoFromUrl': PHOTOSET_READERS,
+    'UploadPhoto': PHOTOSET_READERS,
+}
+# writes whose leading param is the Id of the written object, so only that
+# object's own entries have to go rather than every entry of these readers
+TARGETED_WRITES = {
+    'UpdatePhoto': ('LoadPhoto',),
+    'UpdatePhotoAccess': ('LoadPhoto',),
+    'DeletePhoto': ('LoadPhoto',),
+    'RotatePhoto': ('LoadPhoto',),
+    'UpdatePhotoSet': ('LoadPhotoSet',),
+    'UpdatePhotoSetAccess': ('LoadPhotoSet',),
+    'DeletePhotoSet': ('LoadPhotoSet',),
+    'CreatePhotoFromUrl': ('LoadPhotoSet', 'LoadPhotoSetPhotos'),
+    'CreateVideoFromUrl': ('LoadPhotoSet', 'LoadPhotoSetPhotos'),
+    'UploadPhoto': ('LoadPhotoSet', 'LoadPhotoSetPhotos'),
+}
+
+
+def cache_key(method: str, params, login: str=None) -> str:
+    key = method + ':' + json.dumps(params, sort_keys=True, separators=(',', ':'),
+                                    default=str)
+    # access-controlled reads differ per account, and accounts may share a backend
+    return key if login is None else f'{login}|{key}'
+
+
+def written_readers(method: str):
+    """
+    Readers invalidated by a write, or None if it names no known object.
+    The object named first wins, so `SetGroupTitlePhoto` writes a Group.
+    """
+    if method in WRITE_READERS:
+        return WRITE_READERS[method]
+    found = [(method.find(name), -len(name), readers)
+             for name, readers in INVALIDATED_READERS if name in method]
+    return min(found)[2] if found else None
+
+
+def _ident(params):
+    """Returns the leading Id param, used to target invalidation."""
+    if params and isinstance(params[0], int) and not isinstance(params[0], bool):
+        return params[0]
+    return None
+
+
+class MemoryCacheBackend:
+    """In-process LRU store of serialized responses."""
+    def __init__(self, max_size: int=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[3] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key: str, method: str, ident, value: str, ttl: float):
+        with self._lock:
+            self._entries[key] = (method, ident, value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, method: str, ident=None):
+        with self._lock:
+            stale = [k for k, e in self._entries.items()
+                     if e[0] == method and (ident is None or e[1] == ident)]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    On-disk LRU store shared by every process opening the same file.
+
+    Each thread uses its own connection; the database runs in WAL mode so
+    readers in other processes are not blocked by writers.
+    """
+    def __init__(self, path: str, max_size: int=DEFAULT_CACHE_SIZE, timeout: float=30):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS responses ('
+                         'key TEXT PRIMARY KEY, method TEXT, ident INTEGER, value TEXT, '
+                         'expires REAL, accessed REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS responses_method '
+                         'ON responses (method, ident)')
+            conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed '
+                         'ON responses (accessed)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        now = time.time()
+        with self._connection() as conn:
+            row = conn.execute('SELECT value, expires FROM responses WHERE key = ?',
+                               (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+            return row[0]
+
+    def set(self, key: str, method: str, ident, value: str, ttl: float):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                         (key, method, ident, value, now + ttl, now))
+            conn.execute('DELETE FROM responses WHERE expires < ?', (now,))
+            conn.execute('DELETE FROM responses WHERE key IN ('
+                         'SELECT key FROM responses ORDER BY accessed DESC '
+                         'LIMIT -1 OFFSET ?)', (self.max_size,))
+
+    def invalidate(self, method: str, ident=None):
+        with self._connection() as conn:
+            if ident is None:
+                conn.execute('DELETE FROM responses WHERE method = ?', (method,))
+            else:
+                conn.execute('DELETE FROM responses WHERE method = ? AND ident = ?',
+                             (method, ident))
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM responses')
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Opt-in cache for read-only API calls.
+
+    Only methods with an entry in `ttls` are cached, keyed by the login
+    making the call, method name and canonicalized params. Write calls (`Update*`, `Move*`, `Delete*`,
+    `Create*` and the other mutating methods) drop the cached reads that
+    may include the written object.
+    """
+    def __init__(self, backend=None, ttls: dict=None):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttls = dict(CACHE_TTLS)
+        self.ttls.update(ttls or {})
+
+    def get(self, method: str, params, login: str=None):
+        """Returns `(found, result)` for a call."""
+        if method not in self.ttls:
+            return False, None
+        value = self.backend.get(cache_key(method, params, login))
+        if value is None:
+            return False, None
+        return True, loads(value)
+
+    def update(self, method: str, params, result, login: str=None):
+        """Stores the result of a read, or invalidates after a write."""
+        ttl = self.ttls.get(method)
+        if ttl:
+            self.backend.set(cache_key(method, params, login), method, _ident(params),
+                             json.dumps(result, default=str), ttl)
+        elif method.startswith(WRITE_PREFIXES):
+            self.invalidate_for(method, params)
+
+    def invalidate_for(self, method: str, params):
+        readers = written_readers(method)
+        if readers is None:
+            self.backend.clear()
+            return
+
+        targeted = TARGETED_WRITES.get(method, ())
+        ident = _ident(params)
+        for reader in readers:
+            if reader in targeted and ident is not None:
+                self.backend.invalidate(reader, ident)
+            else:
+                self.backend.invalidate(reader)
+
+    def clear(self):
+        self.backend.clear()
@@ -0,0 +1,96 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from pyzenfolio3.sync import walk_hierarchy
+
+
+DEFAULT_CRAWL_WORKERS = 8
+DEFAULT_CRAWL_PAGE_SIZE = 5000
+
+
+class HierarchyCrawler:
+    """
+    Crawls photosets in two phases.
+
+    The group tree is fetched once at `Level1` (or through
+    `LoadGroupHierarchy` without a `root_group_id`), then every selected
+    photoset is loaded at `info_level` together with its photos on a pool
+    of `workers` threads. Photosets are yielded as they complete; at most
+    `queue_size` of them are in flight, so a slow consumer holds back the
+    crawl rather than piling up results.
+
+    Without filters every photoset is crawled. Otherwise a photoset is
+    crawled if its Id is in `photoset_ids` or it sits anywhere below a
+    group in `group_ids`; `predicate(photoset)` can narrow that further
+    using the skeleton entry.
+    """
+    def __init__(self, client, root_group_id: int=None, group_ids=None, photoset_ids=None,
+                 predicate=None, info_level: str='Full', with_photos: bool=True,
+                 workers: int=DEFAULT_CRAWL_WORKERS, queue_size: int=None,
+                 page_size: int=DEFAULT_CRAWL_PAGE_SIZE):
+        self.client = client
+        self.root_group_id = root_group_id
+        self.group_ids = frozenset(group_ids or ())
+        self.photoset_ids = frozenset(photoset_ids or ())
+        self.predicate = predicate
+        self.info_level = info_level
+        self.with_photos = with_photos
+        self.workers = workers
+        self.queue_size = queue_size if queue_size is not None else workers * 2
+        self.page_size = page_size
+
+    def skeleton(self):
+        if self.root_group_id is None:
+            return self.client.load_group_hierarchy()
+        return self.client.load_group(self.root_group_id, 'Level1', recursive=True)
+
+    def photosets(self, root=None):
+        """Yields the skeleton entries of the selected photosets, parents first."""
+        if root is None:
+            root = self.skeleton()
+        filtered = bool(self.group_ids or self.photoset_ids)
+        selected_groups = set()
+        for parent_id, element in walk_hierarchy(root):
+            element_type = element.get('$type')
+            under_selected = parent_id in selected_groups
+            if element_type == 'Group':
+                if under_selected or element.get('Id') in self.group_ids:
+                    selected_groups.add(element.get('Id'))
+            elif element_type == 'PhotoSet':
+                if filtered and not under_selected and \
+                        element.get('Id') not in self.photoset_ids:
+                    continue
+                if self.predicate is None or self.predicate(element):
+                    yield element
+
+    def fetch(self, photoset):
+        set_id = photoset['Id']
+        if self.info_level not in (None, 'Level1'):
+            photoset = self.client.load_photo_set(set_id, self.info_level, False)
+        result = dict(photoset)
+        if self.with_photos:
+            result['Photos'] = list(self.client.iter_photo_sets_photos(
+                set_id, page_size=self.page_size, prefetch=False,
+                total=photoset.get('PhotoCount')))
+        return result
+
+    def crawl(self, root=None):
+        """Yields fully loaded photosets in completion order."""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            try:
+                for photoset in self.photosets(root):
+                    if len(pending) >= self.queue_size:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield future.result()
+                    pending.add(executor.submit(self.fetch, photoset))
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            finally:
+                # don't start queued fetches once the consumer stopped early
+                for future in pending:
+                    future.cancel()
+
+    __iter__ = crawl
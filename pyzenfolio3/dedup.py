@@ -0,0 +1,200 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+
+from pyzenfolio3.utils import process_context
+
+
+# Zenfolio reports the MD5 of an original as `FileHash`
+DEFAULT_DIGEST_ALGORITHM = 'md5'
+REMOTE_CHECKSUM_FIELDS = {'FileHash': 'md5'}
+# below this many files, process start-up costs more than hashing in-process
+MIN_POOL_FILES = 4
+
+
+def file_digest(path: str, algorithm: str=DEFAULT_DIGEST_ALGORITHM) -> str:
+    """Hex digest of a file, hashed straight from a read-only memory map."""
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as fid:
+        if os.fstat(fid.fileno()).st_size:
+            with mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                digest.update(data)
+    return digest.hexdigest()
+
+
+def _digest_job(job):
+    path, algorithm = job
+    return file_digest(path, algorithm)
+
+
+def remote_checksum(photo, algorithm: str=DEFAULT_DIGEST_ALGORITHM):
+    """The checksum of a remote photo computed with `algorithm`, if the API returned one."""
+    for field, field_algorithm in REMOTE_CHECKSUM_FIELDS.items():
+        value = photo.get(field)
+        if value and field_algorithm == algorithm:
+            return value.lower()
+    return None
+
+
+class DigestCache:
+    """
+    Digests of local files, keyed by path and invalidated by size or mtime
+    changes. Stored in SQLite when given a `path`, else in memory.
+    """
+    def __init__(self, path: str=None, timeout: float=30):
+        self.path = path
+        self.timeout = timeout
+        self._memory = {}
+        self._local = threading.local()
+        if path is not None:
+            with self._connection() as conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS digests ('
+                             'path TEXT, algorithm TEXT, size INTEGER, mtime_ns INTEGER, '
+                             'digest TEXT, PRIMARY KEY (path, algorithm))')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, path: str, algorithm: str, stat):
+        key = (os.path.abspath(path), algorithm)
+        if self.path is None:
+            row = self._memory.get(key)
+        else:
+            with self._connection() as conn:
+                row = conn.execute('SELECT size, mtime_ns, digest FROM digests '
+                                   'WHERE path = ? AND algorithm = ?', key).fetchone()
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            return None
+        return row[2]
+
+    def put_many(self, entries):
+        """Stores `(path, algorithm, stat, digest)` entries."""
+        rows = [(os.path.abspath(path), algorithm, stat.st_size, stat.st_mtime_ns, digest)
+                for path, algorithm, stat, digest in entries]
+        if self.path is None:
+            for path, algorithm, size, mtime_ns, digest in rows:
+                self._memory[path, algorithm] = (size, mtime_ns, digest)
+            return
+        with self._connection() as conn:
+            conn.executemany('INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?)', rows)
+
+
+class Hasher:
+    """
+    Computes file digests, reusing cached ones for unchanged files.
+
+    `digests` hashes cache misses on a pool of `workers` processes (the
+    CPU count by default); `digest` hashes a single file in-process. The
+    pool is started on first use, shared by every call and thread, and
+    kept until `close`. Its workers are spawned rather than forked, so
+    scripts using it need an `if __name__ == '__main__':` guard.
+    """
+    def __init__(self, cache: DigestCache=None, algorithm: str=DEFAULT_DIGEST_ALGORITHM,
+                 workers: int=None):
+        self.cache = cache if cache is not None else DigestCache()
+        self.algorithm = algorithm
+        self.workers = workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def _pool(self):
+        with self._executor_lock:
+            if self._executor is None:
+                from concurrent.futures import ProcessPoolExecutor
+
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=process_context())
+            return self._executor
+
+    def digest(self, path: str) -> str:
+        return self.digests([path])[path]
+
+    def digests(self, paths) -> dict:
+        """Returns `{path: digest}` for `paths`."""
+        result = {}
+        misses = []
+        for path in paths:
+            stat = os.stat(path)
+            digest = self.cache.get(path, self.algorithm, stat)
+            if digest is None:
+                misses.append((path, stat))
+            else:
+                result[path] = digest
+        if not misses:
+            return result
+
+        jobs = [(path, self.algorithm) for path, _ in misses]
+        if len(jobs) < MIN_POOL_FILES or self.workers == 1:
+            digests = [_digest_job(job) for job in jobs]
+        else:
+            digests = list(self._pool().map(_digest_job, jobs,
+                                            chunksize=max(1, len(jobs) // 64)))
+        self.cache.put_many((path, self.algorithm, stat, digest)
+                            for (path, stat), digest in zip(misses, digests))
+        result.update((path, digest) for (path, _), digest in zip(misses, digests))
+        return result
+
+
+class RemoteIndex:
+    """
+    What a photoset already holds, for skipping uploads before any bytes
+    are sent.
+
+    A local file is a known duplicate when a remote photo has the same
+    checksum (see `REMOTE_CHECKSUM_FIELDS`), or the same file name and
+    size; camera names like `IMG_0001.JPG` get reused, so a name alone is
+    not enough. Files with identical contents within one run are caught by
+    `claim`.
+    """
+    def __init__(self, photos=(), algorithm: str=DEFAULT_DIGEST_ALGORITHM):
+        self.algorithm = algorithm
+        self.names = set()
+        self.checksums = set()
+        self._claimed = set()
+        self._lock = threading.Lock()
+        for photo in photos:
+            self.add(photo)
+
+    def add(self, photo):
+        if photo.get('FileName'):
+            self.names.add((photo['FileName'], photo.get('Size')))
+        checksum = remote_checksum(photo, self.algorithm)
+        if checksum is not None:
+            self.checksums.add(checksum)
+
+    def is_duplicate(self, name: str, size: int, digest: str=None) -> bool:
+        return (digest is not None and digest in self.checksums) or (name, size) in self.names
+
+    def claim(self, digest: str) -> bool:
+        """Reserves `digest` for one upload; False if another file already holds it."""
+        if digest is None:
+            return True
+        with self._lock:
+            if digest in self._claimed or digest in self.checksums:
+                return False
+            self._claimed.add(digest)
+            return True
+
+    def release(self, digest: str):
+        with self._lock:
+            self._claimed.discard(digest)
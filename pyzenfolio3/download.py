@@ -0,0 +1,313 @@
+import functools
+import os
+import re
+import shutil
+import threading
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime
+
+from pyzenfolio3.dedup import remote_checksum
+from pyzenfolio3.exceptions import APIError, HTTPError
+from pyzenfolio3.utils import DATETIME_FORMAT
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT = 30
+PARTIAL_SUFFIX = '.part'
+# next to a partial file, the ETag or Last-Modified of the response it came from
+VALIDATOR_SUFFIX = '.validator'
+_CONTENT_RANGE = re.compile(r'bytes (\d+)-\d+/(?:\d+|\*)$')
+
+
+def photo_timestamp(photo, field: str='UploadedOn'):
+    """Returns the POSIX timestamp of a `DateTime` field of a photo, or None."""
+    value = photo.get(field)
+    if isinstance(value, Mapping):
+        value = value.get('Value')
+    if isinstance(value, str):
+        try:
+            value = datetime.strptime(value, DATETIME_FORMAT)
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return None
+
+
+class DownloadResult:
+    DOWNLOADED = 'downloaded'
+    RESUMED = 'resumed'
+    SKIPPED = 'skipped'
+    DEDUPLICATED = 'deduplicated'
+    FAILED = 'failed'
+
+    def __init__(self, photo, path, status, size: int=0, error=None):
+        self.photo = photo
+        self.path = path
+        self.status = status
+        self.size = size
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status != self.FAILED
+
+    def __repr__(self):
+        return f'DownloadResult({self.path!r}, {self.status!r}, {self.size})'
+
+
+class Downloader:
+    """
+    Streams photo originals to disk.
+
+    Each file is written in chunks to `<name>.part` and atomically renamed
+    once complete. An existing partial file is resumed with an HTTP Range
+    request guarded by `If-Range`, so it starts over when the original
+    changed since, the server has no validator or answers another range. Files whose size and modification time already match the
+    photo metadata are skipped. `download_many` runs the downloads on a
+    bounded thread pool, `adownload_many` does the same for asyncio callers.
+
+    Files are named after the photo's `FileName` without any directory
+    part. When several photos of a directory share a name, the first one
+    gets it and the others get their Id appended, as in `IMG_0001-123.JPG`.
+
+    With a `dedup.Hasher`, originals with the same content are stored once
+    and hard-linked (or copied) under every other name: known from the
+    remote checksum before downloading when the API returns one, else from
+    the local digest once downloaded.
+    """
+    def __init__(self, client, basepath: str, workers: int=DEFAULT_WORKERS,
+                 timeout: int=DEFAULT_TIMEOUT, chunk_size: int=DEFAULT_CHUNK_SIZE,
+                 url_field: str='OriginalUrl', time_field: str='UploadedOn', hasher=None):
+        self.client = client
+        self.basepath = basepath
+        self.workers = workers
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.url_field = url_field
+        self.time_field = time_field
+        self.hasher = hasher
+        self._contents = {}
+        self._contents_lock = threading.Lock()
+        self._names = {}
+        self._names_lock = threading.Lock()
+
+    def target_path(self, directory: str, photo) -> str:
+        owner = photo.get('Id', photo.get(self.url_field))
+        name = os.path.basename((photo.get('FileName') or '').replace('\\', '/'))
+        if name in ('', '.', '..'):
+            name = str(owner)
+        path = os.path.join(self.basepath, directory, name)
+        with self._names_lock:
+            claimed = self._names.setdefault(path, owner)
+            if claimed != owner:
+                stem, ext = os.path.splitext(name)
+                path = os.path.join(self.basepath, directory, f'{stem}-{owner}{ext}')
+                self._names.setdefault(path, owner)
+        return path
+
+    def is_current(self, path: str, photo) -> bool:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        size = photo.get('Size')
+        if size is not None and stat.st_size != size:
+            return False
+        timestamp = photo_timestamp(photo, self.time_field)
+        if timestamp is not None and abs(stat.st_mtime - timestamp) >= 1:
+            return False
+        return True
+
+    def download(self, directory: str, photo) -> DownloadResult:
+        path = self.target_path(directory, photo)
+        if self.is_current(path, photo):
+            self._remember(path, photo)
+            return DownloadResult(photo, path, DownloadResult.SKIPPED, os.path.getsize(path))
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        checksum = self._checksum(photo)
+        source = self._contents.get(checksum) if checksum is not None else None
+        if source is not None and os.path.exists(source):
+            self._link(source, path, photo)
+            return DownloadResult(photo, path, DownloadResult.DEDUPLICATED,
+                                  os.path.getsize(path))
+
+        partial = path + PARTIAL_SUFFIX
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        expected = photo.get('Size')
+        if expected is not None and offset > expected:
+            self._discard(partial)
+            offset = 0
+
+        status = DownloadResult.DOWNLOADED
+        if expected is None or offset < expected:
+            status = self._fetch(photo[self.url_field], partial, offset)
+        written = os.path.getsize(partial)
+        if expected is not None and written != expected:
+            raise APIError(f'Incomplete download of {path}: {written} of {expected} bytes')
+
+        source = self._remember(partial, photo, path)
+        if source is not None:
+            self._link(source, path, photo)
+            self._discard(partial)
+            return DownloadResult(photo, path, DownloadResult.DEDUPLICATED, written)
+
+        os.replace(partial, path)
+        self._discard(partial)
+        self._set_mtime(path, photo)
+        return DownloadResult(photo, path, status, written)
+
+    def _set_mtime(self, path: str, photo):
+        timestamp = photo_timestamp(photo, self.time_field)
+        if timestamp is not None:
+            os.utime(path, (timestamp, timestamp))
+
+    def _checksum(self, photo):
+        if self.hasher is None:
+            return None
+        return remote_checksum(photo, self.hasher.algorithm)
+
+    def _remember(self, local_path: str, photo, path: str=None):
+        """
+        Records the content of `local_path`, stored at `path`. Returns the
+        path of an earlier file with the same content, if any.
+        """
+        if self.hasher is None:
+            return None
+        digest = self._checksum(photo) or self.hasher.digest(local_path)
+        with self._contents_lock:
+            source = self._contents.setdefault(digest, path or local_path)
+        if source == (path or local_path) or not os.path.exists(source):
+            return None
+        return source
+
+    def _link(self, source: str, path: str, photo):
+        tmp_path = path + PARTIAL_SUFFIX + '.link'
+        timestamp = photo_timestamp(photo, self.time_field)
+        try:
+            # links share an mtime, so only link files meant to carry the same one
+            if timestamp is not None and abs(os.stat(source).st_mtime - timestamp) >= 1:
+                raise OSError('timestamps differ')
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, path)
+        self._set_mtime(path, photo)
+
+    @staticmethod
+    def _discard(partial: str):
+        """Removes a partial file, if still there, and its validator."""
+        for name in (partial, partial + VALIDATOR_SUFFIX):
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
+
+    def _fetch(self, url: str, partial: str, offset: int) -> str:
+        self.client.ensure_token()
+        headers = dict(self.client.headers)
+        validator = None
+        if offset:
+            try:
+                with open(partial + VALIDATOR_SUFFIX) as fid:
+                    validator = fid.read().strip() or None
+            except FileNotFoundError:
+                pass
+            if validator is None:
+                offset = 0
+            else:
+                headers['Range'] = f'bytes={offset}-'
+                headers['If-Range'] = validator
+        try:
+            with self.client.transport.get(url, headers=headers, stream=True,
+                                           timeout=self.timeout) as response:
+                if response.status_code == 206 and offset:
+                    match = _CONTENT_RANGE.match(response.headers.get('Content-Range', ''))
+                    if match is None or int(match.group(1)) != offset:
+                        mode = None
+                    else:
+                        mode, status = 'ab', DownloadResult.RESUMED
+                elif response.status_code == 200:
+                    mode, status = 'wb', DownloadResult.DOWNLOADED
+                    self._save_validator(partial, response.headers)
+                elif response.status_code == 416 and offset:
+                    mode = None
+                else:
+                    raise HTTPError(url, response.status_code, response.headers, None)
+                if mode is not None:
+                    with open(partial, mode) as fid:
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            fid.write(chunk)
+        except APIError:
+            raise
+        except Exception as pyzenfolio_download_error:
+            raise APIError(f'Could not download {url}') from pyzenfolio_download_error
+        if mode is None:
+            # not the range asked for; the partial file can't be trusted
+            self._discard(partial)
+            return self._fetch(url, partial, 0)
+        return status
+
+    @staticmethod
+    def _save_validator(partial: str, headers):
+        etag = headers.get('ETag')
+        # weak ETags can't be used with If-Range
+        validator = etag if etag and not etag.startswith('W/') else headers.get('Last-Modified')
+        if validator:
+            with open(partial + VALIDATOR_SUFFIX, 'w') as fid:
+                fid.write(validator)
+        else:
+            try:
+                os.remove(partial + VALIDATOR_SUFFIX)
+            except FileNotFoundError:
+                pass
+
+    def _safe_download(self, directory: str, photo) -> DownloadResult:
+        try:
+            return self.download(directory, photo)
+        except (APIError, OSError) as pyzenfolio_download_error:
+            path = self.target_path(directory, photo)
+            return DownloadResult(photo, path, DownloadResult.FAILED,
+                                  error=pyzenfolio_download_error)
+
+    def download_many(self, jobs):
+        """
+        Downloads `(directory, photo)` pairs, yielding results as they
+        complete. At most twice `workers` jobs are queued at any time.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            for directory, photo in jobs:
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                # claim names in job order, so duplicates are named the same on every run
+                self.target_path(directory, photo)
+                pending.add(executor.submit(self._safe_download, directory, photo))
+            for future in as_completed(pending):
+                yield future.result()
+
+    async def adownload_many(self, jobs):
+        """Coroutine variant of `download_many`, returning all results."""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.workers)
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        async def run(directory, photo):
+            async with semaphore:
+                return await loop.run_in_executor(
+                    executor, functools.partial(self._safe_download, directory, photo))
+
+        jobs = list(jobs)
+        for directory, photo in jobs:
+            self.target_path(directory, photo)
+        try:
+            return await asyncio.gather(*[run(d, p) for d, p in jobs])
+        finally:
+            executor.shutdown(wait=False)
@@ -0,0 +1,251 @@
+import csv
+import json
+import os
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from pyzenfolio3.exceptions import APIError, ConfigError
+from pyzenfolio3.utils import DATETIME_FORMAT, parse_datetime, process_context
+
+
+# (column, type); photo fields keep their API names
+PHOTO_COLUMNS = (
+    ('account', 'string'),
+    ('photoset_id', 'int'),
+    ('photoset_title', 'string'),
+    ('Id', 'int'),
+    ('FileName', 'string'),
+    ('Title', 'string'),
+    ('Caption', 'string'),
+    ('MimeType', 'string'),
+    ('Size', 'int'),
+    ('Width', 'int'),
+    ('Height', 'int'),
+    ('Views', 'int'),
+    ('IsVideo', 'bool'),
+    ('TakenOn', 'datetime'),
+    ('UploadedOn', 'datetime'),
+    ('Keywords', 'list'),
+    ('Categories', 'list'),
+    ('OriginalUrl', 'string'),
+)
+DEFAULT_EXPORT_BATCH_SIZE = 10000
+EXPORT_FORMATS = {
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+}
+EXPORT_EXTENSIONS = {'ndjson': '.ndjson', 'csv': '.csv', 'parquet': '.parquet',
+                     'arrow': '.arrow'}
+
+
+def _datetime(value):
+    if isinstance(value, Mapping):
+        value = value.get('Value')
+    if isinstance(value, str):
+        try:
+            return parse_datetime(value)
+        except ValueError:
+            return None
+    return value
+
+
+def photo_row(photo, photoset, account: str=None, columns=PHOTO_COLUMNS) -> dict:
+    """Flattens a photo into a row of `columns`, dates as datetimes and lists as lists."""
+    row = {}
+    for name, kind in columns:
+        if name == 'account':
+            value = account
+        elif name == 'photoset_id':
+            value = photoset.get('Id')
+        elif name == 'photoset_title':
+            value = photoset.get('Title')
+        else:
+            value = photo.get(name)
+            if kind == 'datetime':
+                value = _datetime(value)
+            elif kind == 'list' and value is not None:
+                value = [str(item) for item in value]
+        row[name] = value
+    return row
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class NDJSONWriter:
+    """One JSON object per line, holding `columns` in order."""
+    def __init__(self, path: str, columns=PHOTO_COLUMNS):
+        self.path = path
+        self._names = [name for name, _ in columns]
+        self._fid = open(path, 'w', encoding='utf-8')
+
+    def write_rows(self, rows):
+        names = self._names
+        self._fid.writelines(json.dumps({name: row.get(name) for name in names},
+                                        default=_json_default, ensure_ascii=False) + '\n'
+                             for row in rows)
+
+    def close(self):
+        self._fid.close()
+
+
+class CSVWriter:
+    """CSV with a header row; list values are joined with `;`."""
+    def __init__(self, path: str, columns=PHOTO_COLUMNS):
+        self.path = path
+        self._lists = [name for name, kind in columns if kind == 'list']
+        self._dates = [name for name, kind in columns if kind == 'datetime']
+        self._fid = open(path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._fid, [name for name, _ in columns])
+        self._writer.writeheader()
+
+    def write_rows(self, rows):
+        for row in rows:
+            for name in self._lists:
+                if row[name] is not None:
+                    row[name] = ';'.join(row[name])
+            for name in self._dates:
+                if row[name] is not None:
+                    row[name] = row[name].strftime(DATETIME_FORMAT)
+            self._writer.writerow(row)
+
+    def close(self):
+        self._fid.close()
+
+
+class ArrowWriter:
+    """
+    Parquet (or Arrow IPC with `arrow=True`) writer, one record batch or
+    row group per `batch_size` rows. Requires `pyarrow`.
+    """
+    def __init__(self, path: str, columns=PHOTO_COLUMNS, arrow: bool=False,
+                 batch_size: int=DEFAULT_EXPORT_BATCH_SIZE):
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError as pyzenfolio_import_error:
+            raise ConfigError('Parquet and Arrow exports require the pyarrow package') \
+                from pyzenfolio_import_error
+        self._pa = pyarrow
+        types = {'string': pyarrow.string(), 'int': pyarrow.int64(), 'bool': pyarrow.bool_(),
+                 'datetime': pyarrow.timestamp('s'), 'list': pyarrow.list_(pyarrow.string())}
+        self.schema = pyarrow.schema([(name, types[kind]) for name, kind in columns])
+        self.path = path
+        self.batch_size = batch_size
+        self._rows = []
+        if arrow:
+            self._writer = pyarrow.ipc.new_file(path, self.schema)
+        else:
+            self._writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write_rows(self, rows):
+        self._rows.extend(rows)
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            batch = self._pa.RecordBatch.from_pylist(self._rows, schema=self.schema)
+            if hasattr(self._writer, 'write_batch'):
+                self._writer.write_batch(batch)
+            else:
+                self._writer.write_table(self._pa.Table.from_batches([batch]))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def open_writer(path: str, export_format: str=None, columns=PHOTO_COLUMNS):
+    """Opens a row writer, picking the format from the file extension by default."""
+    if export_format is None:
+        export_format = EXPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+        if export_format is None:
+            raise ConfigError(f'Cannot tell the export format of {path}')
+    if export_format == 'ndjson':
+        return NDJSONWriter(path, columns)
+    if export_format == 'csv':
+        return CSVWriter(path, columns)
+    if export_format in ('parquet', 'arrow'):
+        return ArrowWriter(path, columns, arrow=export_format == 'arrow')
+    raise ConfigError(f'Unknown export format `{export_format}`')
+
+
+def export_photos(client, writer, account: str=None, columns=PHOTO_COLUMNS,
+                  **crawl_kwargs) -> int:
+    """
+    Writes a row per photo of the account behind `client`, a photoset at a
+    time as the crawl completes them. Returns the number of rows.
+    """
+    if account is None:
+        account = client.username
+    count = 0
+    for photoset in client.crawler(**crawl_kwargs).crawl():
+        rows = [photo_row(photo, photoset, account, columns)
+                for photo in photoset.get('Photos') or []]
+        writer.write_rows(rows)
+        count += len(rows)
+    return count
+
+
+class ExportResult:
+    def __init__(self, account, path, rows: int=0, error=None):
+        self.account = account
+        self.path = path
+        self.rows = rows
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return f'ExportResult({self.account!r}, {self.path!r}, {self.rows})'
+
+
+def _export_account(job):
+    from pyzenfolio3.api import PyZenfolio
+
+    account, path, export_format, crawl_kwargs = job
+    username = account['username']
+    try:
+        client = PyZenfolio(**account)
+        writer = open_writer(path, export_format)
+        try:
+            rows = export_photos(client, writer, username, **crawl_kwargs)
+        finally:
+            writer.close()
+    except (APIError, OSError) as pyzenfolio_export_error:
+        # API errors don't survive pickling back to the parent process
+        return ExportResult(username, path,
+                            error=f'{type(pyzenfolio_export_error).__name__}: '
+                                  f'{pyzenfolio_export_error}')
+    return ExportResult(username, path, rows)
+
+
+def export_accounts(accounts, directory: str, export_format: str='ndjson',
+                    processes: int=None, **crawl_kwargs):
+    """
+    Exports many accounts on a pool of `processes` worker processes, one
+    `<username><ext>` file per account in `directory`. `accounts` are
+    keyword arguments for `PyZenfolio` (at least `username` and
+    `password`). Yields an `ExportResult` per account as it finishes;
+    failed accounts carry the error message. Workers are not forked, so
+    scripts calling this need an `if __name__ == '__main__':` guard.
+    """
+    os.makedirs(directory, exist_ok=True)
+    extension = EXPORT_EXTENSIONS[export_format]
+    jobs = [(dict(account), os.path.join(directory, account['username'] + extension),
+             export_format, crawl_kwargs) for account in accounts]
+    with ProcessPoolExecutor(max_workers=processes, mp_context=process_context()) as executor:
+        for future in as_completed([executor.submit(_export_account, job) for job in jobs]):
+            yield future.result()
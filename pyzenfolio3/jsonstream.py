@@ -0,0 +1,109 @@
+import codecs
+import json
+import re
+
+from pyzenfolio3.exceptions import APIError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def loads(data):
+    """Parses a JSON document with orjson when installed, else the stdlib."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+class _Buffer:
+    """Text buffer filled from an iterable of bytes chunks."""
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.text = ''
+        self.pos = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.eof = False
+
+    def fill(self, minimum: int=1) -> bool:
+        """Reads until at least `minimum` more characters are buffered."""
+        target = len(self.text) - self.pos + minimum
+        pieces = [self.text[self.pos:]]
+        size = len(pieces[0])
+        while size < target and not self.eof:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.eof = True
+                piece = self._decoder.decode(b'', final=True)
+            else:
+                piece = self._decoder.decode(chunk)
+            pieces.append(piece)
+            size += len(piece)
+        self.text = ''.join(pieces)
+        self.pos = 0
+        return size >= target
+
+    def skip_whitespace(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text) or not self.fill():
+                return
+
+
+def iter_array(chunks, key: str, on_missing=None, convert=None):
+    """
+    Incrementally yields the entries of the first JSON array stored under
+    `key` in a document streamed as bytes `chunks`.
+
+    Only the entry being parsed is buffered. If the document holds no such
+    array, it is parsed whole and passed to `on_missing`, which lets
+    callers surface JSON-RPC error envelopes.
+    """
+    decoder = json.JSONDecoder()
+    marker = re.compile(r'"{}"\s*:\s*\['.format(re.escape(key)))
+    buf = _Buffer(chunks)
+
+    scanned = 0
+    while True:
+        match = marker.search(buf.text, scanned)
+        if match is not None:
+            buf.pos = match.end()
+            break
+        if buf.eof:
+            if on_missing is not None:
+                on_missing(loads(buf.text))
+            return
+        scanned = max(0, len(buf.text) - len(key) - 16)
+        buf.fill(DEFAULT_STREAM_CHUNK_SIZE)
+
+    while True:
+        buf.skip_whitespace()
+        if buf.pos >= len(buf.text):
+            raise APIError(f'Truncated `{key}` array in response')
+        if buf.text[buf.pos] == ']':
+            return
+
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf.text, buf.pos)
+                # a number or literal ending the buffer may continue in the next chunk
+                if end < len(buf.text) or buf.eof:
+                    break
+            except ValueError:
+                if buf.eof:
+                    raise APIError(f'Malformed `{key}` entry in response')
+            # grow geometrically so large entries are not re-parsed per chunk
+            buf.fill(max(len(buf.text) - buf.pos, DEFAULT_STREAM_CHUNK_SIZE))
+
+        yield item if convert is None else convert(item)
+        buf.pos = end
+        buf.skip_whitespace()
+        if buf.pos < len(buf.text) and buf.text[buf.pos] == ',':
+            buf.pos += 1
@@ -0,0 +1,290 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from pyzenfolio3.exceptions import ConfigError, HTTPError, ZenfolioError
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+PHASES = ('connect_time', 'ttfb', 'transfer_time', 'decode_time')
+BATCH_METHOD = 'Batch'
+
+
+class CallEvent:
+    """
+    Measurements of one API call, handed to hooks before and after it runs.
+
+    Sizes are in bytes and times in seconds. `ttfb` runs from sending the
+    request to the response headers, excluding `connect_time`;
+    `transfer_time` covers reading the body and `decode_time` parsing it.
+    Phases are those of the last attempt, while `duration` spans every
+    attempt including backoff waits. `outcome` is one of 'ok', 'cached',
+    'zenfolio_error', 'http_error', 'transport_error' or 'cancelled'.
+    """
+    __slots__ = ('method', 'calls', 'payload_size', 'response_size', 'connect_time', 'ttfb',
+                 'transfer_time', 'decode_time', 'duration', 'attempts', 'outcome', 'error',
+                 'started')
+
+    def __init__(self, method: str, calls: int=1):
+        self.method = method
+        self.calls = calls
+        self.payload_size = 0
+        self.response_size = 0
+        self.connect_time = None
+        self.ttfb = None
+        self.transfer_time = None
+        self.decode_time = 0.0
+        self.duration = None
+        self.attempts = 0
+        self.outcome = None
+        self.error = None
+        self.started = time.perf_counter()
+
+    @property
+    def retries(self):
+        return max(0, self.attempts - 1)
+
+    def record_attempt(self, payload_size: int, response_size: int, connect_time, ttfb,
+                       transfer_time, decode_time: float=0.0):
+        self.payload_size = payload_size
+        self.response_size = response_size
+        self.connect_time = connect_time
+        self.ttfb = ttfb
+        self.transfer_time = transfer_time
+        self.decode_time = decode_time
+
+    def as_dict(self):
+        values = {name: getattr(self, name) for name in self.__slots__ if name != 'started'}
+        values['retries'] = self.retries
+        return values
+
+    def __repr__(self):
+        return f'CallEvent({self.method}, {self.outcome}, {self.duration})'
+
+
+def call_method(methods) -> str:
+    """Name under which a single call or a batch of calls is reported."""
+    if isinstance(methods, str):
+        return methods
+    methods = set(methods)
+    return next(iter(methods)) if len(methods) == 1 else BATCH_METHOD
+
+
+def call_outcome(error) -> str:
+    if isinstance(error, ZenfolioError):
+        return 'zenfolio_error'
+    if isinstance(error, HTTPError):
+        return 'http_error'
+    return 'transport_error'
+
+
+class Collector:
+    """Base hook; override `before` and/or `after`."""
+    def before(self, event):
+        pass
+
+    def after(self, event):
+        pass
+
+
+class Instrumentation:
+    """Fires `before`/`after` on each hook around every API call of a client."""
+    def __init__(self, hooks=None):
+        self.hooks = list(hooks or [])
+
+    def add(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+    def remove(self, hook):
+        self.hooks.remove(hook)
+
+    @contextmanager
+    def call(self, methods, calls: int=1):
+        event = CallEvent(call_method(methods), calls)
+        hooks = list(self.hooks)
+        for hook in hooks:
+            hook.before(event)
+        try:
+            yield event
+        except GeneratorExit:
+            event.outcome = 'cancelled'
+            raise
+        except Exception as pyzenfolio_error:
+            event.outcome = call_outcome(pyzenfolio_error)
+            event.error = pyzenfolio_error
+            raise
+        finally:
+            event.duration = time.perf_counter() - event.started
+            if event.outcome is None:
+                event.outcome = 'ok'
+            for hook in hooks:
+                hook.after(event)
+
+
+class MethodStats:
+    """Histogram of call durations plus running totals for one method."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.duration = 0.0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.payload_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+        self.outcomes = {}
+
+    def add(self, event):
+        self.counts[bisect.bisect_left(self.buckets, event.duration)] += 1
+        self.count += 1
+        self.duration += event.duration
+        for phase in PHASES:
+            self.phases[phase] += getattr(event, phase) or 0.0
+        self.payload_bytes += event.payload_size
+        self.response_bytes += event.response_size
+        self.retries += event.retries
+        self.outcomes[event.outcome] = self.outcomes.get(event.outcome, 0) + 1
+
+    def quantile(self, q: float) -> float:
+        """Estimates the `q` quantile of durations by interpolating within buckets."""
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for upper, count in zip(self.buckets + (math.inf,), self.counts):
+            if count and seen + count >= rank:
+                if math.isinf(upper):
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return lower
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total': self.duration,
+            'mean': self.duration / self.count if self.count else math.nan,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'payload_bytes': self.payload_bytes,
+            'response_bytes': self.response_bytes,
+            'retries': self.retries,
+            'outcomes': dict(self.outcomes),
+            **{phase: total for phase, total in self.phases.items()},
+        }
+
+
+class HistogramCollector(Collector):
+    """In-memory per-method latency histograms and totals."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.methods = {}
+        self._lock = threading.Lock()
+
+    def after(self, event):
+        with self._lock:
+            stats = self.methods.get(event.method)
+            if stats is None:
+                stats = self.methods[event.method] = MethodStats(self.buckets)
+            stats.add(event)
+
+    def summary(self):
+        """Per-method summaries, the methods taking the most total time first."""
+        with self._lock:
+            rows = {method: stats.summary() for method, stats in self.methods.items()}
+        return dict(sorted(rows.items(), key=lambda row: row[1]['total'], reverse=True))
+
+    def reset(self):
+        with self._lock:
+            self.methods = {}
+
+
+def _label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _float(value: float) -> str:
+    return '+Inf' if math.isinf(value) else repr(float(value))
+
+
+def prometheus_text(collector: HistogramCollector, prefix: str='pyzenfolio') -> str:
+    """Renders a `HistogramCollector` in the Prometheus text exposition format."""
+    with collector._lock:
+        methods = sorted(collector.methods.items())
+        lines = [f'# HELP {prefix}_call_duration_seconds Zenfolio API call latency.',
+                 f'# TYPE {prefix}_call_duration_seconds histogram']
+        for method, stats in methods:
+            cumulative = 0
+            for upper, count in zip(stats.buckets + (math.inf,), stats.counts):
+                cumulative += count
+                lines.append(f'{prefix}_call_duration_seconds_bucket'
+                             f'{{method="{_label(method)}",le="{_float(upper)}"}} {cumulative}')
+            lines.append(f'{prefix}_call_duration_seconds_sum{{method="{_label(method)}"}} '
+                         f'{_float(stats.duration)}')
+            lines.append(f'{prefix}_call_duration_seconds_count{{method="{_label(method)}"}} '
+                         f'{stats.count}')
+
+        lines += [f'# HELP {prefix}_call_phase_seconds_total Time spent per call phase.',
+                  f'# TYPE {prefix}_call_phase_seconds_total counter']
+        for method, stats in methods:
+            for phase, total in stats.phases.items():
+                phase = phase[:-5] if phase.endswith('_time') else phase
+                lines.append(f'{prefix}_call_phase_seconds_total'
+                             f'{{method="{_label(method)}",phase="{phase}"}} {_float(total)}')
+
+        lines += [f'# HELP {prefix}_calls_total Zenfolio API calls by outcome.',
+                  f'# TYPE {prefix}_calls_total counter']
+        for method, stats in methods:
+            for outcome, count in sorted(stats.outcomes.items()):
+                lines.append(f'{prefix}_calls_total'
+                             f'{{method="{_label(method)}",outcome="{_label(outcome)}"}} {count}')
+
+        for name, attr, help_text in (
+                ('request_bytes_total', 'payload_bytes', 'Serialized request payload bytes.'),
+                ('response_bytes_total', 'response_bytes', 'Response body bytes.'),
+                ('retries_total', 'retries', 'Retried attempts.')):
+            lines += [f'# HELP {prefix}_{name} {help_text}',
+                      f'# TYPE {prefix}_{name} counter']
+            for method, stats in methods:
+                lines.append(f'{prefix}_{name}{{method="{_label(method)}"}} '
+                             f'{getattr(stats, attr)}')
+    return '\n'.join(lines) + '\n'
+
+
+class OpenTelemetryCollector(Collector):
+    """
+    Emits a client span per API call. Requires `opentelemetry-api`; spans
+    go to whichever tracer provider the application configured.
+    """
+    def __init__(self, tracer=None):
+        try:
+            from opentelemetry import trace
+        except ImportError as pyzenfolio_import_error:
+            raise ConfigError('OpenTelemetryCollector requires the opentelemetry-api package') \
+                from pyzenfolio_import_error
+        self._trace = trace
+        self.tracer = tracer if tracer is not None else trace.get_tracer('pyzenfolio3')
+        self._spans = {}
+
+    def before(self, event):
+        self._spans[id(event)] = self.tracer.start_span(
+            f'Zenfolio {event.method}', kind=self._trace.SpanKind.CLIENT,
+            attributes={'rpc.system': 'jsonrpc', 'rpc.method': event.method})
+
+    def after(self, event):
+        span = self._spans.pop(id(event), None)
+        if span is None:
+            return
+        for name, value in event.as_dict().items():
+            if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+                span.set_attribute(f'zenfolio.{name}', value)
+        if event.error is not None:
+            span.record_exception(event.error)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(event.error)))
+        span.end()
@@ -0,0 +1,206 @@
+from collections.abc import Mapping
+
+
+MODEL_TYPES = {}
+
+
+def decode(value, lazy: bool=True):
+    """
+    Wraps typed API objects into their model class.
+
+    Dicts whose `$type` has a registered model are converted. With `lazy`,
+    their nested objects and lists are decoded on first access only;
+    otherwise the whole tree is converted up front, which gives the most
+    compact result. Other values are returned unchanged.
+    """
+    if isinstance(value, dict):
+        model = MODEL_TYPES.get(value.get('$type'))
+        if model is not None:
+            return model(value, lazy)
+    elif isinstance(value, list):
+        return [decode(v, lazy) for v in value]
+    return value
+
+
+def to_dict(value):
+    """Converts models back into plain JSON-compatible dicts and lists."""
+    if isinstance(value, ZenfolioObject):
+        return {k: to_dict(v) for k, v in value.items()}
+    if isinstance(value, dict):
+        return {k: to_dict(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_dict(v) for v in value]
+    return value
+
+
+def _slots(fields):
+    return tuple('_' + name for name in fields)
+
+
+class _Field:
+    """Exposes a slot as a field, decoding nested objects on first access."""
+    __slots__ = ('name', 'slot', 'bit')
+
+    def __init__(self, name, slot, bit):
+        self.name = name
+        self.slot = slot
+        self.bit = bit
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            value = self.slot.__get__(obj, objtype)
+        except AttributeError:
+            raise AttributeError(f'{type(obj).__name__} has no field `{self.name}`') from None
+        if not obj._decoded & self.bit:
+            if isinstance(value, (dict, list)):
+                value = decode(value)
+                self.slot.__set__(obj, value)
+            obj._decoded |= self.bit
+        return value
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+        obj._decoded &= ~self.bit
+
+
+class ZenfolioObject(Mapping):
+    """
+    Compact, read-mostly view of an API object.
+
+    Known fields live in `__slots__` derived from the class' `FIELDS`
+    rather than in a per-object dict, unknown fields in `_extra`. Fields
+    are available both as attributes and as mapping keys, so code written
+    against the raw dicts keeps working.
+    """
+    __slots__ = ('_decoded', '_extra')
+
+    TYPE = None
+    FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for bit, name in enumerate(cls.FIELDS):
+            setattr(cls, name, _Field(name, cls.__dict__['_' + name], 1 << bit))
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+        if cls.TYPE is not None:
+            MODEL_TYPES[cls.TYPE] = cls
+
+    def __init__(self, data, lazy: bool=True):
+        fields = self._FIELD_SET
+        extra = None
+        for key, value in data.items():
+            if key in fields:
+                if not lazy and isinstance(value, (dict, list)):
+                    value = decode(value, lazy)
+                object.__setattr__(self, '_' + key, value)
+            elif key != '$type':
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self._decoded = 0 if lazy else -1
+        self._extra = extra
+
+    def __getattr__(self, name):
+        extra = None if name.startswith('_') else self._extra
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError(f'{type(self).__name__} has no field `{name}`')
+
+    def __getitem__(self, key):
+        if key == '$type':
+            return self.TYPE
+        if key in self._FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __iter__(self):
+        yield '$type'
+        for name in self.FIELDS:
+            if hasattr(self, '_' + name):
+                yield name
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        if key == '$type':
+            return True
+        if key in self._FIELD_SET:
+            return hasattr(self, '_' + key)
+        return self._extra is not None and key in self._extra
+
+    def __getstate__(self):
+        return to_dict(self)
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+    def copy(self):
+        return to_dict(self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(Id={self.get('Id')!r}, Title={self.get('Title')!r})"
+
+
+class DateTime(ZenfolioObject):
+    TYPE = 'DateTime'
+    FIELDS = ('Value',)
+    __slots__ = _slots(FIELDS)
+
+    def __repr__(self):
+        return f'DateTime({self.get("Value")!r})'
+
+
+class AccessDescriptor(ZenfolioObject):
+    TYPE = 'AccessDescriptor'
+    FIELDS = ('RealmId', 'AccessType', 'IsDerived', 'AccessMask', 'PasswordHint',
+              'SrcPasswordHint', 'Viewers')
+    __slots__ = _slots(FIELDS)
+
+
+class Group(ZenfolioObject):
+    TYPE = 'Group'
+    FIELDS = ('Id', 'GroupIndex', 'Title', 'Caption', 'AccessDescriptor', 'Owner',
+              'HideBranding', 'CreatedOn', 'ModifiedOn', 'PageUrl', 'TitlePhoto',
+              'MailboxId', 'ImmediateChildrenCount', 'TextCn', 'CollectionCount',
+              'SubGroupCount', 'GalleryCount', 'PhotoCount', 'ParentGroups', 'Elements',
+              'CustomReference', 'Views')
+    __slots__ = _slots(FIELDS)
+
+
+class PhotoSet(ZenfolioObject):
+    TYPE = 'PhotoSet'
+    FIELDS = ('Id', 'GroupIndex', 'Title', 'Caption', 'AccessDescriptor', 'Owner',
+              'HideBranding', 'CreatedOn', 'ModifiedOn', 'PhotoCount', 'ImageCount',
+              'VideoCount', 'PhotoBytes', 'Views', 'Type', 'FeaturedIndex', 'TitlePhoto',
+              'IsRandomTitlePhoto', 'ParentGroups', 'Photos', 'Keywords', 'Categories',
+              'UploadUrl', 'VideoUploadUrl', 'PageUrl', 'MailboxId', 'TextCn',
+              'PhotoListCn', 'CustomReference')
+    __slots__ = _slots(FIELDS)
+
+
+class Photo(ZenfolioObject):
+    TYPE = 'Photo'
+    FIELDS = ('Id', 'Width', 'Height', 'Sequence', 'AccessDescriptor', 'Owner', 'Title',
+              'MimeType', 'Size', 'Gallery', 'OriginalUrl', 'UrlCore', 'UrlHost',
+              'UrlToken', 'PageUrl', 'MailboxId', 'TextCn', 'Flags', 'IsVideo', 'Duration',
+              'Caption', 'FileName', 'UploadedOn', 'TakenOn', 'Keywords', 'Categories',
+              'Copyright', 'Rotation', 'ExifTags', 'ShortExif', 'Views', 'FileHash')
+    __slots__ = _slots(FIELDS)
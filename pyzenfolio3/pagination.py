@@ -0,0 +1,72 @@
+import functools
+from collections.abc import Mapping
+
+
+DEFAULT_PAGE_SIZE = 500
+RESULT_LIST_KEYS = ('Photos', 'PhotoSets', 'Elements')
+
+
+def page_items(result):
+    """Returns the list of items held by a page, unwrapping search results."""
+    if isinstance(result, (list, tuple)):
+        return result
+    if isinstance(result, Mapping):
+        for key in RESULT_LIST_KEYS:
+            if key in result:
+                return result[key] or []
+    return []
+
+
+def paginate(fetch_page, page_size: int=DEFAULT_PAGE_SIZE, max_items: int=None,
+             prefetch: bool=True, total: int=None):
+    """
+    Yields the items returned by `fetch_page(offset, limit)` page by page.
+
+    Paging stops on an empty page, once `total` items (when known, such as
+    a photoset's `PhotoCount`) were read, or once `max_items` items were
+    yielded. A short page doesn't end paging, as the server may cap `limit`.
+    With `prefetch`, the next page is requested in the background while
+    the current one is consumed, so at most two pages are held in memory.
+    """
+    if page_size <= 0:
+        raise ValueError('page_size must be positive')
+
+    bounds = [bound for bound in (max_items, total) if bound is not None]
+    stop = min(bounds) if bounds else None
+
+    def limit_at(offset):
+        if stop is None:
+            return page_size
+        return min(page_size, stop - offset)
+
+    executor = None
+    if prefetch:
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=1)
+
+    def submit(offset, limit):
+        if executor is None:
+            return functools.partial(fetch_page, offset, limit)
+        return executor.submit(fetch_page, offset, limit).result
+
+    offset = 0
+    limit = limit_at(offset)
+    try:
+        if limit <= 0:
+            return
+        pending = submit(offset, limit)
+        while True:
+            page = page_items(pending())[:limit]
+            offset += len(page)
+            next_limit = limit_at(offset)
+            has_more = bool(page) and next_limit > 0
+            if has_more:
+                pending = submit(offset, next_limit)
+            for item in page:
+                yield item
+            if not has_more:
+                return
+            limit = next_limit
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,327 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import urllib.parse
+import zlib
+
+from requests.structures import CaseInsensitiveDict
+
+from pyzenfolio3.exceptions import APIError, ConfigError
+from pyzenfolio3.transport import TRANSPORT_CHUNK_SIZE, RequestsTransport
+
+
+# a cassette is the magic, the response bodies back to back, a zlib
+# compressed JSON index and a footer pointing at the index
+CASSETTE_MAGIC = b'PZFC1\n'
+_FOOTER = struct.Struct('<QQ6s')
+# request headers that select a different response from the same URL
+KEY_HEADERS = ('Range', 'If-Range')
+# recorded bodies are only stored compressed when that saves at least this much
+MIN_COMPRESSION_RATIO = 0.9
+# dropped because recorded bodies are stored decoded
+_DROPPED_HEADERS = frozenset(['content-encoding', 'content-length', 'transfer-encoding',
+                              'connection', 'keep-alive'])
+
+
+def _rpc_ids(payload):
+    """Strips the ids of JSON-RPC envelope(s), which are random per call."""
+    envelopes = payload if isinstance(payload, list) else [payload]
+    ids = []
+    for envelope in envelopes:
+        if not isinstance(envelope, dict) or 'method' not in envelope:
+            return None
+        ids.append(envelope.pop('id', None))
+    return ids
+
+
+class _DigestReader:
+    """File-like wrapper hashing a body as it is sent."""
+    def __init__(self, fileobj, digest):
+        self._fileobj = fileobj
+        self._digest = digest
+
+    def read(self, size: int=-1):
+        data = self._fileobj.read(size)
+        self._digest.update(data)
+        return data
+
+    def __len__(self):
+        return len(self._fileobj)
+
+
+def _digest_chunks(chunks, digest):
+    for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+
+
+class _RequestKey:
+    """
+    Identifies a request by method, URL, query, `KEY_HEADERS` and body.
+
+    JSON-RPC ids are left out so a replayed client matches recordings made
+    with other ids. Streamed bodies are hashed as they are read, so `key`
+    is only final once the body has been consumed.
+    """
+    def __init__(self, method: str, url: str, params=None, headers=None, data=None):
+        parts = urllib.parse.urlsplit(url)
+        query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if params:
+            query.extend((str(name), str(value)) for name, value in dict(params).items())
+        url = urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(sorted(query)),
+                                                     fragment=''))
+        headers = CaseInsensitiveDict(headers or {})
+        self.digest = hashlib.sha256()
+        self.digest.update(json.dumps([method.upper(), url] +
+                                      [headers.get(name) for name in KEY_HEADERS]).encode())
+        self.ids = None
+        self.data = self._body(data)
+
+    def _body(self, data):
+        if data is None:
+            return None
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            body = bytes(data)
+            if body[:1] in (b'{', b'['):
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    payload = None
+                self.ids = _rpc_ids(payload) if payload is not None else None
+                if self.ids is not None:
+                    body = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()
+            self.digest.update(body)
+            return data
+        if hasattr(data, 'read'):
+            return _DigestReader(data, self.digest)
+        return _digest_chunks(data, self.digest)
+
+    @property
+    def key(self):
+        return self.digest.hexdigest()
+
+
+class CassetteResponse:
+    """A recorded response, exposing the subset of `requests.Response` the client relies on."""
+    def __init__(self, status_code: int, headers, body, elapsed: float=None):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self._body = body
+        self.elapsed = elapsed
+
+    @property
+    def content(self):
+        return bytes(self._body)
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int=TRANSPORT_CHUNK_SIZE):
+        chunk_size = chunk_size or TRANSPORT_CHUNK_SIZE
+        for start in range(0, len(self._body), chunk_size):
+            yield bytes(self._body[start:start + chunk_size])
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RecordingTransport:
+    """
+    Sends requests through `transport` (a `RequestsTransport` by default)
+    and records every response into the cassette at `path`.
+
+    Responses are read in full before being returned, so streamed
+    downloads are buffered while recording. The cassette is only usable
+    once the transport is closed. It holds response bodies, including
+    auth tokens, so it is created readable by its owner only.
+    """
+    def __init__(self, path: str, transport=None, compress: bool=True):
+        self.path = path
+        self.transport = transport if transport is not None else RequestsTransport()
+        self.session = getattr(self.transport, 'session', None)
+        self.compress = compress
+        self._index = []
+        self._lock = threading.Lock()
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        self._fid = os.fdopen(fd, 'wb')
+        self._fid.write(CASSETTE_MAGIC)
+
+    def request(self, method: str, url: str, **kwargs):
+        request_key = _RequestKey(method, url, kwargs.get('params'), kwargs.get('headers'),
+                                  kwargs.get('data'))
+        if kwargs.get('data') is not None:
+            kwargs['data'] = request_key.data
+        started = time.perf_counter()
+        with self.transport.request(method, url, **kwargs) as response:
+            body = response.content
+            headers = {name: value for name, value in response.headers.items()
+                       if name.lower() not in _DROPPED_HEADERS}
+            status_code = response.status_code
+        elapsed = time.perf_counter() - started
+        body = body or b''
+        headers['Content-Length'] = str(len(body))
+        self._append(request_key, status_code, headers, body, elapsed)
+        return CassetteResponse(status_code, headers, body, elapsed)
+
+    def _append(self, request_key, status_code, headers, body, elapsed):
+        stored, compressed = body, False
+        if self.compress and body:
+            packed = zlib.compress(body)
+            if len(packed) < len(body) * MIN_COMPRESSION_RATIO:
+                stored, compressed = packed, True
+        with self._lock:
+            offset = self._fid.tell()
+            self._fid.write(stored)
+            self._index.append([request_key.key, status_code, headers, offset, len(stored),
+                                compressed, request_key.ids, round(elapsed, 6)])
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def pop_connect_time(self):
+        return self.transport.pop_connect_time()
+
+    def close(self):
+        with self._lock:
+            if self._fid.closed:
+                return
+            index = zlib.compress(json.dumps(self._index, separators=(',', ':')).encode())
+            offset = self._fid.tell()
+            self._fid.write(index)
+            self._fid.write(_FOOTER.pack(offset, len(index), CASSETTE_MAGIC))
+            self._fid.close()
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _rewrite_ids(body: bytes, recorded, ids):
+    """Gives a recorded JSON-RPC response the ids of the replayed request."""
+    mapping = dict(zip(recorded, ids))
+    payload = json.loads(body)
+    for envelope in payload if isinstance(payload, list) else [payload]:
+        if isinstance(envelope, dict) and envelope.get('id') in mapping:
+            envelope['id'] = mapping[envelope['id']]
+    return json.dumps(payload).encode()
+
+
+class ReplayTransport:
+    """
+    Serves responses from a cassette written by `RecordingTransport`,
+    without any network access.
+
+    Bodies are served straight from a memory map of the cassette. A request
+    recorded several times gets its responses in recorded order, then the
+    last one again. Each response is delayed by `latency` seconds and, with
+    `speed`, by its recorded duration divided by `speed`. Requests missing
+    from the cassette raise `APIError`.
+    """
+    session = None
+
+    def __init__(self, path: str, latency: float=0.0, speed: float=None):
+        self.path = path
+        self.latency = latency
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._served = {}
+        with open(path, 'rb') as fid:
+            try:
+                self._map = mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as pyzenfolio_cassette_error:
+                raise ConfigError(f'{path} is not a cassette') from pyzenfolio_cassette_error
+        if len(self._map) < len(CASSETTE_MAGIC) + _FOOTER.size or \
+                self._map[:len(CASSETTE_MAGIC)] != CASSETTE_MAGIC:
+            self._map.close()
+            raise ConfigError(f'{path} is not a cassette')
+        offset, length, magic = _FOOTER.unpack(self._map[-_FOOTER.size:])
+        if magic != CASSETTE_MAGIC:
+            self._map.close()
+            raise ConfigError(f'{path} is an unfinished cassette; close the recording transport')
+        self._index = {}
+        for entry in json.loads(zlib.decompress(self._map[offset:offset + length])):
+            self._index.setdefault(entry[0], []).append(entry[1:])
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._index.values())
+
+    def request(self, method: str, url: str, params=None, data=None, headers=None, **kwargs):
+        request_key = _RequestKey(method, url, params, headers, data)
+        if not isinstance(request_key.data, (type(None), str, bytes, bytearray, memoryview)):
+            # drain streamed bodies so they are hashed and report progress
+            if hasattr(request_key.data, 'read'):
+                while request_key.data.read(TRANSPORT_CHUNK_SIZE):
+                    pass
+            else:
+                for _ in request_key.data:
+                    pass
+        key = request_key.key
+        with self._lock:
+            entries = self._index.get(key)
+            if not entries:
+                raise APIError(f'No recorded response for {method.upper()} {url}')
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+        status_code, response_headers, offset, length, compressed, ids, elapsed = \
+            entries[min(served, len(entries) - 1)]
+
+        if compressed:
+            body = zlib.decompress(self._map[offset:offset + length])
+        else:
+            body = memoryview(self._map)[offset:offset + length]
+        if ids and request_key.ids and ids != request_key.ids:
+            body = _rewrite_ids(bytes(body), ids, request_key.ids)
+        delay = self.latency
+        if self.speed and elapsed:
+            delay += elapsed / self.speed
+        if delay:
+            time.sleep(delay)
+        return CassetteResponse(status_code, response_headers, body, elapsed)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def pop_connect_time(self):
+        return 0.0
+
+    def close(self):
+        try:
+            self._map.close()
+        except BufferError:
+            # responses still hold views into the map; it is released with them
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,190 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from pyzenfolio3.exceptions import APIError, HTTPError, ZenfolioError
+
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+# Authenticate answers a single-use challenge, so it is only retried together
+# with a fresh GetChallenge, see `RequestScheduler.call_sequence`
+RETRY_PREFIXES = ('Load', 'Get', 'Search', 'Keyring')
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+
+
+def retry_after(error):
+    """Returns the delay requested by a `Retry-After` header, in seconds."""
+    headers = getattr(error, 'headers', None) or {}
+    value = headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Decides which failed calls are retried and how long to wait.
+
+    Calls are retried on transport errors and on `RETRY_STATUSES`, only for
+    methods considered idempotent: names starting with `RETRY_PREFIXES`,
+    plus any method set to True in `methods` (False opts a method out).
+    Waits use exponential backoff with full jitter, but never less than a
+    server's `Retry-After`; both are capped at `backoff_max`.
+    """
+    def __init__(self, max_retries: int=DEFAULT_MAX_RETRIES,
+                 backoff_base: float=DEFAULT_BACKOFF_BASE,
+                 backoff_max: float=DEFAULT_BACKOFF_MAX,
+                 statuses=RETRY_STATUSES, prefixes=RETRY_PREFIXES, methods: dict=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.statuses = frozenset(statuses)
+        self.prefixes = tuple(prefixes)
+        self.methods = dict(methods or {})
+
+    def is_idempotent(self, method: str) -> bool:
+        if method in self.methods:
+            return self.methods[method]
+        return method.startswith(self.prefixes)
+
+    def is_transient(self, error) -> bool:
+        if isinstance(error, HTTPError):
+            return error.status_code in self.statuses
+        if isinstance(error, ZenfolioError):
+            return False
+        # _post wraps transport failures (resets, timeouts) in a bare APIError
+        return isinstance(error, APIError) and error.__cause__ is not None
+
+    def should_retry(self, methods, attempt: int, error) -> bool:
+        return (attempt < self.max_retries
+                and self.is_transient(error)
+                and all(self.is_idempotent(m) for m in methods))
+
+    def delay(self, attempt: int, error=None) -> float:
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        requested = retry_after(error)
+        if requested is None:
+            return backoff
+        return min(self.backoff_max, max(requested, backoff))
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second."""
+    def __init__(self, rate: float, burst: int=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token, returning how long the caller has to wait for it."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class SchedulerStats:
+    FIELDS = ('requests', 'retries', 'failures', 'throttle_waits',
+              'throttle_wait_time', 'retry_wait_time')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, name: str, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def __getattr__(self, name):
+        if name in self.FIELDS:
+            return self._counters[name]
+        raise AttributeError(name)
+
+    def as_dict(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def __repr__(self):
+        return f'SchedulerStats({self.as_dict()})'
+
+
+class RequestScheduler:
+    """
+    Runs requests through an optional rate limit and a retry policy.
+
+    `rate_limit` is in requests per second; `burst` defaults to one
+    second's worth of requests. Counters are kept in `stats`.
+    """
+    def __init__(self, policy: RetryPolicy=None, rate_limit: float=None, burst: int=None,
+                 sleep=time.sleep):
+        self.policy = policy if policy is not None else RetryPolicy()
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.sleep = sleep
+        self.stats = SchedulerStats()
+
+    def throttle(self):
+        if self.bucket is None:
+            return
+        wait = self.bucket.reserve()
+        if wait > 0:
+            self.stats.add('throttle_waits')
+            self.stats.add('throttle_wait_time', wait)
+            self.sleep(wait)
+
+    def call(self, methods, send):
+        """Calls `send()` for the given method name(s), retrying transient failures."""
+        if isinstance(methods, str):
+            methods = (methods,)
+        attempt = 0
+        while True:
+            self.throttle()
+            self.stats.add('requests')
+            try:
+                return send()
+            except APIError as pyzenfolio_api_error:
+                if not self.policy.should_retry(methods, attempt, pyzenfolio_api_error):
+                    self.stats.add('failures')
+                    raise
+                wait = self.policy.delay(attempt, pyzenfolio_api_error)
+            self.stats.add('retries')
+            self.stats.add('retry_wait_time', wait)
+            self.sleep(wait)
+            attempt += 1
+
+    def call_sequence(self, send):
+        """
+        Calls `send()`, which makes several requests that are only safe to
+        repeat together, retrying the whole sequence on transient failures.
+
+        Each request is still throttled and counted by `call`.
+        """
+        attempt = 0
+        while True:
+            try:
+                return send()
+            except APIError as pyzenfolio_api_error:
+                if not (attempt < self.policy.max_retries
+                        and self.policy.is_transient(pyzenfolio_api_error)):
+                    raise
+                wait = self.policy.delay(attempt, pyzenfolio_api_error)
+            self.stats.add('retries')
+            self.stats.add('retry_wait_time', wait)
+            self.sleep(wait)
+            attempt += 1
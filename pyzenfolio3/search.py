@@ -0,0 +1,281 @@
+import json
+import sqlite3
+from collections.abc import Mapping
+from datetime import datetime
+
+from pyzenfolio3.exceptions import APIError, ZenfolioError
+from pyzenfolio3.models import to_dict
+from pyzenfolio3.sync import walk_hierarchy
+from pyzenfolio3.utils import DATETIME_FORMAT
+
+
+# photo fields indexed for full-text search, in FTS column order
+SEARCH_FIELDS = ('Title', 'Caption', 'Keywords', 'Categories', 'FileName')
+DEFAULT_SEARCH_LIMIT = 100
+# faults meaning a photo no longer exists, as opposed to auth or param errors
+NOT_FOUND_CODES = frozenset(['E_NOSUCHOBJECT'])
+SEARCH_ORDERS = {
+    'uploaded': 'photos.uploaded_on DESC, photos.id',
+    'taken': 'photos.taken_on DESC, photos.id',
+    # without a text query there is nothing to rank
+    'rank': 'photos.uploaded_on DESC, photos.id',
+}
+
+SEARCH_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS photos ('
+    'id INTEGER PRIMARY KEY, photoset_id INTEGER, taken_on TEXT, uploaded_on TEXT, data TEXT)',
+    'CREATE INDEX IF NOT EXISTS photos_photoset ON photos (photoset_id, uploaded_on)',
+    'CREATE INDEX IF NOT EXISTS photos_taken ON photos (taken_on)',
+    'CREATE INDEX IF NOT EXISTS photos_uploaded ON photos (uploaded_on)',
+    'CREATE TABLE IF NOT EXISTS photo_categories ('
+    'category INTEGER, photo_id INTEGER, PRIMARY KEY (category, photo_id)) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS photo_categories_photo ON photo_categories (photo_id)',
+    'CREATE VIRTUAL TABLE IF NOT EXISTS photo_text USING fts5('
+    "title, caption, keywords, categories, filename, tokenize='unicode61 remove_diacritics 2')",
+)
+
+
+def _date_key(value):
+    """DateTime values as sortable `DATETIME_FORMAT` strings."""
+    if isinstance(value, Mapping):
+        value = value.get('Value')
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    return value
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ' '.join(str(item) for item in value)
+    return str(value)
+
+
+def match_query(text: str) -> str:
+    """Turns free text into an FTS5 query matching every word as a prefix."""
+    terms = ['"{}"*'.format(term.replace('"', '""')) for term in text.split()]
+    return ' '.join(terms)
+
+
+class SearchIndex:
+    """
+    Local full-text and faceted index of photo metadata, in SQLite FTS5.
+
+    `SEARCH_FIELDS` are searchable; `search`, `count` and `facets` can be
+    narrowed to photosets, categories and `TakenOn`/`UploadedOn` ranges.
+    Photos are upserted by Id, so fresh `load_photo` results or a
+    re-crawled photoset update the index in place. Kept in memory unless
+    given a `path`.
+    """
+    def __init__(self, path: str=':memory:'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        for statement in SEARCH_SCHEMA:
+            self.conn.execute(statement)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM photos').fetchone()[0]
+
+    # ---------------------------------------------------------------#
+    #                           Updates                              #
+    # ---------------------------------------------------------------#
+
+    def add_photos(self, photos, photoset_id: int=None) -> int:
+        """
+        Adds or replaces `photos`. Each photo is filed under `photoset_id`,
+        else its `Gallery`, else the photoset it was indexed under before.
+        """
+        conn = self.conn
+        count = 0
+        with conn:
+            for photo in photos:
+                photo_id = photo['Id']
+                set_id = photoset_id if photoset_id is not None else photo.get('Gallery')
+                if set_id is None:
+                    row = conn.execute('SELECT photoset_id FROM photos WHERE id = ?',
+                                       (photo_id,)).fetchone()
+                    set_id = None if row is None else row[0]
+                self._delete(photo_id)
+                conn.execute('INSERT INTO photos VALUES (?, ?, ?, ?, ?)',
+                             (photo_id, set_id, _date_key(photo.get('TakenOn')),
+                              _date_key(photo.get('UploadedOn')),
+                              json.dumps(to_dict(photo), default=str)))
+                conn.execute('INSERT INTO photo_text (rowid, title, caption, keywords, '
+                             'categories, filename) VALUES (?, ?, ?, ?, ?, ?)',
+                             [photo_id] + [_text(photo.get(field)) for field in SEARCH_FIELDS])
+                conn.executemany('INSERT OR IGNORE INTO photo_categories VALUES (?, ?)',
+                                 [(category, photo_id)
+                                  for category in photo.get('Categories') or ()])
+                count += 1
+        return count
+
+    def update_photo(self, photo):
+        """Applies a fresh `load_photo` result."""
+        self.add_photos([photo])
+
+    def add_photoset(self, photoset) -> int:
+        """Replaces the photos of a photoset loaded with its `Photos`."""
+        photos = photoset.get('Photos') or []
+        fresh = {photo['Id'] for photo in photos}
+        with self.conn:
+            rows = self.conn.execute('SELECT id FROM photos WHERE photoset_id = ?',
+                                     (photoset['Id'],))
+            for photo_id in [row[0] for row in rows if row[0] not in fresh]:
+                self._delete(photo_id)
+        return self.add_photos(photos, photoset['Id'])
+
+    def remove_photos(self, photo_ids):
+        with self.conn:
+            for photo_id in photo_ids:
+                self._delete(photo_id)
+
+    def remove_photosets(self, photoset_ids):
+        with self.conn:
+            for photoset_id in photoset_ids:
+                rows = self.conn.execute('SELECT id FROM photos WHERE photoset_id = ?',
+                                         (photoset_id,))
+                for photo_id in [row[0] for row in rows]:
+                    self._delete(photo_id)
+
+    def _delete(self, photo_id: int):
+        self.conn.execute('DELETE FROM photos WHERE id = ?', (photo_id,))
+        self.conn.execute('DELETE FROM photo_text WHERE rowid = ?', (photo_id,))
+        self.conn.execute('DELETE FROM photo_categories WHERE photo_id = ?', (photo_id,))
+
+    def build(self, client, **crawl_kwargs) -> int:
+        """
+        Indexes every photoset reached by `client.crawler(**crawl_kwargs)`.
+        Returns the number of photos.
+
+        Photosets outside the crawl's filters are left alone. When the
+        crawl starts from the whole hierarchy (no `root_group_id`),
+        indexed photosets missing from it have been deleted and are dropped.
+        """
+        crawler = client.crawler(**crawl_kwargs)
+        root = crawler.skeleton()
+        count = 0
+        for photoset in crawler.crawl(root):
+            count += self.add_photoset(photoset)
+        if crawler.root_group_id is None:
+            present = {element.get('Id') for _, element in walk_hierarchy(root)
+                       if element.get('$type') == 'PhotoSet'}
+            known = {row[0] for row in
+                     self.conn.execute('SELECT DISTINCT photoset_id FROM photos')}
+            self.remove_photosets(known - present)
+        return count
+
+    def refresh_photos(self, client, photo_ids, info_level: str='Full') -> int:
+        """
+        Reloads `photo_ids` in one batch and applies the results. Photos
+        reported missing (`NOT_FOUND_CODES`) are dropped; any other error is
+        raised once the rest is applied.
+        """
+        batch = client.batch()
+        calls = [(photo_id, batch.load_photo(photo_id, info_level)) for photo_id in photo_ids]
+        batch.execute()
+        fresh, gone, errors = [], [], []
+        for photo_id, call in calls:
+            try:
+                fresh.append(call.result())
+            except ZenfolioError as pyzenfolio_error:
+                if pyzenfolio_error.code in NOT_FOUND_CODES:
+                    gone.append(photo_id)
+                else:
+                    errors.append(pyzenfolio_error)
+            except APIError as pyzenfolio_error:
+                errors.append(pyzenfolio_error)
+        self.remove_photos(gone)
+        count = self.add_photos(fresh)
+        if errors:
+            raise errors[0]
+        return count
+
+    # ---------------------------------------------------------------#
+    #                           Queries                              #
+    # ---------------------------------------------------------------#
+
+    def _where(self, text, raw, photoset_ids, categories, taken, uploaded):
+        clauses, args = [], []
+        if text:
+            # matched once up front; probing the FTS table per candidate row
+            # is orders of magnitude slower
+            clauses.append('photos.id IN (SELECT rowid FROM photo_text WHERE photo_text MATCH ?)')
+            args.append(text if raw else match_query(text))
+        if photoset_ids is not None:
+            photoset_ids = list(photoset_ids)
+            clauses.append(f"photos.photoset_id IN ({','.join('?' * len(photoset_ids))})")
+            args.extend(photoset_ids)
+        if categories is not None:
+            categories = list(categories)
+            clauses.append('photos.id IN (SELECT photo_id FROM photo_categories '
+                           f"WHERE category IN ({','.join('?' * len(categories))}))")
+            args.extend(categories)
+        for column, bounds in (('taken_on', taken), ('uploaded_on', uploaded)):
+            start, end = bounds or (None, None)
+            if start is not None:
+                clauses.append(f'photos.{column} >= ?')
+                args.append(_date_key(start))
+            if end is not None:
+                clauses.append(f'photos.{column} < ?')
+                args.append(_date_key(end))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        return where, args
+
+    def search(self, text: str=None, photoset_ids=None, categories=None, taken=None,
+               uploaded=None, order_by: str='uploaded', limit: int=DEFAULT_SEARCH_LIMIT,
+               offset: int=0, raw: bool=False):
+        """
+        Photos matching every word of `text` (as prefixes, or an FTS5 query
+        with `raw`) and the filters.
+
+        `photoset_ids` and `categories` match any of their values; `taken`
+        and `uploaded` are `(start, end)` ranges of datetimes or
+        `DATETIME_FORMAT` strings, start inclusive, end exclusive, either
+        may be None. Results are ordered newest first by `uploaded` or
+        `taken`, or by relevance with `rank`, which scores every match and
+        is slower for common words.
+        """
+        if order_by not in SEARCH_ORDERS:
+            raise ValueError(f'order_by must be one of {", ".join(SEARCH_ORDERS)}')
+        if order_by == 'rank' and text:
+            where, args = self._where(None, raw, photoset_ids, categories, taken, uploaded)
+            where = where.replace(' WHERE ', ' AND ', 1)
+            sql = ('SELECT photos.data FROM photo_text JOIN photos ON photos.id = photo_text.rowid '
+                   f'WHERE photo_text MATCH ?{where} ORDER BY photo_text.rank')
+            args = [text if raw else match_query(text)] + args
+        else:
+            where, args = self._where(text, raw, photoset_ids, categories, taken, uploaded)
+            sql = f'SELECT photos.data FROM photos{where} ORDER BY {SEARCH_ORDERS[order_by]}'
+        rows = self.conn.execute(f'{sql} LIMIT ? OFFSET ?', args + [limit, offset])
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self, text: str=None, photoset_ids=None, categories=None, taken=None,
+              uploaded=None, raw: bool=False) -> int:
+        where, args = self._where(text, raw, photoset_ids, categories, taken, uploaded)
+        return self.conn.execute(f'SELECT COUNT(*) FROM photos{where}', args).fetchone()[0]
+
+    def facets(self, text: str=None, photoset_ids=None, categories=None, taken=None,
+               uploaded=None, raw: bool=False) -> dict:
+        """
+        Counts of the matching photos by photoset and category, most common
+        first, and by year taken.
+        """
+        where, args = self._where(text, raw, photoset_ids, categories, taken, uploaded)
+        matching = f' AND photo_id IN (SELECT id FROM photos{where})' if where else ''
+        photos_where = where.replace(' WHERE ', ' AND ', 1)
+        return {
+            'photosets': dict(self.conn.execute(
+                f'SELECT photoset_id, COUNT(*) FROM photos WHERE 1{photos_where} '
+                'GROUP BY 1 ORDER BY 2 DESC', args)),
+            'categories': dict(self.conn.execute(
+                f'SELECT category, COUNT(*) FROM photo_categories WHERE 1{matching} '
+                'GROUP BY 1 ORDER BY 2 DESC', args)),
+            'years': dict(self.conn.execute(
+                f'SELECT substr(taken_on, 1, 4), COUNT(*) FROM photos '
+                f'WHERE taken_on IS NOT NULL{photos_where} GROUP BY 1 ORDER BY 1', args)),
+        }
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+from pyzenfolio3.models import to_dict
+
+
+DEFAULT_SYNC_WORKERS = 4
+# fields that change without the object itself being edited
+VOLATILE_FIELDS = frozenset(['Views', 'Elements', 'Photos', 'UploadUrl', 'VideoUploadUrl'])
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS groups ('
+    'id INTEGER PRIMARY KEY, parent_id INTEGER, title TEXT, modified TEXT, '
+    'signature TEXT, data TEXT)',
+    'CREATE TABLE IF NOT EXISTS photosets ('
+    'id INTEGER PRIMARY KEY, group_id INTEGER, title TEXT, modified TEXT, '
+    'signature TEXT, data TEXT)',
+    'CREATE TABLE IF NOT EXISTS photos ('
+    'id INTEGER PRIMARY KEY, photoset_id INTEGER, filename TEXT, modified TEXT, '
+    'signature TEXT, data TEXT)',
+    'CREATE INDEX IF NOT EXISTS photos_photoset ON photos (photoset_id)',
+    'CREATE TABLE IF NOT EXISTS runs (started REAL, finished REAL, summary TEXT)',
+)
+
+
+def _datetime_value(value):
+    if isinstance(value, Mapping):
+        return value.get('Value')
+    return None if value is None else str(value)
+
+
+def signature(obj) -> str:
+    """Digest of the non-volatile fields of an API object."""
+    fields = {k: v for k, v in obj.items() if k not in VOLATILE_FIELDS}
+    payload = json.dumps(to_dict(fields), sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def walk_hierarchy(root):
+    """
+    Yields `(parent_id, element)` for every Group and PhotoSet under
+    `root`, parents first, without recursion.
+    """
+    stack = [(None, root)]
+    while stack:
+        parent_id, element = stack.pop()
+        yield parent_id, element
+        if element.get('$type') == 'Group':
+            children = element.get('Elements') or []
+            stack.extend((element.get('Id'), e) for e in reversed(children))
+
+
+class ChangeSet:
+    def __init__(self):
+        self.added = []
+        self.changed = []
+        self.removed = []
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self):
+        return {'added': len(self.added), 'changed': len(self.changed),
+                'removed': len(self.removed)}
+
+
+class SyncDiff:
+    """Added, changed and removed groups, photosets and photos of one sync run."""
+    def __init__(self):
+        self.groups = ChangeSet()
+        self.photosets = ChangeSet()
+        self.photos = ChangeSet()
+
+    def __bool__(self):
+        return bool(self.groups or self.photosets or self.photos)
+
+    def summary(self):
+        return {'groups': self.groups.summary(),
+                'photosets': self.photosets.summary(),
+                'photos': self.photos.summary()}
+
+
+class SyncIndex:
+    """SQLite index of an account's groups, photosets and photos."""
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def signatures(self, table: str, where: str='', args=()):
+        rows = self.conn.execute(f'SELECT id, signature FROM {table} {where}', args)
+        return dict(rows.fetchall())
+
+    def load(self, table: str, object_id: int):
+        row = self.conn.execute(f'SELECT data FROM {table} WHERE id = ?',
+                                (object_id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def iter_photos(self, photoset_id: int=None):
+        if photoset_id is None:
+            rows = self.conn.execute('SELECT data FROM photos')
+        else:
+            rows = self.conn.execute('SELECT data FROM photos WHERE photoset_id = ?',
+                                     (photoset_id,))
+        for row in rows:
+            yield json.loads(row[0])
+
+    def last_run(self):
+        row = self.conn.execute('SELECT finished, summary FROM runs '
+                                'ORDER BY finished DESC LIMIT 1').fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+
+class SyncEngine:
+    """
+    Incrementally mirrors account metadata into a `SyncIndex`.
+
+    Every run reads the group hierarchy once, then only fetches the photos
+    of photosets whose signature changed since the previous run, and
+    returns a `SyncDiff` of what was added, changed and removed.
+    """
+    def __init__(self, client, index_path: str, workers: int=DEFAULT_SYNC_WORKERS,
+                 username: str=None):
+        self.client = client
+        self.index = SyncIndex(index_path)
+        self.workers = workers
+        self.username = username
+
+    def run(self) -> SyncDiff:
+        started = time.time()
+        diff = SyncDiff()
+        conn = self.index.conn
+
+        groups, photosets = {}, {}
+        for parent_id, element in walk_hierarchy(self.client.load_group_hierarchy(self.username)):
+            if element.get('$type') == 'Group':
+                groups[element['Id']] = (parent_id, element)
+            elif element.get('$type') == 'PhotoSet':
+                photosets[element['Id']] = (parent_id, element)
+
+        with conn:
+            self._diff_rows('groups', groups, diff.groups, 'ModifiedOn')
+            stale_sets = self._diff_rows('photosets', photosets, diff.photosets, 'ModifiedOn')
+            fetched = self._fetch_photos(stale_sets, photosets)
+            self._diff_photos(fetched, diff.photos)
+            conn.execute('INSERT INTO runs VALUES (?, ?, ?)',
+                         (started, time.time(), json.dumps(diff.summary())))
+        return diff
+
+    def _diff_rows(self, table, fresh, changes, time_field):
+        """Applies `fresh` to `table`, returning the Ids that were added or changed."""
+        conn = self.index.conn
+        known = self.index.signatures(table)
+        updated = []
+        for object_id, (parent_id, element) in fresh.items():
+            sig = signature(element)
+            if known.get(object_id) == sig:
+                continue
+            (changes.changed if object_id in known else changes.added).append(element)
+            data = {k: v for k, v in element.items() if k not in VOLATILE_FIELDS}
+            conn.execute(f'INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?, ?)',
+                         (object_id, parent_id, element.get('Title'),
+                          _datetime_value(element.get(time_field)), sig,
+                          json.dumps(to_dict(data), default=str)))
+            updated.append(object_id)
+
+        for object_id in set(known) - set(fresh):
+            changes.removed.append(self.index.load(table, object_id))
+            conn.execute(f'DELETE FROM {table} WHERE id = ?', (object_id,))
+            if table == 'photosets':
+                # the photos of a removed photoset are diffed as removed too
+                updated.append(object_id)
+        return updated
+
+    def _fetch_photos(self, photoset_ids, live):
+        def fetch(photoset_id):
+            if photoset_id not in live:
+                return photoset_id, []
+            element = live[photoset_id][1]
+            return photoset_id, list(self.client.iter_photo_sets_photos(
+                photoset_id, total=element.get('PhotoCount')))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return dict(executor.map(fetch, photoset_ids))
+
+    def _diff_photos(self, fetched, changes):
+        conn = self.index.conn
+        seen = set()
+        stale = []
+        for photoset_id, photos in fetched.items():
+            known = self.index.signatures('photos', 'WHERE photoset_id = ?', (photoset_id,))
+            fresh_ids = set()
+            for photo in photos:
+                photo_id = photo['Id']
+                fresh_ids.add(photo_id)
+                seen.add(photo_id)
+                sig = signature(photo)
+                row = conn.execute('SELECT photoset_id, signature FROM photos WHERE id = ?',
+                                   (photo_id,)).fetchone()
+                if row is not None and tuple(row) == (photoset_id, sig):
+                    continue
+                (changes.changed if row is not None else changes.added).append(photo)
+                conn.execute('INSERT OR REPLACE INTO photos VALUES (?, ?, ?, ?, ?, ?)',
+                             (photo_id, photoset_id, photo.get('FileName'),
+                              _datetime_value(photo.get('UploadedOn')), sig,
+                              json.dumps(to_dict(photo), default=str)))
+            stale.extend(i for i in known if i not in fresh_ids)
+
+        for photo_id in stale:
+            if photo_id in seen:
+                # moved to another photoset fetched in this run
+                continue
+            changes.removed.append(self.index.load('photos', photo_id))
+            conn.execute('DELETE FROM photos WHERE id = ?', (photo_id,))
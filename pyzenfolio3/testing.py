@@ -0,0 +1,330 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from pyzenfolio3.exceptions import HTTPError, ZenfolioError
+
+
+STUB_TOKEN = 'stub-token'
+STUB_PATH = '/api/1.8/zfapi.asmx'
+UPLOAD_PATH = '/upload'
+DOWNLOAD_PATH = '/download'
+_RANGE = re.compile(r'bytes=(\d+)-(\d*)$')
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # room for a whole worker pool connecting at once
+    request_queue_size = 128
+
+
+def _default_handlers():
+    return {
+        'GetChallenge': lambda params: {'$type': 'AuthChallenge',
+                                        'PasswordSalt': [0] * 16,
+                                        'Challenge': [1] * 16},
+        'Authenticate': lambda params: STUB_TOKEN,
+    }
+
+
+class StubZenfolioServer:
+    """
+    Local JSON-RPC server answering Zenfolio API calls from canned handlers.
+
+    `handlers` maps a method name to either a plain value or a callable
+    taking the request params. Raise `ZenfolioError` from a handler to
+    return a JSON-RPC error item, or `HTTPError` to answer the whole
+    request with its status and headers. With `batch=False` array payloads are
+    rejected with HTTP 400, like an endpoint without batch support.
+
+    `latency` (seconds, or a callable returning seconds) delays every
+    response. `files` maps names to bytes served at `download_url(name)`
+    with an ETag and Range/If-Range support; bodies posted to `upload_url(...)` are drained and
+    recorded in `uploads` as `(path, size)`.
+    """
+    def __init__(self, handlers=None, host='127.0.0.1', port=0, batch: bool=True,
+                 latency=0.0, files=None):
+        self.handlers = _default_handlers()
+        self.handlers.update(handlers or {})
+        self.batch = batch
+        self.latency = latency
+        self.files = dict(files or {})
+        self.calls = []
+        self.uploads = []
+        self._lock = threading.Lock()
+        self._server = _ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def api_endpoint(self):
+        return self.url + STUB_PATH
+
+    def upload_url(self, set_id):
+        return f'{self.url}{UPLOAD_PATH}/{set_id}'
+
+    def download_url(self, name):
+        return f'{self.url}{DOWNLOAD_PATH}/{name}'
+
+    def etag(self, name):
+        return '"{}"'.format(hashlib.md5(self.files[name]).hexdigest())
+
+    def serve_account(self, account):
+        """Answers hierarchy, photoset and download requests from a `StubAccount`."""
+        self.handlers.update(account.handlers(self))
+        self.files.update(account.files())
+        return account
+
+    def delay(self):
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def call_count(self, method):
+        with self._lock:
+            return sum(1 for m, _ in self.calls if m == method)
+
+    def dispatch(self, envelope):
+        method = envelope.get('method')
+        params = envelope.get('params', [])
+        with self._lock:
+            self.calls.append((method, params))
+
+        resp = {'id': envelope.get('id')}
+        if method not in self.handlers:
+            resp['error'] = {'code': 'E_UNKNOWNMETHOD', 'message': method}
+            return resp
+
+        handler = self.handlers[method]
+        try:
+            resp['result'] = handler(params) if callable(handler) else handler
+        except ZenfolioError as stub_error:
+            resp['error'] = {'code': stub_error.code, 'message': stub_error.message}
+        return resp
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                stub.delay()
+                name = self.path.partition('?')[0][len(DOWNLOAD_PATH) + 1:]
+                if not self.path.startswith(DOWNLOAD_PATH + '/') or name not in stub.files:
+                    self._send_body(404, b'', 'text/plain')
+                    return
+                data = stub.files[name]
+                etag = stub.etag(name)
+                match = _RANGE.match(self.headers.get('Range', ''))
+                if_range = self.headers.get('If-Range')
+                if match is None or (if_range is not None and if_range != etag):
+                    self._send_body(200, data, 'application/octet-stream', {'ETag': etag})
+                    return
+                start = int(match.group(1))
+                end = int(match.group(2)) + 1 if match.group(2) else len(data)
+                self._send_body(206, data[start:end], 'application/octet-stream',
+                                {'Content-Range': f'bytes {start}-{end - 1}/{len(data)}',
+                                 'ETag': etag})
+
+            def do_POST(self):
+                stub.delay()
+                if self.path.startswith(UPLOAD_PATH + '/'):
+                    size = self._drain()
+                    with stub._lock:
+                        stub.uploads.append((self.path, size))
+                        photo_id = len(stub.uploads)
+                    self._send_body(200, str(photo_id).encode('ascii'), 'text/plain')
+                    return
+
+                length = int(self.headers.get('Content-Length', 0))
+                envelope = json.loads(self.rfile.read(length).decode('utf-8'))
+                if isinstance(envelope, list) and not stub.batch:
+                    self._send_json(400, {'error': {'code': 'E_BATCHUNSUPPORTED',
+                                                    'message': 'batch payloads not supported'}})
+                    return
+                try:
+                    if isinstance(envelope, list):
+                        payload = [stub.dispatch(e) for e in envelope]
+                    else:
+                        payload = stub.dispatch(envelope)
+                except HTTPError as stub_error:
+                    self._send_body(stub_error.status_code, b'', 'text/plain',
+                                    stub_error.headers)
+                    return
+                self._send_json(200, payload)
+
+            def _drain(self):
+                size = 0
+                if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+                    while True:
+                        length = int(self.rfile.readline().split(b';')[0], 16)
+                        if not length:
+                            self.rfile.readline()
+                            return size
+                        size += len(self.rfile.read(length))
+                        self.rfile.readline()
+                remaining = int(self.headers.get('Content-Length', 0))
+                while remaining:
+                    chunk = self.rfile.read(min(remaining, 1024 * 1024))
+                    size += len(chunk)
+                    remaining -= len(chunk)
+                return size
+
+            def _send_json(self, status, payload):
+                self._send_body(status, json.dumps(payload).encode('utf-8'), 'application/json')
+
+            def _send_body(self, status, body, content_type, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def _datetime(value):
+    return {'$type': 'DateTime', 'Value': value.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+class StubAccount:
+    """
+    Synthetic account of `groups` groups holding `sets_per_group` photosets
+    of `photos_per_set` photos each, nested `depth` groups deep.
+
+    Originals are `photo_size` bytes; `caption_size` pads every photo's
+    caption to grow JSON payloads. Pass it to
+    `StubZenfolioServer.serve_account`.
+    """
+    def __init__(self, groups: int=4, sets_per_group: int=4, photos_per_set: int=25,
+                 depth: int=1, photo_size: int=64 * 1024, caption_size: int=0,
+                 username: str='stub'):
+        self.groups = groups
+        self.sets_per_group = sets_per_group
+        self.photos_per_set = photos_per_set
+        self.depth = depth
+        self.photo_size = photo_size
+        self.caption_size = caption_size
+        self.username = username
+        self._original = bytes(range(256)) * (photo_size // 256) + bytes(photo_size % 256)
+        self._epoch = datetime(2020, 1, 1)
+        self._hierarchy = None
+
+    @property
+    def photo_count(self):
+        return self.groups * self.sets_per_group * self.photos_per_set
+
+    def set_ids(self):
+        return range(1, self.groups * self.sets_per_group + 1)
+
+    def photo(self, server, set_id: int, index: int):
+        photo_id = set_id * 100000 + index
+        return {
+            '$type': 'Photo',
+            'Id': photo_id,
+            'Title': f'Photo {photo_id}',
+            'Caption': 'x' * self.caption_size,
+            'FileName': f'{photo_id}.jpg',
+            'Size': self.photo_size,
+            'Width': 6000,
+            'Height': 4000,
+            'UploadedOn': _datetime(self._epoch + timedelta(minutes=photo_id % 100000)),
+            'TakenOn': _datetime(self._epoch),
+            'OriginalUrl': server.download_url(f'{photo_id}.jpg'),
+            'UrlCore': f'/img/s/v-{index}/p{photo_id}',
+            'Sequence': str(index),
+            'AccessDescriptor': {'$type': 'AccessDescriptor', 'AccessType': 'Public',
+                                 'AccessMask': 'None', 'RealmId': 1},
+        }
+
+    def photoset(self, server, set_id: int, with_photos: bool=False):
+        photoset = {
+            '$type': 'PhotoSet',
+            'Id': set_id,
+            'Title': f'Gallery {set_id}',
+            'Type': 'Gallery',
+            'PhotoCount': self.photos_per_set,
+            'CreatedOn': _datetime(self._epoch),
+            'UploadUrl': server.upload_url(set_id),
+        }
+        if with_photos:
+            photoset['Photos'] = self.photos(server, set_id)
+        return photoset
+
+    def photos(self, server, set_id: int, start: int=0, limit: int=None):
+        stop = self.photos_per_set if limit is None else min(self.photos_per_set, start + limit)
+        return [self.photo(server, set_id, index) for index in range(start, stop)]
+
+    def hierarchy(self, server):
+        if self._hierarchy is None:
+            self._hierarchy = self._build_hierarchy(server)
+        return self._hierarchy
+
+    def _build_hierarchy(self, server):
+        set_ids = iter(self.set_ids())
+        groups = []
+        for group_index in range(self.groups):
+            group_id = 1000000 + group_index
+            sets = [self.photoset(server, next(set_ids)) for _ in range(self.sets_per_group)]
+            element = {'$type': 'Group', 'Id': group_id, 'Title': f'Group {group_id}',
+                       'CreatedOn': _datetime(self._epoch), 'Elements': sets}
+            for level in range(1, self.depth):
+                element = {'$type': 'Group', 'Id': group_id + level * 100000,
+                           'Title': f'Group {group_id}.{level}',
+                           'CreatedOn': _datetime(self._epoch), 'Elements': [element]}
+            groups.append(element)
+        return {'$type': 'Group', 'Id': 1, 'Title': self.username,
+                'CreatedOn': _datetime(self._epoch), 'Elements': groups}
+
+    def files(self):
+        return {f'{set_id * 100000 + index}.jpg': self._original
+                for set_id in self.set_ids() for index in range(self.photos_per_set)}
+
+    def handlers(self, server):
+        def load_photo_set(params):
+            return self.photoset(server, params[0], with_photos=params[2] if len(params) > 2
+                                 else True)
+
+        def load_photo_set_photos(params):
+            start = params[1] if len(params) > 1 else 0
+            limit = params[2] if len(params) > 2 else None
+            return self.photos(server, params[0], start, limit)
+
+        return {
+            'LoadGroupHierarchy': lambda params: self.hierarchy(server),
+            'LoadPhotoSet': load_photo_set,
+            'LoadPhotoSetPhotos': load_photo_set_photos,
+        }
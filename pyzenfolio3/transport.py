@@ -0,0 +1,198 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from pyzenfolio3.exceptions import ConfigError
+
+
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 32
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 120
+TRANSPORT_CHUNK_SIZE = 1024 * 1024
+
+_connect_times = threading.local()
+
+
+def _record_connect(connect):
+    def timed_connect(self):
+        started = time.perf_counter()
+        try:
+            return connect(self)
+        finally:
+            elapsed = time.perf_counter() - started
+            _connect_times.elapsed = getattr(_connect_times, 'elapsed', 0.0) + elapsed
+    return timed_connect
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    connect = _record_connect(HTTPConnection.connect)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    connect = _record_connect(HTTPSConnection.connect)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """Adapter whose connections record how long TCP/TLS setup took."""
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _TimedHTTPConnectionPool,
+                                                   'https': _TimedHTTPSConnectionPool}
+
+
+class RequestsTransport:
+    """
+    Pooled HTTP/1.1 transport on a single `requests.Session`.
+
+    `pool_connections` is the number of hosts kept in the pool,
+    `pool_maxsize` the number of connections kept per host. With
+    `pool_block`, threads beyond `pool_maxsize` wait for a free connection
+    rather than opening throwaway sockets, so one transport can be shared by
+    a thread pool of any size. Connections are kept alive unless
+    `keep_alive` is False. Requests without an explicit `timeout` use
+    `(connect_timeout, read_timeout)`.
+    """
+    def __init__(self, pool_connections: int=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int=DEFAULT_POOL_MAXSIZE, pool_block: bool=True,
+                 connect_timeout: float=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float=DEFAULT_READ_TIMEOUT, keep_alive: bool=True):
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = _TimedHTTPAdapter(pool_connections=pool_connections,
+                                    pool_maxsize=pool_maxsize,
+                                    pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def request(self, method: str, url: str, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def pop_connect_time(self):
+        """Returns the seconds this thread spent opening connections since the last call."""
+        elapsed = getattr(_connect_times, 'elapsed', 0.0)
+        _connect_times.elapsed = 0.0
+        return elapsed
+
+    def close(self):
+        self.session.close()
+
+
+class _HTTPXResponse:
+    """Exposes the subset of `requests.Response` the client relies on."""
+    def __init__(self, response):
+        self._response = response
+
+    @property
+    def status_code(self):
+        return self._response.status_code
+
+    @property
+    def headers(self):
+        return self._response.headers
+
+    @property
+    def content(self):
+        return self._response.read()
+
+    @property
+    def text(self):
+        self._response.read()
+        return self._response.text
+
+    @property
+    def ok(self):
+        return self._response.status_code < 400
+
+    def json(self):
+        self._response.read()
+        return self._response.json()
+
+    def iter_content(self, chunk_size: int=TRANSPORT_CHUNK_SIZE):
+        return self._response.iter_bytes(chunk_size)
+
+    def close(self):
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _httpx_content(data):
+    if hasattr(data, 'read'):
+        return iter(lambda: data.read(TRANSPORT_CHUNK_SIZE), b'')
+    return data
+
+
+class HTTPXTransport:
+    """
+    HTTP/2 capable transport on an `httpx.Client`.
+
+    Requires `httpx` (and `h2` for HTTP/2). Requests to one host are
+    multiplexed over a single connection when the server speaks HTTP/2.
+    """
+    def __init__(self, pool_maxsize: int=DEFAULT_POOL_MAXSIZE,
+                 connect_timeout: float=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float=DEFAULT_READ_TIMEOUT, keep_alive: bool=True,
+                 http2: bool=True):
+        try:
+            import httpx
+        except ImportError as pyzenfolio_import_error:
+            raise ConfigError('HTTPXTransport requires the httpx package') \
+                from pyzenfolio_import_error
+        self._httpx = httpx
+        self.timeout = (connect_timeout, read_timeout)
+        limits = httpx.Limits(max_connections=pool_maxsize,
+                              max_keepalive_connections=pool_maxsize if keep_alive else 0)
+        self.client = httpx.Client(http2=http2, limits=limits,
+                                   timeout=self._timeout(self.timeout))
+
+    def _timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            return self._httpx.Timeout(timeout[1], connect=timeout[0])
+        return self._httpx.Timeout(timeout)
+
+    def request(self, method: str, url: str, params=None, data=None, headers=None,
+                stream: bool=False, timeout=None):
+        request = self.client.build_request(method, url, params=params, headers=headers,
+                                            content=_httpx_content(data),
+                                            timeout=self._timeout(timeout or self.timeout))
+        response = self.client.send(request, stream=stream)
+        return _HTTPXResponse(response)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def pop_connect_time(self):
+        # httpx does not expose connection setup separately from the request
+        return None
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,103 @@
+import mmap
+import os
+
+
+DEFAULT_UPLOAD_CHUNK_SIZE = 1024 * 1024
+DEFAULT_CONTENT_TYPE = 'application/octet-stream'
+
+
+class ProgressReader:
+    """
+    File-like wrapper reporting the number of bytes read so far.
+
+    `progress` is called as `progress(sent, total)` after every read;
+    `total` is None when the size of the source is unknown.
+    """
+    def __init__(self, fileobj, total: int=None, progress=None):
+        self._fileobj = fileobj
+        self.total = total
+        self.sent = 0
+        self.progress = progress
+
+    def read(self, size: int=-1):
+        data = self._fileobj.read(size)
+        self._report(len(data))
+        return data
+
+    def __len__(self):
+        return self.total - self.sent
+
+    def _report(self, count):
+        self.sent += count
+        if self.progress is not None and count:
+            self.progress(self.sent, self.total)
+
+
+def _remaining_size(fileobj):
+    try:
+        position = fileobj.tell()
+        fileobj.seek(0, os.SEEK_END)
+        end = fileobj.tell()
+        fileobj.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return end - position
+
+
+def _iter_chunks(chunks, progress=None):
+    sent = 0
+    for chunk in chunks:
+        sent += len(chunk)
+        if progress is not None:
+            progress(sent, None)
+        yield chunk
+
+
+class UploadSource:
+    """
+    Opens the body of an upload without reading it into memory.
+
+    Accepts a path, a binary file object or an iterable of bytes chunks.
+    Paths are memory-mapped, file objects are read in chunks, iterables
+    are sent with chunked transfer encoding.
+    """
+    def __init__(self, source, filename: str=None, progress=None):
+        self.source = source
+        self.progress = progress
+        self.filename = filename or self._guess_filename(source)
+        self._fid = None
+        self._map = None
+
+    @staticmethod
+    def _guess_filename(source):
+        if isinstance(source, (str, os.PathLike)):
+            return os.path.basename(os.fspath(source))
+        name = getattr(source, 'name', None)
+        if isinstance(name, str):
+            return os.path.basename(name)
+        raise ValueError('filename is required when uploading from a stream')
+
+    def __enter__(self):
+        source = self.source
+        if isinstance(source, (str, os.PathLike)):
+            self._fid = open(source, 'rb')
+            size = os.fstat(self._fid.fileno()).st_size
+            if size == 0:
+                return b''
+            self._map = mmap.mmap(self._fid.fileno(), 0, access=mmap.ACCESS_READ)
+            return ProgressReader(self._map, size, self.progress)
+        if hasattr(source, 'read'):
+            size = _remaining_size(source)
+            if size is None:
+                return _iter_chunks(iter(lambda: source.read(DEFAULT_UPLOAD_CHUNK_SIZE), b''),
+                                    self.progress)
+            return ProgressReader(source, size, self.progress)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return bytes(source)
+        return _iter_chunks(source, self.progress)
+
+    def __exit__(self, *exc_info):
+        if self._map is not None:
+            self._map.close()
+        if self._fid is not None:
+            self._fid.close()
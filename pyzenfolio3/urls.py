@@ -0,0 +1,106 @@
+from pyzenfolio3.constants import PHOTO_RESOLUTIONS, PROFILE_RESOLUTIONS, VIDEO_RESOLUTIONS
+
+
+DEFAULT_URL_HOST = 'photos.zenfolio.com'
+# thumbnails cropped to a square rather than scaled to fit their box; the
+# other small sizes (0, 10 and 11) keep the photo's aspect ratio
+CROPPED_SIZES = frozenset([1])
+
+
+def _fit(width, height, box_width, box_height):
+    """Dimensions of a `width` x `height` image scaled down to fit a box."""
+    if not width or not height:
+        return box_width, box_height
+    scale = min(box_width / width, box_height / height, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+class UrlBuilder:
+    """
+    Builds image URLs of photos locally, from the `UrlHost`, `UrlCore`,
+    `Sequence` and `UrlToken` fields of a `Photo`, so rendering pages does
+    not need an API call per image.
+
+    URLs follow `https://{UrlHost}{UrlCore}-{size}.jpg?sn={Sequence}&tk={UrlToken}`,
+    with `size` a key of `PHOTO_RESOLUTIONS`. Videos use the keys of
+    `VIDEO_RESOLUTIONS` and an `.mp4` extension.
+    """
+    def __init__(self, scheme: str='https', default_host: str=DEFAULT_URL_HOST,
+                 resolutions=None):
+        self.scheme = scheme
+        self.default_host = default_host
+        self.resolutions = dict(PHOTO_RESOLUTIONS if resolutions is None else resolutions)
+        # candidates for best fit, smallest area first
+        self._scaled = sorted((code for code in self.resolutions if code not in CROPPED_SIZES),
+                              key=lambda code: self.resolutions[code][0] * self.resolutions[code][1])
+        self._cropped = sorted((code for code in self.resolutions if code in CROPPED_SIZES),
+                               key=lambda code: self.resolutions[code][0])
+
+    def url(self, photo, size: int, extension: str='jpg') -> str:
+        host = photo.get('UrlHost') or self.default_host
+        url = f"{self.scheme}://{host}{photo['UrlCore']}-{size}.{extension}"
+        sequence = photo.get('Sequence')
+        token = photo.get('UrlToken')
+        if sequence:
+            url += f'?sn={sequence}'
+        if token:
+            url += f"{'&' if sequence else '?'}tk={token}"
+        return url
+
+    def urls(self, photo) -> dict:
+        """Every size variant of a photo (or video), keyed by size code."""
+        if photo.get('IsVideo'):
+            return {code: self.url(photo, code, 'mp4') for code in VIDEO_RESOLUTIONS}
+        return {code: self.url(photo, code) for code in self.resolutions}
+
+    def profile_urls(self, photo) -> dict:
+        return {code: self.url(photo, code) for code in PROFILE_RESOLUTIONS}
+
+    def size(self, photo, code: int):
+        """Rendered `(width, height)` of a size variant of `photo`."""
+        box_width, box_height = self.resolutions[code]
+        if code in CROPPED_SIZES:
+            return box_width, box_height
+        return _fit(photo.get('Width'), photo.get('Height'), box_width, box_height)
+
+    def best_size(self, photo, width: int, height: int, crop: bool=False) -> int:
+        """
+        The smallest size code whose rendition covers the photo scaled to
+        fit `width` x `height`, else the largest one. With `crop`, only
+        square thumbnails at least `max(width, height)` wide qualify.
+        """
+        if crop:
+            side = max(width, height)
+            for code in self._cropped:
+                if self.resolutions[code][0] >= side:
+                    return code
+            return self._cropped[-1]
+
+        want_width, want_height = _fit(photo.get('Width'), photo.get('Height'), width, height)
+        for code in self._scaled:
+            rendered_width, rendered_height = self.size(photo, code)
+            if rendered_width >= want_width and rendered_height >= want_height:
+                return code
+        return self._scaled[-1]
+
+    def best_url(self, photo, width: int, height: int, crop: bool=False) -> str:
+        return self.url(photo, self.best_size(photo, width, height, crop))
+
+    def bulk(self, photos, width: int, height: int, crop: bool=False):
+        """Best-fit URLs for `photos`, in order."""
+        return [self.best_url(photo, width, height, crop) for photo in photos]
+
+
+url_builder = UrlBuilder()
+
+
+def photo_url(photo, size: int) -> str:
+    return url_builder.url(photo, size)
+
+
+def photo_urls(photo) -> dict:
+    return url_builder.urls(photo)
+
+
+def best_fit_url(photo, width: int, height: int, crop: bool=False) -> str:
+    return url_builder.best_url(photo, width, height, crop)
@@ -5,24 +5,90 @@ from pyzenfolio3.exceptions import ConfigError
 
 DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
 
-# TODO do we need a class for this?
+def parse_datetime(value: str) -> datetime:
+    """Parses a `DATETIME_FORMAT` string with the C ISO parser, falling back to strptime."""
+    try:
+        return datetime.fromisoformat(value)
+    except (AttributeError, ValueError):
+        return datetime.strptime(value, DATETIME_FORMAT)
+
+
+_CONTAINER_TYPES = frozenset([dict, list])
+
+
+class _Schema:
+    """Keys of one `$type` seen holding DateTime values or nested containers."""
+    __slots__ = ('known', 'keys', 'scalars')
+
+    def __init__(self):
+        self.known = set()
+        self.keys = []
+        self.scalars = []
+
+    def learn(self, node):
+        # a key seen holding a scalar may hold a date or container on another
+        # object of the type, so its kind is checked again on every object
+        if self.known.issuperset(node) and _CONTAINER_TYPES.isdisjoint(
+                map(type, map(node.get, self.scalars))):
+            return
+        for k, v in node.items():
+            if k in self.keys:
+                continue
+            if isinstance(v, (dict, list)):
+                self.keys.append(k)
+                if k in self.known:
+                    self.scalars.remove(k)
+            elif k not in self.known:
+                self.scalars.append(k)
+            self.known.add(k)
+
+
 class ConvertToDateTime:
     """
     Finds all DateTime instances and converts to datetime objects.
+
+    The tree is walked with an explicit stack rather than recursion. For
+    every `$type` the keys seen holding dates or nested objects are
+    remembered, so objects of that type only visit those keys.
     """
-    def find_and_convert_dates(self, root, items):
-        for k, v in items:
-            if isinstance(v, dict):
-                if '$type' in v and v['$type'] == 'DateTime':
-                    root[k] = datetime.strptime(v['Value'], DATETIME_FORMAT)
-                else:
-                    self.find_and_convert_dates(v, v.items())
-            elif isinstance(v, (list, tuple)):
-                self.find_and_convert_dates(v, enumerate(v))
+    def __init__(self):
+        self._schemas = {}
+
+    def _schema(self, node):
+        schema = self._schemas.get(node.get('$type'))
+        if schema is None:
+            schema = self._schemas[node.get('$type')] = _Schema()
+        schema.learn(node)
+        return schema
+
+    def find_and_convert_dates(self, root, items=None):
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                schema = self._schema(node)
+                for k in schema.keys:
+                    v = node.get(k)
+                    if isinstance(v, dict):
+                        if v.get('$type') == 'DateTime':
+                            node[k] = parse_datetime(v['Value'])
+                        else:
+                            stack.append(v)
+                    elif isinstance(v, list):
+                        stack.append(v)
+            else:
+                for i, v in enumerate(node):
+                    if isinstance(v, dict):
+                        if v.get('$type') == 'DateTime':
+                            node[i] = parse_datetime(v['Value'])
+                        else:
+                            stack.append(v)
+                    elif isinstance(v, list):
+                        stack.append(v)
 
     def __call__(self, data):
-        if hasattr(data, 'items'):
-            self.find_and_convert_dates(data, data.items())
+        if isinstance(data, (dict, list)):
+            self.find_and_convert_dates(data)
         return data
 
 
@@ -36,3 +102,15 @@ def read_config(config_file):
             return json.loads(data)
         except ValueError as config_value_error:
             raise ConfigError('Could not open config file') from config_value_error
+
+
+def process_context():
+    """
+    Multiprocessing context for worker pools. Workers come from a clean
+    forkserver (or are spawned where there is none) instead of forking a
+    process that may be running transport or worker threads.
+    """
+    import multiprocessing
+
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
@@ -129,23 +129,115 @@ VALID_OBJECTS = {
 }
 
 
+# enumerations whose values may be combined as comma-joined flags
+FLAG_ENUMS = frozenset(['AccessMask'])
+
+_enabled = True
+
+
+def set_validation(enabled: bool) -> None:
+    """Turns argument validation on or off process-wide, e.g. for trusted hot paths."""
+    global _enabled
+    _enabled = enabled
+
+
+def validation_enabled() -> bool:
+    return _enabled
+
+
+def _invalid_value(value, data_struct, method):
+    return APIError(f"`{value}` is an invalid value for `{data_struct}` enumeration for `{method}` method.")
+
+
+def _compile_enum(data_struct, values):
+    allowed = frozenset(values)
+
+    def check(value, method):
+        try:
+            if value in allowed:
+                return
+        except TypeError:
+            pass
+        raise _invalid_value(value, data_struct, method)
+
+    if data_struct not in FLAG_ENUMS:
+        return check
+
+    def check_flags(value, method):
+        try:
+            if value in allowed:
+                return
+        except TypeError:
+            raise _invalid_value(value, data_struct, method) from None
+        if not isinstance(value, str) or ',' not in value:
+            raise _invalid_value(value, data_struct, method)
+        for flag in value.split(','):
+            if flag.strip() not in allowed:
+                raise _invalid_value(value, data_struct, method)
+
+    return check_flags
+
+
+def _compile_object(data_struct, checks):
+    def check(value, method):
+        if not isinstance(value, dict):
+            raise APIError(f"`{data_struct}` must be a dict for `{method}` method.'")
+        for k, v in value.items():
+            try:
+                field_check = checks[k]
+            except (KeyError, TypeError):
+                raise APIError(f"`{value}` is an invalid key for `{data_struct}` object for `{method}` method.") from None
+            if field_check is not None:
+                field_check(v, method)
+
+    return check
+
+
+def compile_validators(enums=None, objects=None):
+    """
+    Builds a validator per enumeration and object schema.
+
+    Each validator is called as `check(value, method)` and raises
+    `APIError`. Enumerations become frozenset lookups; objects become a
+    dispatch table from key to the validator of its enumeration or, for
+    nested updaters, of its object schema.
+    """
+    enums = VALID_ENUM if enums is None else enums
+    objects = VALID_OBJECTS if objects is None else objects
+    validators = {name: _compile_enum(name, values) for name, values in enums.items()}
+    tables = {name: {} for name in objects}
+    for name in objects:
+        validators[name] = _compile_object(name, tables[name])
+    # filled once every validator exists, so objects may nest each other
+    for name, fields in objects.items():
+        tables[name].update((key, None if spec is None else validators[spec])
+                            for key, spec in fields.items())
+    return validators
+
+
+VALIDATORS = compile_validators()
+
+
 def assert_type(value, expected_type, param, method):
     if value['$type'] != expected_type:
         raise APIError(f"Got `{value['$type']}` instead of `{expected_type}` value for `{param}` for `{method}` method.")
 
 
 def validate_value(value, data_struct, method):
-    if value not in VALID_ENUM[data_struct]:
-        raise APIError(f"`{value}` is an invalid value for `{data_struct}` enumeration for `{method}` method.")
+    if _enabled:
+        VALIDATORS[data_struct](value, method)
 
 
 def validate_object(value, data_struct, method):
-    if not isinstance(value, dict):
-        raise APIError(f"`{data_struct}` must be a dict for `{method}` method.'")
-
-    for k, v in value.items():
-        if k not in VALID_OBJECTS[data_struct]:
-            raise APIError(f"`{value}` is an invalid key for `{data_struct}` object for `{method}` method.")
-        enum = VALID_OBJECTS[data_struct][k]
-        if enum is not None:
-            validate_value(v, enum, method)
+    if _enabled:
+        VALIDATORS[data_struct](value, method)
+
+
+def build_updater(value, data_struct, method, defaults=None):
+    """Validates `value` and returns it merged over the `defaults` of the updater."""
+    if value is None:
+        value = {}
+    validate_object(value, data_struct, method)
+    if not defaults:
+        return value
+    return {**defaults, **value}
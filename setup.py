@@ -10,13 +10,16 @@ setup(
     version='0.10.0',
     author='Lucas Messenger',
     description=("Light-weight Zenfolio API Python wrapper."),
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     long_description=read('README.md'),
     license="MIT",
     keywords="zenfolio",
     url="https://github.com/layertwo/pyzenfolio3",
     packages=['pyzenfolio3'],
     install_requires=['requests==2.25.1'],
+    extras_require={
+        'fast': ['orjson'],
+    },
     classifiers=[
         'Intended Audience :: Developers',
         'Operating System :: OS Independent',
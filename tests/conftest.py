@@ -0,0 +1,23 @@
+import pytest
+
+from pyzenfolio3 import PyZenfolio
+from pyzenfolio3.testing import StubAccount, StubZenfolioServer
+
+
+@pytest.fixture
+def account():
+    return StubAccount(groups=2, sets_per_group=2, photos_per_set=25, photo_size=4096)
+
+
+@pytest.fixture
+def server(account):
+    with StubZenfolioServer() as server:
+        server.serve_account(account)
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    client = PyZenfolio('user', 'password', api_endpoint=server.api_endpoint)
+    yield client
+    client.transport.close()
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+from pyzenfolio3 import AsyncPyZenfolio
+
+
+def run(server, main, **kwargs):
+    async def wrapper():
+        client = AsyncPyZenfolio('user', 'password', api_endpoint=server.api_endpoint, **kwargs)
+        try:
+            return await main(client)
+        finally:
+            client.close()
+    return asyncio.run(wrapper())
+
+
+def test_gather_mixed_calls(server, account):
+    async def main(client):
+        return await asyncio.gather(client.load_group_hierarchy(),
+                                    client.load_photo_set(3, 'Level1', False),
+                                    client.load_photo_sets_photos(2, 0, 5))
+
+    hierarchy, photoset, photos = run(server, main)
+    assert len(hierarchy['Elements']) == account.groups
+    assert photoset['Id'] == 3
+    assert 'Photos' not in photoset
+    assert [photo['Id'] for photo in photos] == [200000 + index for index in range(5)]
+
+
+def test_authenticates_once_on_first_use(server):
+    async def main(client):
+        return await asyncio.gather(*[client.load_photo_set(set_id, 'Level1', False)
+                                      for set_id in range(1, 5)] * 3)
+
+    assert len(run(server, main)) == 12
+    assert server.call_count('GetChallenge') == 1
+    assert server.call_count('Authenticate') == 1
+
+
+def test_max_concurrency_bounds_requests_in_flight(server):
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def load_photo(params):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return {'$type': 'Photo', 'Id': params[0]}
+
+    server.handlers['LoadPhoto'] = load_photo
+
+    async def main(client):
+        await client.authenticate()
+        return await asyncio.gather(*[client.load_photo(photo_id) for photo_id in range(12)])
+
+    photos = run(server, main, max_concurrency=3)
+    assert [photo['Id'] for photo in photos] == list(range(12))
+    assert 1 < in_flight[1] <= 3
+
+
+def test_client_survives_several_event_loops(server):
+    server.latency = 0.01
+    client = AsyncPyZenfolio('user', 'password', api_endpoint=server.api_endpoint,
+                             max_concurrency=2)
+
+    async def main():
+        return await asyncio.gather(*[client.load_photo_set(set_id, 'Level1', False)
+                                      for set_id in range(1, 5)] * 2)
+
+    try:
+        for _ in range(2):
+            assert len(asyncio.run(main())) == 8
+    finally:
+        client.close()
+    assert server.call_count('Authenticate') == 1
+
+
+def test_adownload_many(server, client, tmp_path):
+    photos = client.load_photo_sets_photos(1, 0, 3)
+    downloader = client.downloader(str(tmp_path), workers=2)
+    results = asyncio.run(downloader.adownload_many(('set', photo) for photo in photos))
+    assert [result.status for result in results] == ['downloaded'] * 3
+    assert sorted(p.name for p in (tmp_path / 'set').iterdir()) == \
+        sorted(photo['FileName'] for photo in photos)
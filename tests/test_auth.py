@@ -0,0 +1,57 @@
+import os
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pyzenfolio3 import CallbackTokenStore, FileTokenStore, PyZenfolio, ZenfolioError
+
+
+def test_threads_share_one_authentication(server, client):
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        photosets = list(executor.map(lambda set_id: client.load_photo_set(set_id, 'Level1', False),
+                                      [1, 2, 1, 2] * 4))
+    assert [photoset['Id'] for photoset in photosets] == [1, 2, 1, 2] * 4
+    assert server.call_count('Authenticate') == 1
+
+
+def test_refused_token_is_refreshed_once(server, client):
+    photoset = server.handlers['LoadPhotoSet']
+    refused = []
+
+    def load_photo_set(params):
+        if not refused:
+            refused.append(params)
+            raise ZenfolioError('E_INVALIDTOKEN', 'token expired')
+        return photoset(params)
+    server.handlers['LoadPhotoSet'] = load_photo_set
+    assert client.load_photo_set(1, 'Level1', False)['Id'] == 1
+    assert server.call_count('Authenticate') == 2
+    assert server.call_count('LoadPhotoSet') == 2
+
+
+def test_file_token_store_is_shared_and_private(server, tmp_path):
+    path = str(tmp_path / 'tokens.json')
+    first = PyZenfolio('user', 'password', api_endpoint=server.api_endpoint,
+                       token_store=FileTokenStore(path))
+    first.ensure_token()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    second = PyZenfolio('user', 'password', api_endpoint=server.api_endpoint,
+                        token_store=FileTokenStore(path))
+    assert second.ensure_token() == first.token
+    assert server.call_count('Authenticate') == 1
+
+
+def test_callback_token_store_skips_expired_and_discarded_tokens():
+    saved = {'user': ('old', time.time() - 1)}
+    store = CallbackTokenStore(load=saved.get,
+                               save=lambda username, token, expires:
+                               saved.__setitem__(username, (token, expires)))
+    assert store.get('user') is None
+
+    store.put('user', 'live', time.time() + 60)
+    assert store.get('user')[0] == 'live'
+    store.discard('user', 'stale')
+    assert store.get('user')[0] == 'live'
+    store.discard('user', 'live')
+    assert saved['user'] == (None, None)
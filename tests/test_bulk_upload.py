@@ -0,0 +1,71 @@
+import itertools
+
+from pyzenfolio3 import BulkUploader, UploadResult
+
+
+def serve_creates(server):
+    ids = itertools.count(5000)
+    created = {}
+
+    def create_group(params):
+        return {'$type': 'Group', 'Id': next(ids), 'Title': params[1]['Title']}
+
+    def create_photo_set(params):
+        photoset_id = next(ids)
+        created[photoset_id] = {'$type': 'PhotoSet', 'Id': photoset_id,
+                                'Title': params[2]['Title'],
+                                'UploadUrl': server.upload_url(photoset_id), 'Photos': []}
+        return created[photoset_id]
+    server.handlers['CreateGroup'] = create_group
+    server.handlers['CreatePhotoSet'] = create_photo_set
+    server.handlers['LoadPhotoSet'] = lambda params: created[params[0]]
+    return created
+
+
+def make_tree(root):
+    for relpath in ('trip/a.jpg', 'trip/b.jpg', 'trip/day1/c.jpg', 'trip/.hidden.jpg',
+                    'trip/d.jpg.part', 'e.jpg'):
+        path = root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(relpath.encode('utf-8'))
+
+
+def test_bulk_upload_mirrors_the_tree_and_resumes(server, client, tmp_path):
+    created = serve_creates(server)
+    root = tmp_path / 'photos'
+    make_tree(root)
+    journal = str(tmp_path / 'journal.jsonl')
+
+    results = list(BulkUploader(client, 1000000, journal, workers=2).upload(str(root)))
+    assert sorted(r.path for r in results) == ['e.jpg', 'trip/a.jpg', 'trip/b.jpg',
+                                               'trip/day1/c.jpg']
+    assert {r.status for r in results} == {UploadResult.UPLOADED}
+    # the root photoset, a `trip` group plus photoset, and `trip/day1`
+    assert server.call_count('CreateGroup') == 1
+    assert sorted(photoset['Title'] for photoset in created.values()) == \
+        ['day1', 'photos', 'trip']
+    assert len(server.uploads) == 4
+
+    results = list(BulkUploader(client, 1000000, journal, workers=2).upload(str(root)))
+    assert {r.status for r in results} == {UploadResult.SKIPPED}
+    assert server.call_count('CreateGroup') == 1
+    assert server.call_count('CreatePhotoSet') == 3
+    assert len(server.uploads) == 4
+
+
+def test_bulk_upload_reports_failed_files(server, client, tmp_path):
+    serve_creates(server)
+    root = tmp_path / 'photos'
+    make_tree(root)
+    uploader = BulkUploader(client, 1000000, workers=2)
+    upload_photo = client.upload_photo
+
+    def flaky_upload(photoset, path, *args, **kwargs):
+        if path.endswith('b.jpg'):
+            raise OSError('unreadable')
+        return upload_photo(photoset, path, *args, **kwargs)
+    client.upload_photo = flaky_upload
+    results = {r.path: r for r in uploader.upload(str(root))}
+    assert not results['trip/b.jpg'].ok
+    assert isinstance(results['trip/b.jpg'].error, OSError)
+    assert all(r.ok for path, r in results.items() if path != 'trip/b.jpg')
@@ -0,0 +1,65 @@
+from pyzenfolio3 import PyZenfolio, ResponseCache, SQLiteCacheBackend
+
+READS = (
+    ('LoadPhoto', [100001]),
+    ('LoadPhotoSet', [1, 'Level1', False]),
+    ('LoadPhotoSet', [2, 'Level1', False]),
+    ('LoadPhotoSetPhotos', [1, 0, 10]),
+    ('LoadGroup', [7, 'Level1', True]),
+    ('LoadGroupHierarchy', ['user']),
+)
+
+
+def fill(cache):
+    for method, params in READS:
+        cache.update(method, params, {'Id': 1})
+
+
+def cached(cache, login=None):
+    return {method for method, params in READS if cache.get(method, params, login)[0]}
+
+
+def test_group_title_photo_writes_invalidate_groups():
+    cache = ResponseCache()
+    for method in ('SetGroupTitlePhoto', 'RemoveGroupTitlePhoto'):
+        fill(cache)
+        cache.update(method, [7, 100001], None)
+        assert cached(cache) == {'LoadPhoto', 'LoadPhotoSet', 'LoadPhotoSetPhotos'}
+
+
+def test_photo_count_writes_invalidate_hierarchy():
+    cache = ResponseCache()
+    for method in ('MovePhotos', 'DeletePhoto', 'DeletePhotos'):
+        fill(cache)
+        cache.update(method, [100001], None)
+        assert 'LoadGroupHierarchy' not in cached(cache)
+
+
+def test_upload_invalidates_target_photoset(server):
+    cache = ResponseCache()
+    client = PyZenfolio('user', 'password', api_endpoint=server.api_endpoint, cache=cache)
+    photoset = client.load_photo_set(1, 'Level1', False)
+    client.load_photo_set(2, 'Level1', False)
+    client.load_group_hierarchy()
+    calls = server.call_count('LoadPhotoSet')
+
+    client.upload_photo(photoset, [b'jpeg'], filename='new.jpg')
+    assert not cache.get('LoadPhotoSet', [1, 'Level1', False], 'user')[0]
+    assert cache.get('LoadPhotoSet', [2, 'Level1', False], 'user')[0]
+    assert not cache.get('LoadGroupHierarchy', ['user'], 'user')[0]
+    client.load_photo_set(1, 'Level1', False)
+    client.load_photo_set(2, 'Level1', False)
+    assert server.call_count('LoadPhotoSet') == calls + 1
+
+
+def test_accounts_sharing_a_backend_do_not_share_entries(server, tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    alice = PyZenfolio('alice', 'password', api_endpoint=server.api_endpoint,
+                       cache=ResponseCache(SQLiteCacheBackend(path)))
+    bob = PyZenfolio('bob', 'password', api_endpoint=server.api_endpoint,
+                     cache=ResponseCache(SQLiteCacheBackend(path)))
+    alice.load_photo_set(1, 'Level1', False)
+    bob.load_photo_set(1, 'Level1', False)
+    alice.load_photo_set(1, 'Level1', False)
+    assert server.call_count('LoadPhotoSet') == 2
+    assert len(alice.cache.backend) == 2
@@ -0,0 +1,114 @@
+import pytest
+
+from pyzenfolio3 import (
+    HTTPError,
+    PyZenfolio,
+    RequestScheduler,
+    RetryPolicy,
+)
+
+
+def failing(times, status=503, result=None):
+    """Handler raising `status` `times` times before answering `result`."""
+    calls = []
+
+    def handler(params):
+        calls.append(params)
+        if len(calls) <= times:
+            raise HTTPError('stub', status, {}, None)
+        return result if result is not None else {'$type': 'Photo', 'Id': params[0]}
+    return handler
+
+
+def test_batch_falls_back_to_single_requests(server, client):
+    server.batch = False
+    for _ in range(2):
+        with client.batch() as batch:
+            calls = [batch.load_photo_set(set_id, 'Level1', False) for set_id in range(1, 4)]
+        assert [call.result()['Id'] for call in calls] == [1, 2, 3]
+    assert not client.batch_supported
+    assert server.call_count('LoadPhotoSet') == 6
+
+
+def test_batch_survives_transient_errors(server, client):
+    server.handlers['LoadPhoto'] = failing(1)
+    client.ensure_token()
+    with client.batch() as batch:
+        failed = batch.load_photo(1)
+    with pytest.raises(HTTPError):
+        failed.result()
+    assert client.batch_supported
+
+    with client.batch() as batch:
+        calls = [batch.load_photo(photo_id) for photo_id in (2, 3)]
+    assert [call.result()['Id'] for call in calls] == [2, 3]
+
+
+def test_retries_transient_errors(server):
+    server.handlers['LoadPhoto'] = failing(2)
+    scheduler = RequestScheduler(sleep=lambda seconds: None)
+    client = PyZenfolio('user', 'password', api_endpoint=server.api_endpoint,
+                        scheduler=scheduler)
+    assert client.load_photo(7)['Id'] == 7
+    assert scheduler.stats.as_dict()['retries'] == 2
+
+    server.handlers['LoadPhoto'] = failing(3)
+    client.scheduler = RequestScheduler(RetryPolicy(max_retries=1), sleep=lambda seconds: None)
+    with pytest.raises(HTTPError) as error:
+        client.load_photo(7)
+    assert error.value.status_code == 503
+
+
+def test_pagination(server, client, account):
+    photos = list(client.iter_photo_sets_photos(1, page_size=10))
+    assert [photo['Id'] for photo in photos] == [100000 + index
+                                                  for index in range(account.photos_per_set)]
+    # the short third page doesn't end paging, only the empty fourth one does
+    assert server.call_count('LoadPhotoSetPhotos') == 4
+
+    photos = list(client.iter_photo_sets_photos(1, page_size=10, total=account.photos_per_set))
+    assert len(photos) == account.photos_per_set
+    assert server.call_count('LoadPhotoSetPhotos') == 7
+
+    photos = list(client.iter_photo_sets_photos(1, page_size=10, max_items=12))
+    assert len(photos) == 12
+
+
+def test_pagination_survives_a_capped_limit(server, client, account):
+    photos = account.handlers(server)['LoadPhotoSetPhotos']
+    server.handlers['LoadPhotoSetPhotos'] = lambda params: photos(
+        [params[0], params[1], min(params[2], 7)])
+    ids = [photo['Id'] for photo in client.iter_photo_sets_photos(1, page_size=10)]
+    assert ids == [100000 + index for index in range(account.photos_per_set)]
+
+
+def test_eager_models(server):
+    client = PyZenfolio('user', 'password', api_endpoint=server.api_endpoint, models=True,
+                        eager_models=True)
+    photoset = client.load_photo_set(1)
+    assert photoset._decoded == -1
+    assert all(photo._decoded == -1 for photo in photoset._Photos)
+    assert photoset.Photos[0].AccessDescriptor.AccessType == 'Public'
+
+
+def test_authenticate_retries_with_a_fresh_challenge(server):
+    challenges = []
+
+    def get_challenge(params):
+        challenges.append(params)
+        return {'$type': 'AuthChallenge', 'PasswordSalt': [0] * 16,
+                'Challenge': [len(challenges)] * 16}
+    server.handlers['GetChallenge'] = get_challenge
+    server.handlers['Authenticate'] = failing(1, result='token')
+    client = PyZenfolio('user', 'password', api_endpoint=server.api_endpoint,
+                        scheduler=RequestScheduler(sleep=lambda seconds: None))
+    assert client.ensure_token() == 'token'
+    assert len(challenges) == 2
+    assert server.call_count('Authenticate') == 2
+
+
+def test_retry_after_is_capped():
+    policy = RetryPolicy(backoff_max=5)
+    error = HTTPError('stub', 503, {'Retry-After': '3600'}, None)
+    assert policy.delay(0, error) == 5
+    assert not policy.is_idempotent('Authenticate')
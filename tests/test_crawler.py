@@ -0,0 +1,26 @@
+def test_crawl_loads_every_photoset_with_its_photos(server, client, account):
+    photosets = list(client.crawler(page_size=10))
+    assert sorted(photoset['Id'] for photoset in photosets) == list(account.set_ids())
+    assert all(len(photoset['Photos']) == account.photos_per_set for photoset in photosets)
+    assert server.call_count('LoadGroupHierarchy') == 1
+    assert server.call_count('LoadPhotoSet') == len(account.set_ids())
+    # the known PhotoCount ends paging without an empty trailing page
+    assert server.call_count('LoadPhotoSetPhotos') == len(account.set_ids()) * 3
+
+
+def test_crawl_filters(server, client):
+    crawl = client.crawler(group_ids=[1000001], photoset_ids=[1], with_photos=False)
+    assert sorted(photoset['Id'] for photoset in crawl) == [1, 3, 4]
+    assert server.call_count('LoadPhotoSetPhotos') == 0
+
+    crawl = client.crawler(group_ids=[1000001], info_level='Level1', with_photos=False,
+                           predicate=lambda photoset: photoset['Id'] % 2 == 0)
+    assert [photoset['Id'] for photoset in crawl] == [4]
+    assert server.call_count('LoadPhotoSet') == 3
+
+
+def test_stopping_early_cancels_queued_fetches(server, client):
+    crawl = client.crawler(workers=1, queue_size=1, with_photos=False).crawl()
+    next(crawl)
+    crawl.close()
+    assert server.call_count('LoadPhotoSet') <= 2
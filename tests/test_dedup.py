@@ -0,0 +1,39 @@
+import hashlib
+import os
+
+from pyzenfolio3 import DigestCache, Hasher, RemoteIndex
+
+
+def write(tmp_path, name, data):
+    path = str(tmp_path / name)
+    with open(path, 'wb') as fid:
+        fid.write(data)
+    return path
+
+
+def test_hasher_pools_and_caches_digests(tmp_path):
+    paths = [write(tmp_path, f'{index}.jpg', bytes([index]) * 10000) for index in range(6)]
+    cache = DigestCache(str(tmp_path / 'digests.sqlite'))
+    with Hasher(cache, workers=2) as hasher:
+        digests = hasher.digests(paths)
+    assert digests == {path: hashlib.md5(open(path, 'rb').read()).hexdigest()
+                       for path in paths}
+    assert cache.get(paths[0], 'md5', os.stat(paths[0])) == digests[paths[0]]
+
+    write(tmp_path, '0.jpg', b'edited')
+    assert cache.get(paths[0], 'md5', os.stat(paths[0])) is None
+    assert Hasher(cache).digest(paths[0]) == hashlib.md5(b'edited').hexdigest()
+
+
+def test_remote_index_needs_name_and_size_or_checksum():
+    index = RemoteIndex([{'FileName': 'IMG_0001.JPG', 'Size': 100},
+                         {'FileName': 'other.jpg', 'Size': 5, 'FileHash': 'ABCDEF'}])
+    assert index.is_duplicate('IMG_0001.JPG', 100)
+    assert not index.is_duplicate('IMG_0001.JPG', 200)
+    assert not index.is_duplicate('IMG_0001.JPG', 200, 'f00')
+    assert index.is_duplicate('renamed.jpg', 5, 'abcdef')
+
+    assert index.claim('f00')
+    assert not index.claim('f00')
+    index.release('f00')
+    assert index.claim('f00')
@@ -0,0 +1,76 @@
+import os
+
+from pyzenfolio3 import PARTIAL_SUFFIX, VALIDATOR_SUFFIX, DownloadResult
+
+
+def photo(server, photo_id, file_name, name):
+    return {'$type': 'Photo', 'Id': photo_id, 'FileName': file_name,
+            'OriginalUrl': server.download_url(name), 'Size': len(server.files[name])}
+
+
+def test_file_names_stay_inside_basepath(server, client, tmp_path):
+    server.files.update({'a': b'a' * 100, 'b': b'b' * 100})
+    downloader = client.downloader(str(tmp_path / 'photos'))
+    results = [downloader.download('set', photo(server, 1, '../../escape.jpg', 'a')),
+               downloader.download('set', photo(server, 2, '/tmp/absolute.jpg', 'b'))]
+    assert [result.status for result in results] == [DownloadResult.DOWNLOADED] * 2
+    assert sorted(os.listdir(tmp_path)) == ['photos']
+    assert sorted(os.listdir(tmp_path / 'photos' / 'set')) == ['absolute.jpg', 'escape.jpg']
+
+
+def test_duplicate_file_names_are_kept_apart(server, client, tmp_path):
+    server.files.update({'a': b'a' * 100000, 'b': b'b' * 100000})
+    downloader = client.downloader(str(tmp_path), workers=2)
+    jobs = [('set', photo(server, 1, 'IMG_0001.JPG', 'a')),
+            ('set', photo(server, 2, 'IMG_0001.JPG', 'b'))]
+    results = list(downloader.download_many(jobs))
+    assert all(result.ok for result in results)
+    with open(tmp_path / 'set' / 'IMG_0001.JPG', 'rb') as fid:
+        assert fid.read() == server.files['a']
+    with open(tmp_path / 'set' / 'IMG_0001-2.JPG', 'rb') as fid:
+        assert fid.read() == server.files['b']
+    assert downloader.download(*jobs[1]).status == DownloadResult.SKIPPED
+
+
+def interrupted(server, client, tmp_path, size, validator):
+    """A downloader and photo whose download stopped after `size` bytes."""
+    photo = client.load_photo_sets_photos(1, 0, 1)[0]
+    downloader = client.downloader(str(tmp_path))
+    path = downloader.target_path('set', photo)
+    os.makedirs(os.path.dirname(path))
+    with open(path + PARTIAL_SUFFIX, 'wb') as fid:
+        fid.write(server.files[photo['FileName']][:size])
+    if validator is not None:
+        with open(path + PARTIAL_SUFFIX + VALIDATOR_SUFFIX, 'w') as fid:
+            fid.write(validator)
+    return downloader, photo, path
+
+
+def test_resumes_partial_download(server, client, tmp_path):
+    downloader, photo, path = interrupted(server, client, tmp_path, 1000,
+                                          server.etag('100000.jpg'))
+    result = downloader.download('set', photo)
+    assert result.status == DownloadResult.RESUMED
+    with open(path, 'rb') as fid:
+        assert fid.read() == server.files[photo['FileName']]
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+    assert downloader.download('set', photo).status == DownloadResult.SKIPPED
+
+
+def test_restarts_when_original_changed(server, client, tmp_path):
+    downloader, photo, path = interrupted(server, client, tmp_path, 1000,
+                                          server.etag('100000.jpg'))
+    edited = bytes(reversed(server.files['100000.jpg']))
+    server.files['100000.jpg'] = edited
+    assert downloader.download('set', photo).status == DownloadResult.DOWNLOADED
+    with open(path, 'rb') as fid:
+        assert fid.read() == edited
+
+
+def test_restarts_without_validator(server, client, tmp_path):
+    downloader, photo, path = interrupted(server, client, tmp_path, 1000, None)
+    with open(path + PARTIAL_SUFFIX, 'r+b') as fid:
+        fid.write(b'stale')
+    assert downloader.download('set', photo).status == DownloadResult.DOWNLOADED
+    with open(path, 'rb') as fid:
+        assert fid.read() == server.files[photo['FileName']]
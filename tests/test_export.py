@@ -0,0 +1,33 @@
+import csv
+import json
+
+from pyzenfolio3 import PHOTO_COLUMNS, export_accounts, export_photos, open_writer
+
+
+def test_ndjson_rows_follow_columns(client, account, tmp_path):
+    columns = [column for column in PHOTO_COLUMNS if column[0] in ('Id', 'UploadedOn', 'account')]
+    path = str(tmp_path / 'photos.ndjson')
+    writer = open_writer(path, columns=columns)
+    try:
+        count = export_photos(client, writer, columns=columns)
+    finally:
+        writer.close()
+    with open(path) as fid:
+        rows = [json.loads(line) for line in fid]
+    assert count == len(rows) == account.photo_count
+    assert list(rows[0]) == ['account', 'Id', 'UploadedOn']
+    assert rows[0]['account'] == 'user'
+    assert rows[0]['UploadedOn'].startswith('2020-01-01')
+
+
+def test_export_accounts_on_worker_processes(server, account, tmp_path):
+    accounts = [{'username': name, 'password': 'password', 'api_endpoint': server.api_endpoint}
+                for name in ('alice', 'bob')]
+    results = sorted(export_accounts(accounts, str(tmp_path), 'csv', processes=2),
+                     key=lambda result: result.account)
+    assert [(result.account, result.rows, result.ok) for result in results] == \
+        [('alice', account.photo_count, True), ('bob', account.photo_count, True)]
+    with open(results[0].path, newline='') as fid:
+        rows = list(csv.DictReader(fid))
+    assert len(rows) == account.photo_count
+    assert {row['account'] for row in rows} == {'alice'}
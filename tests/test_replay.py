@@ -0,0 +1,80 @@
+import os
+import stat
+
+import pytest
+
+from pyzenfolio3 import (
+    CASSETTE_MAGIC,
+    APIError,
+    ConfigError,
+    PyZenfolio,
+    RecordingTransport,
+    ReplayTransport,
+)
+
+
+def session(client, tmp_path):
+    """Calls that go through every transport path: RPC, batch, upload and download."""
+    photoset = client.load_photo_set(1, 'Level1', False)
+    with client.batch() as batch:
+        calls = [batch.load_photo_set(set_id, 'Level1', False) for set_id in (2, 3)]
+    uploaded = client.upload_photo(photoset, iter([b'jpeg'] * 3), filename='new.jpg')
+    photo = client.load_photo_sets_photos(1, 0, 1)[0]
+    result = client.downloader(str(tmp_path)).download('set', photo)
+    with open(result.path, 'rb') as fid:
+        original = fid.read()
+    return (photoset['Title'], [call.result()['Title'] for call in calls], uploaded,
+            original)
+
+
+def record(server, path, tmp_path):
+    transport = RecordingTransport(path)
+    client = PyZenfolio('user', 'password', api_endpoint=server.api_endpoint,
+                        transport=transport)
+    with transport:
+        return session(client, tmp_path / 'recorded')
+
+
+def test_replay_matches_the_recorded_run_offline(server, tmp_path):
+    path = str(tmp_path / 'run.cassette')
+    recorded = record(server, path, tmp_path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    server.stop()
+
+    with ReplayTransport(path) as transport:
+        client = PyZenfolio('user', 'password', api_endpoint=server.api_endpoint,
+                            transport=transport)
+        assert session(client, tmp_path / 'replayed') == recorded
+        with pytest.raises(APIError):
+            client.load_photo_set(4, 'Level1', False)
+
+
+def test_repeated_requests_replay_in_order(server, tmp_path):
+    path = str(tmp_path / 'run.cassette')
+    titles = iter(['first', 'second'])
+    server.handlers['LoadGroup'] = lambda params: {'$type': 'Group', 'Id': params[0],
+                                                   'Title': next(titles)}
+    with RecordingTransport(path) as transport:
+        client = PyZenfolio('user', 'password', api_endpoint=server.api_endpoint,
+                            transport=transport)
+        for _ in range(2):
+            client.load_group(7, 'Level1', False)
+
+    with ReplayTransport(path) as transport:
+        client = PyZenfolio('user', 'password', api_endpoint=server.api_endpoint,
+                            transport=transport)
+        assert [client.load_group(7, 'Level1', False)['Title'] for _ in range(3)] == \
+            ['first', 'second', 'second']
+
+
+def test_unfinished_and_foreign_files_are_refused(tmp_path):
+    # a recording that was never closed has no index or footer
+    unfinished = tmp_path / 'run.cassette'
+    unfinished.write_bytes(CASSETTE_MAGIC + b'{"result": null}' * 4)
+    with pytest.raises(ConfigError):
+        ReplayTransport(str(unfinished))
+
+    other = tmp_path / 'other'
+    other.write_bytes(b'not a cassette')
+    with pytest.raises(ConfigError):
+        ReplayTransport(str(other))
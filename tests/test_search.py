@@ -0,0 +1,42 @@
+import pytest
+
+from pyzenfolio3 import SearchIndex, ZenfolioError
+
+
+@pytest.fixture
+def index(client):
+    index = SearchIndex()
+    index.build(client)
+    yield index
+    index.close()
+
+
+def test_build_and_search(index, account):
+    assert len(index) == account.photo_count
+    assert [photo['Id'] for photo in index.search('100003')] == [100003]
+    assert index.count(photoset_ids=[1, 2]) == 2 * account.photos_per_set
+    assert index.facets(photoset_ids=[1])['photosets'] == {1: account.photos_per_set}
+    assert index.search('nothing like this') == []
+
+
+def test_filtered_build_keeps_other_photosets(index, client, account):
+    index.build(client, photoset_ids=[1])
+    assert len(index) == account.photo_count
+
+
+def test_refresh_drops_only_missing_photos(index, client, server):
+    def load_photo(params):
+        if params[0] == 100001:
+            raise ZenfolioError('E_NOSUCHOBJECT', 'gone')
+        if params[0] == 100002:
+            raise ZenfolioError('E_NOACCESS', 'private')
+        return {'$type': 'Photo', 'Id': params[0], 'Title': 'renamed zebra', 'Gallery': 1}
+
+    server.handlers['LoadPhoto'] = load_photo
+    with pytest.raises(ZenfolioError) as error:
+        index.refresh_photos(client, [100000, 100001, 100002])
+    assert error.value.code == 'E_NOACCESS'
+    assert [photo['Id'] for photo in index.search('zebra')] == [100000]
+    assert index.search('100001') == []
+    assert [photo['Id'] for photo in index.search('100002')] == [100002]
+
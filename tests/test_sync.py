@@ -0,0 +1,35 @@
+from pyzenfolio3 import SyncEngine
+
+
+def test_sync_only_refetches_changed_photosets(server, client, account, tmp_path):
+    engine = SyncEngine(client, str(tmp_path / 'index.sqlite'), workers=2)
+    diff = engine.run()
+    assert diff.summary()['groups']['added'] == account.groups + 1
+    assert diff.summary()['photosets']['added'] == len(account.set_ids())
+    assert diff.summary()['photos']['added'] == account.photo_count
+    calls = server.call_count('LoadPhotoSetPhotos')
+
+    assert not engine.run()
+    assert server.call_count('LoadPhotoSetPhotos') == calls
+
+    photoset = account.hierarchy(server)['Elements'][0]['Elements'][0]
+    photoset['Title'] = 'Renamed'
+    photoset['PhotoCount'] -= 1
+    diff = engine.run()
+    assert [p['Title'] for p in diff.photosets.changed] == ['Renamed']
+    assert [p['Id'] for p in diff.photos.removed] == [photoset['Id'] * 100000 +
+                                                      account.photos_per_set - 1]
+    assert not diff.photos.added and not diff.photos.changed
+    assert server.call_count('LoadPhotoSetPhotos') == calls + 1
+    assert len(list(engine.index.iter_photos(photoset['Id']))) == account.photos_per_set - 1
+    assert engine.index.last_run()[1] == diff.summary()
+
+
+def test_sync_removes_photos_of_removed_photosets(server, client, account, tmp_path):
+    engine = SyncEngine(client, str(tmp_path / 'index.sqlite'))
+    engine.run()
+    removed = account.hierarchy(server)['Elements'][0]['Elements'].pop()
+    diff = engine.run()
+    assert [p['Id'] for p in diff.photosets.removed] == [removed['Id']]
+    assert len(diff.photos.removed) == account.photos_per_set
+    assert not list(engine.index.iter_photos(removed['Id']))
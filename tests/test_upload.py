@@ -0,0 +1,24 @@
+import io
+
+import pytest
+
+
+def test_upload_streams_paths_files_and_chunks(server, client, tmp_path):
+    photoset = client.load_photo_set(1, 'Level1', False)
+    path = tmp_path / 'a.jpg'
+    path.write_bytes(b'x' * 3000)
+    progress = []
+
+    client.upload_photo(photoset, str(path), progress=lambda sent, total:
+                        progress.append((sent, total)))
+    assert progress[-1] == (3000, 3000)
+    client.upload_photo(photoset, io.BytesIO(b'y' * 100), filename='b.jpg')
+    client.upload_photo(photoset, iter([b'z' * 10, b'z' * 20]), filename='c.jpg')
+    assert [size for _, size in server.uploads] == [3000, 100, 30]
+    assert all(upload.startswith('/upload/1?filename=') for upload, _ in server.uploads)
+
+
+def test_upload_from_an_unnamed_stream_needs_a_filename(client):
+    photoset = client.load_photo_set(1, 'Level1', False)
+    with pytest.raises(ValueError):
+        client.upload_photo(photoset, iter([b'data']))
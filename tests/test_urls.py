@@ -0,0 +1,30 @@
+from pyzenfolio3 import UrlBuilder
+
+PHOTO = {'UrlCore': '/img/s/v-1/p123', 'UrlHost': 'example.zenfolio.com', 'Sequence': '4',
+         'UrlToken': 'tok', 'Width': 6000, 'Height': 4000}
+
+
+def test_url():
+    assert UrlBuilder().url(PHOTO, 2) == \
+        'https://example.zenfolio.com/img/s/v-1/p123-2.jpg?sn=4&tk=tok'
+
+
+def test_small_sizes_keep_aspect_ratio():
+    builder = UrlBuilder()
+    assert builder.size(PHOTO, 0) == (80, 53)
+    assert builder.size(PHOTO, 10) == (120, 80)
+    assert builder.size(PHOTO, 1) == (60, 60)
+
+
+def test_best_size_is_smallest_that_fits():
+    builder = UrlBuilder()
+    assert builder.best_size(PHOTO, 80, 80) == 0
+    assert builder.best_size(PHOTO, 100, 100) == 10
+    assert builder.best_size(PHOTO, 300, 300) == 2
+    assert builder.best_size(PHOTO, 5000, 5000) == 6
+
+
+def test_crop_only_picks_square_thumbnails():
+    builder = UrlBuilder()
+    assert builder.best_size(PHOTO, 50, 50, crop=True) == 1
+    assert builder.best_size(PHOTO, 200, 200, crop=True) == 1
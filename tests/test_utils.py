@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from pyzenfolio3.utils import ConvertToDateTime
+
+
+def date(value):
+    return {'$type': 'DateTime', 'Value': value}
+
+
+def test_keys_first_seen_as_scalars_are_revisited():
+    convert = ConvertToDateTime()
+    first = convert({'$type': 'Photo', 'TakenOn': None, 'Extra': 'none',
+                     'UploadedOn': date('2020-01-02 03:04:05')})
+    assert first['UploadedOn'] == datetime(2020, 1, 2, 3, 4, 5)
+
+    second = convert({'$type': 'Photo', 'TakenOn': date('2019-05-06 07:08:09'),
+                      'Extra': [{'$type': 'Photo', 'TakenOn': date('2018-01-01 00:00:00')}],
+                      'UploadedOn': date('2020-01-02 03:04:05')})
+    assert second['TakenOn'] == datetime(2019, 5, 6, 7, 8, 9)
+    assert second['Extra'][0]['TakenOn'] == datetime(2018, 1, 1)
+
+
+def test_untyped_objects_do_not_hide_dates():
+    convert = ConvertToDateTime()
+    convert({'Value': 1})
+    assert convert([{'Value': date('2020-01-02 03:04:05')}])[0]['Value'] == \
+        datetime(2020, 1, 2, 3, 4, 5)
@@ -0,0 +1,60 @@
+import pytest
+
+from pyzenfolio3 import (
+    APIError,
+    build_updater,
+    compile_validators,
+    set_validation,
+    validate_object,
+    validate_value,
+)
+
+
+def test_enums():
+    validate_value('Level1', 'InformationLevel', 'LoadPhotoSet')
+    for value in ('Level4', None, ['Level1'], {}):
+        with pytest.raises(APIError):
+            validate_value(value, 'InformationLevel', 'LoadPhotoSet')
+
+
+def test_flag_enums_accept_combinations():
+    validate_value('ProtectExif, NoCollections', 'AccessMask', 'UpdatePhotoSetAccess')
+    with pytest.raises(APIError):
+        validate_value('ProtectExif,Nope', 'AccessMask', 'UpdatePhotoSetAccess')
+    with pytest.raises(APIError):
+        validate_value('Public', 'AccessMask', 'UpdatePhotoSetAccess')
+
+
+def test_objects_check_keys_and_nested_enums():
+    validate_object({'AccessType': 'Public', 'AccessMask': 'None'}, 'AccessUpdater', 'Update')
+    with pytest.raises(APIError):
+        validate_object({'AccessType': 'Everyone'}, 'AccessUpdater', 'Update')
+    with pytest.raises(APIError):
+        validate_object({'Owner': 'me'}, 'GroupUpdater', 'CreateGroup')
+    with pytest.raises(APIError):
+        validate_object(['Title'], 'GroupUpdater', 'CreateGroup')
+
+
+def test_build_updater_merges_defaults():
+    defaults = {'Title': '', 'Caption': ''}
+    assert build_updater({'Title': 'Trip'}, 'GroupUpdater', 'CreateGroup', defaults) == \
+        {'Title': 'Trip', 'Caption': ''}
+    assert build_updater(None, 'GroupUpdater', 'CreateGroup') == {}
+
+
+def test_compiled_objects_may_nest():
+    validators = compile_validators({'Color': ['Red']},
+                                    {'Inner': {'Color': 'Color'}, 'Outer': {'Inner': 'Inner'}})
+    validators['Outer']({'Inner': {'Color': 'Red'}}, 'Paint')
+    with pytest.raises(APIError):
+        validators['Outer']({'Inner': {'Color': 'Blue'}}, 'Paint')
+
+
+def test_validation_can_be_disabled():
+    set_validation(False)
+    try:
+        validate_value('Level4', 'InformationLevel', 'LoadPhotoSet')
+    finally:
+        set_validation(True)
+    with pytest.raises(APIError):
+        validate_value('Level4', 'InformationLevel', 'LoadPhotoSet')